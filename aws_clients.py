@@ -0,0 +1,162 @@
+import os
+import threading
+
+import lazy_imports
+
+# boto3 is imported when the first client is created, see lazy_imports
+boto3 = lazy_imports.lazy("boto3")
+botocore_config = lazy_imports.lazy("botocore.config")
+
+# AWS client settings shared by every service client
+AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "standard")
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "3"))
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", "5"))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", "60"))
+
+# Bedrock generations can run far longer than an S3 read
+SERVICE_READ_TIMEOUTS = {
+    "bedrock-runtime": float(os.getenv("BEDROCK_READ_TIMEOUT", "120"))
+}
+
+# Bedrock throttling is retried by rate_limiter, which also needs to see it to back off
+SERVICE_MAX_ATTEMPTS = {
+    "bedrock-runtime": 1
+}
+
+# Presigned S3 PUT URLs only sign the Content-Length header with SigV4
+SERVICE_SIGNATURE_VERSIONS = {
+    "s3": "s3v4"
+}
+
+
+def client_config(service_name: str, read_timeout: float = None):
+    """
+    Build the botocore config for a service from the AWS_* settings.
+
+    Args:
+        service_name (str): boto3 service name, e.g. 's3' or 'bedrock-runtime'
+        read_timeout (float): Read timeout overriding the service default
+
+    Returns:
+        botocore.config.Config: Pool size, retry mode and timeouts for the client
+    """
+    return botocore_config.Config(
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        retries={"mode": AWS_RETRY_MODE, "max_attempts": SERVICE_MAX_ATTEMPTS.get(service_name, AWS_MAX_ATTEMPTS)},
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=read_timeout or SERVICE_READ_TIMEOUTS.get(service_name, AWS_READ_TIMEOUT),
+        signature_version=SERVICE_SIGNATURE_VERSIONS.get(service_name)
+    )
+
+
+class ClientRegistry:
+    """
+    Creates each boto3 client once and hands the same instance to every caller.
+    boto3 clients are thread-safe, sessions are not, so creation happens under a lock.
+    Clients with a custom read timeout are cached separately from the service default.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._clients = {}
+        self._registered = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = boto3.Session(
+                aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+                region_name=AWS_REGION
+            )
+        return self._session
+
+    def get(self, service_name: str, read_timeout: float = None):
+        key = service_name if read_timeout is None else (service_name, read_timeout)
+        with self._lock:
+            stats = self._stats.setdefault(service_name, {"created": 0, "reused": 0})
+            client = self._registered.get(service_name) or self._clients.get(key)
+            if client is None:
+                client = self._get_session().client(service_name, config=client_config(service_name, read_timeout))
+                self._clients[key] = client
+                stats["created"] += 1
+            else:
+                stats["reused"] += 1
+            return client
+
+    def has(self, service_name: str, read_timeout: float = None) -> bool:
+        key = service_name if read_timeout is None else (service_name, read_timeout)
+        with self._lock:
+            return service_name in self._registered or key in self._clients
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                service_name: {
+                    **counts,
+                    "reuse_ratio": counts["reused"] / max(1, counts["created"] + counts["reused"])
+                }
+                for service_name, counts in self._stats.items()
+            }
+
+    def register(self, service_name: str, client):
+        """
+        Use a prebuilt client for a service, e.g. a local fake for testing.
+        """
+        with self._lock:
+            self._stats.setdefault(service_name, {"created": 0, "reused": 0})
+            self._registered[service_name] = client
+
+    def reset(self):
+        """
+        Drop every cached client, e.g. after credentials were rotated.
+        """
+        with self._lock:
+            self._clients.clear()
+            self._session = None
+
+
+_registry = ClientRegistry()
+
+
+def get_client(service_name: str, read_timeout: float = None):
+    """
+    Return the shared boto3 client for a service, creating it on first use.
+
+    Args:
+        service_name (str): boto3 service name, e.g. 's3' or 'bedrock-runtime'
+        read_timeout (float): Read timeout in seconds, e.g. the timeout of a model route.
+                              Defaults to the service read timeout
+
+    Returns:
+        botocore client shared across threads
+    """
+    return _registry.get(service_name, read_timeout)
+
+
+def has_client(service_name: str, read_timeout: float = None) -> bool:
+    """
+    Whether get_client would return an existing or registered client instead of creating one.
+    """
+    return _registry.has(service_name, read_timeout)
+
+
+def register_client(service_name: str, client):
+    """
+    Replace the shared client of a service, e.g. with bench.fake_bedrock.FakeBedrockRuntime.
+
+    Args:
+        service_name (str): boto3 service name
+        client: Object exposing the client methods the application calls
+    """
+    _registry.register(service_name, client)
+
+
+def client_stats() -> dict:
+    """
+    Return how many clients were created and how many lookups reused an existing one, per service.
+    """
+    return _registry.stats()
@@ -0,0 +1,143 @@
+import io
+import json
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+import aws_clients
+
+
+def _default_responder(payload):
+    """
+    Return a JSON answer shaped like the classification or analysis response the prompts ask for.
+    """
+    instructions = payload["messages"][0]["content"][0]["text"]
+    if "classification" in instructions.lower():
+        answer = {"category": "Financial Document", "class": 5, "confidence_score": 0.9}
+    else:
+        answer = {"summary": {"value": "Synthetic summary", "confidence_score": 0.9}}
+    return json.dumps(answer)
+
+
+class FakeBedrockRuntime:
+    """
+    In-process stand-in for the bedrock-runtime client that injects throttling.
+    Calls are throttled when more than `capacity` run at once, when more than `rpm`
+    calls started in the last minute, or at random with probability `throttle_rate`.
+    """
+
+    def __init__(self, capacity=4, rpm=None, throttle_rate=0.0, latency=0.05, responder=_default_responder):
+        self.capacity = capacity
+        self.rpm = rpm
+        self.throttle_rate = throttle_rate
+        self.latency = latency
+        self.responder = responder
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self._started = []
+        self._lock = threading.Lock()
+
+    def _enter(self, operation):
+        with self._lock:
+            now = time.monotonic()
+            self._started = [started for started in self._started if now - started < 60]
+            over_rpm = self.rpm is not None and len(self._started) >= self.rpm
+            if self.in_flight >= self.capacity or over_rpm or random.random() < self.throttle_rate:
+                self.throttled += 1
+                raise ClientError(
+                    {"Error": {"Code": "ThrottlingException", "Message": "Too many requests, please wait before trying again."}},
+                    operation
+                )
+            self._started.append(now)
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _generate(self, body, operation):
+        payload = json.loads(body)
+        self._enter(operation)
+        try:
+            time.sleep(self.latency)
+            text = self.responder(payload)
+        finally:
+            self._exit()
+        usage = {
+            "input_tokens": len(body) // 4,
+            "output_tokens": len(text) // 4
+        }
+        return text, usage
+
+    def invoke_model(self, body, modelId, accept=None, contentType=None):
+        text, usage = self._generate(body, "InvokeModel")
+        response_body = {"content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "usage": usage}
+        return {"body": io.BytesIO(json.dumps(response_body).encode())}
+
+    def invoke_model_with_response_stream(self, body, modelId, accept=None, contentType=None):
+        text, usage = self._generate(body, "InvokeModelWithResponseStream")
+        messages = [{"type": "message_start", "message": {"usage": {"input_tokens": usage["input_tokens"]}}}]
+        messages.extend(
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text[start:start + 20]}}
+            for start in range(0, len(text), 20)
+        )
+        messages.append({"type": "message_delta", "usage": {"output_tokens": usage["output_tokens"]}})
+        return {"body": [{"chunk": {"bytes": json.dumps(message).encode()}} for message in messages]}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "peak_in_flight": self.peak_in_flight
+            }
+
+
+def install(**options) -> FakeBedrockRuntime:
+    """
+    Register a FakeBedrockRuntime as the shared bedrock-runtime client.
+
+    Args:
+        **options: FakeBedrockRuntime settings (capacity, rpm, throttle_rate, latency, responder)
+
+    Returns:
+        FakeBedrockRuntime: The installed fake
+    """
+    fake = FakeBedrockRuntime(**options)
+    aws_clients.register_client("bedrock-runtime", fake)
+    return fake
+
+
+if __name__ == "__main__":
+    # Drive the shared limiter with a burst of concurrent calls against a fake that throttles above 3 in flight
+    from concurrent.futures import ThreadPoolExecutor
+
+    import rate_limiter
+
+    fake = install(capacity=3, latency=0.1)
+    limiter = rate_limiter.AdaptiveLimiter(initial_concurrency=8)
+    payload = json.dumps({
+        "max_tokens": 100,
+        "messages": [{"role": "user", "content": [{"type": "text", "text": "analysis"}]}]
+    })
+
+    def call_once(_):
+        def invoke():
+            response = fake.invoke_model(body=payload, modelId="fake")
+            response_body = json.loads(response["body"].read())
+            usage = response_body["usage"]
+            return response_body["content"][0]["text"], usage["input_tokens"] + usage["output_tokens"]
+        return limiter.call(invoke, estimated_tokens=200)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        results = list(executor.map(call_once, range(100)))
+    print(f"{len(results)} calls in {time.monotonic() - started:.2f}s")
+    print("fake:", fake.stats())
+    print("limiter:", limiter.stats())
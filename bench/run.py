@@ -0,0 +1,403 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench import stubs
+from bench.synthetic import CLASS_LINES, make_scanned_pdf, make_text_pdf
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+class RSSSampler:
+    """
+    Samples the resident set size of this process in the background and keeps the peak.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current_rss():
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # No procfs, fall back to the lifetime peak (kilobytes on Linux, bytes on macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current_rss())
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def measure(name, operation, inputs, iterations, concurrency=1, pages_per_input=None):
+    """
+    Run `operation` over the inputs `iterations` times after one warm-up call.
+
+    Args:
+        name (str): Scenario name
+        operation (callable): Called with one input, returns True on success
+        inputs (list): Inputs cycled through across iterations
+        iterations (int): Timed calls
+        concurrency (int): Calls in flight at once
+        pages_per_input (list): Page count of each input, to report pages per second
+
+    Returns:
+        dict: Latency percentiles, throughput, errors and peak RSS of the scenario
+    """
+    operation(inputs[0])
+    work = [index % len(inputs) for index in range(iterations)]
+    latencies = []
+    errors = 0
+
+    def timed(index):
+        started = time.perf_counter()
+        ok = operation(inputs[index])
+        return time.perf_counter() - started, ok
+
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        if concurrency <= 1:
+            results = [timed(index) for index in work]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(timed, work))
+        wall = time.perf_counter() - started
+
+    for latency, ok in results:
+        latencies.append(latency)
+        errors += 0 if ok else 1
+
+    result = {
+        "scenario": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "throughput_per_s": round(iterations / wall, 3),
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1)
+    }
+    if pages_per_input:
+        pages = sum(pages_per_input[index] for index in work)
+        result["pages_per_s"] = round(pages / wall, 2)
+    return result
+
+
+def stage_scenarios(main, page_counts, iterations):
+    """
+    Benchmarks of the extraction, classification and parsing functions on their own.
+    """
+    import classifier
+    import compaction
+    import json_repair
+    import ocr
+    import scanned
+    import token_budget
+
+    results = []
+    for pages in page_counts:
+        text_pdfs = [make_text_pdf(doc_class, pages) for doc_class in CLASS_LINES]
+        scanned_pdfs = [make_scanned_pdf(doc_class, pages) for doc_class in CLASS_LINES]
+        page_list = [pages] * len(CLASS_LINES)
+
+        results.append(measure(
+            f"detect_scanned text {pages}p", lambda pdf: scanned.detect_scanned(pdf)["is_scanned"] is False,
+            text_pdfs, iterations, pages_per_input=page_list
+        ))
+        results.append(measure(
+            f"detect_scanned scanned {pages}p", lambda pdf: scanned.detect_scanned(pdf)["is_scanned"] is True,
+            scanned_pdfs, iterations, pages_per_input=page_list
+        ))
+        results.append(measure(
+            f"analyze_pdf_pages text {pages}p", lambda pdf: bool(scanned.analyze_pdf_pages(pdf)["text"]),
+            text_pdfs, iterations, pages_per_input=page_list
+        ))
+        results.append(measure(
+            f"analyze_pdf_pages_streaming text {pages}p",
+            lambda pdf: bool(scanned.load_page_texts(scanned.analyze_pdf_pages_streaming(pdf))["text"]),
+            text_pdfs, iterations, pages_per_input=page_list
+        ))
+        results.append(measure(
+            f"extract_text_from_pdf_bytes text {pages}p",
+            lambda pdf: bool(main.extract_text_from_pdf_bytes(pdf)["text"]),
+            text_pdfs, iterations, pages_per_input=page_list
+        ))
+        if shutil.which("tesseract") and ocr.OCR_ENABLED:
+            results.append(measure(
+                f"ocr_pdf scanned {pages}p", lambda pdf: bool(ocr.ocr_pdf(pdf)["text"]),
+                scanned_pdfs, max(1, iterations // 2), pages_per_input=page_list
+            ))
+        else:
+            print(f"Skipping ocr_pdf scanned {pages}p: tesseract is not installed or OCR_ENABLED is off", file=sys.stderr)
+
+        page_texts = [
+            [page["text"] for page in scanned.analyze_pdf_pages(pdf)["pages"]] for pdf in text_pdfs
+        ]
+        results.append(measure(
+            f"shape_for_classification {pages}p",
+            lambda texts: bool(token_budget.shape_for_classification(texts)), page_texts, iterations
+        ))
+        results.append(measure(
+            f"compaction.compact_pages {pages}p",
+            lambda texts: compaction.compact_pages(texts)[1]["tokens_after"] > 0, page_texts, iterations
+        ))
+        results.append(measure(
+            f"classifier.classify {pages}p",
+            lambda texts: classifier.classify(token_budget.shape_for_classification(texts))["class"] is not None,
+            page_texts, iterations
+        ))
+
+    model_outputs = [
+        '{"summary": {"value": "ok", "confidence_score": 0.9}, "validation": {"language": true}}',
+        'Here is the analysis:\n```json\n{"summary": {"value": "ok"}, "validation": {"language": TRUE, "age_check": NUll}}\n```',
+        '{"summary": {"value": "truncated output that stops in the mid'
+    ]
+    results.append(measure(
+        "json_repair.parse_json_object", lambda text: bool(json_repair.parse_json_object(text)[0]),
+        model_outputs, iterations * 20
+    ))
+    return results
+
+
+def endpoint_scenarios(client, page_counts, iterations, concurrency):
+    """
+    Benchmarks of the HTTP endpoints against the stubbed S3, Mongo and Bedrock.
+    """
+    import aws_clients
+    import ocr
+
+    s3 = aws_clients.get_client("s3")
+    results = []
+    for pages in page_counts:
+        keys = []
+        for doc_class in CLASS_LINES:
+            key = f"text/{doc_class}-{pages}p.pdf"
+            s3.put_object(Bucket=stubs.BENCH_BUCKET, Key=key, Body=make_text_pdf(doc_class, pages))
+            keys.append(key)
+        page_list = [pages] * len(keys)
+
+        def summarize(key):
+            response = client.post("/generate_summary", json={
+                "bucket_name": stubs.BENCH_BUCKET, "object_key": key, "file_name": key
+            })
+            return response.status_code == 200 and "result" in response.json()
+
+        results.append(measure(
+            f"POST /generate_summary text {pages}p", summarize, keys, iterations,
+            concurrency=concurrency, pages_per_input=page_list
+        ))
+
+        def summarize_batch(batch_keys):
+            response = client.post("/generate_summary/batch", json={"items": [
+                {"bucket_name": stubs.BENCH_BUCKET, "object_key": key, "file_name": key} for key in batch_keys
+            ]})
+            last_line = json.loads(response.text.strip().splitlines()[-1])
+            return response.status_code == 200 and last_line.get("error") is None
+
+        results.append(measure(
+            f"POST /generate_summary/batch 6x{pages}p", summarize_batch, [keys], max(1, iterations // 3)
+        ))
+
+        def inspect(key):
+            response = client.post("/inspect_pdf", json={"bucket_name": stubs.BENCH_BUCKET, "object_key": key})
+            return response.status_code == 200 and response.json()["page_count"] == pages
+
+        results.append(measure(
+            f"POST /inspect_pdf ranged {pages}p", inspect, keys, iterations,
+            concurrency=concurrency, pages_per_input=page_list
+        ))
+
+        uploads = [make_text_pdf(doc_class, pages) for doc_class in CLASS_LINES]
+
+        def upload(pdf):
+            response = client.post("/upload_pdf", files={"file": ("bench.pdf", pdf, "application/pdf")})
+            return response.status_code == 200
+
+        results.append(measure(
+            f"POST /upload_pdf {pages}p", upload, uploads, iterations, concurrency=concurrency
+        ))
+
+    # Scanned documents only reach analysis when tesseract is installed
+    if not shutil.which("tesseract") or not ocr.OCR_ENABLED:
+        print("Skipping POST /generate_summary scanned 2p: tesseract is not installed or OCR_ENABLED is off", file=sys.stderr)
+        return results
+    scanned_keys = []
+    for doc_class in CLASS_LINES:
+        key = f"scanned/{doc_class}-2p.pdf"
+        s3.put_object(Bucket=stubs.BENCH_BUCKET, Key=key, Body=make_scanned_pdf(doc_class, 2))
+        scanned_keys.append(key)
+
+    def summarize_scanned(key):
+        response = client.post("/generate_summary", json={
+            "bucket_name": stubs.BENCH_BUCKET, "object_key": key, "file_name": key
+        })
+        return response.status_code == 200 and "result" in response.json()
+
+    results.append(measure(
+        "POST /generate_summary scanned 2p", summarize_scanned, scanned_keys, max(1, iterations // 2),
+        pages_per_input=[2] * len(scanned_keys)
+    ))
+    return results
+
+
+def startup_scenarios(iterations):
+    """
+    Cold start of a worker: a fresh interpreter importing the app, with and without
+    preloading the modules the startup warm-up imports. Runs outside the stubs, the
+    import cost has to be measured before anything else pulled the modules in.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    programs = {
+        "startup: import main": "import main",
+        "startup: import main + preload": "import main, warmup, lazy_imports; lazy_imports.preload(warmup.WARMUP_MODULES)"
+    }
+
+    def run(program):
+        completed = subprocess.run([sys.executable, "-c", program], cwd=root, capture_output=True)
+        return completed.returncode == 0
+
+    return [measure(name, run, [program], iterations) for name, program in programs.items()]
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare p50 latency and throughput with a stored baseline.
+
+    Returns:
+        list: Scenarios that got slower than the tolerance allows
+    """
+    previous = {entry["scenario"]: entry for entry in baseline.get("results", [])}
+    regressions = []
+    print(f"\n{'scenario':48} {'p50 ms':>10} {'baseline':>10} {'change':>8}")
+    for entry in results:
+        before = previous.get(entry["scenario"])
+        if before is None:
+            print(f"{entry['scenario']:48} {entry['p50_ms']:>10} {'-':>10} {'new':>8}")
+            continue
+        change = (entry["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(entry["scenario"])
+            flag = "  REGRESSION"
+        print(f"{entry['scenario']:48} {entry['p50_ms']:>10} {before['p50_ms']:>10} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'scenario':48} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>9} {'pages/s':>9} {'rss MB':>8} {'err':>4}")
+    for entry in results:
+        print(
+            f"{entry['scenario']:48} {entry['p50_ms']:>10} {entry['p99_ms']:>10} {entry['throughput_per_s']:>9} "
+            f"{entry.get('pages_per_s', '-'):>9} {entry['peak_rss_mb']:>8} {entry['errors']:>4}"
+        )
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the PDF summary pipeline")
+    parser.add_argument("--pages", default="1,10,50", help="Comma separated page counts")
+    parser.add_argument("--iterations", type=int, default=12, help="Timed calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent requests in endpoint scenarios")
+    parser.add_argument("--bedrock-latency", type=float, default=0.2, help="Seconds per fake Bedrock call")
+    parser.add_argument("--only", choices=("stages", "endpoints", "startup"), help="Run one group of scenarios")
+    parser.add_argument("--verbose", action="store_true", help="Keep the application's log output")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown before a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 on any regression")
+    args = parser.parse_args(argv)
+
+    page_counts = [int(pages) for pages in args.pages.split(",")]
+    results = []
+    if args.only in (None, "startup"):
+        results.extend(startup_scenarios(args.iterations))
+
+    main, fake, aws_mock = stubs.start(bedrock_latency=args.bedrock_latency)
+
+    from fastapi.testclient import TestClient
+
+    # The pipeline prints per document, keep the report readable unless asked for the logs
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    try:
+        with quiet, TestClient(main.app) as client:
+            if args.only in (None, "stages"):
+                results.extend(stage_scenarios(main, page_counts, args.iterations))
+            if args.only in (None, "endpoints"):
+                results.extend(endpoint_scenarios(client, page_counts, args.iterations, args.concurrency))
+    finally:
+        aws_mock.stop()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "bedrock_latency": args.bedrock_latency,
+            "pages": page_counts,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency
+        },
+        "fake_bedrock": fake.stats(),
+        "results": results
+    }
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+    else:
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline to record one")
+
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
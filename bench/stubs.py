@@ -0,0 +1,77 @@
+import json
+import os
+
+from bench.synthetic import CLASS_LINES
+
+BENCH_BUCKET = "bench-documents"
+
+
+def _classify_by_markers(text):
+    """
+    Class whose synthetic marker lines occur most often in the text, like a perfect model would answer.
+    """
+    counts = {doc_class: sum(text.count(line) for line in lines) for doc_class, lines in CLASS_LINES.items()}
+    return max(counts, key=counts.get)
+
+
+def bench_responder(payload):
+    """
+    Fake Bedrock answers for the classification, chunk summary and analysis prompts.
+    """
+    import classifier
+
+    content = payload["messages"][0]["content"]
+    instructions = content[0]["text"]
+    document = content[-1]["text"] if len(content) > 1 else ""
+    if instructions.startswith("Perform a classification"):
+        doc_class = _classify_by_markers(document)
+        answer = {"category": classifier.CATEGORIES[doc_class], "class": doc_class, "confidence_score": 0.95}
+    elif "part of a longer document" in instructions:
+        answer = {"facts": ["synthetic fact"], "key_values": {}, "concerns": []}
+    else:
+        answer = {
+            "summary": {"value": "Synthetic summary of the document", "confidence_score": 0.9},
+            "validation": {"language": True}
+        }
+    return json.dumps(answer)
+
+
+def start(bedrock_latency=0.2, bedrock_capacity=64):
+    """
+    Point every external service at a local stand-in and import the application.
+    S3 is served by moto, Mongo by mongomock and Bedrock by fake_bedrock with a fixed latency.
+    Must run before main is imported anywhere.
+
+    Args:
+        bedrock_latency (float): Seconds each fake Bedrock call takes
+        bedrock_capacity (int): Concurrent fake Bedrock calls before it throttles
+
+    Returns:
+        tuple: (main module, FakeBedrockRuntime, moto mock to stop at the end)
+    """
+    # Full pipeline on every iteration: no result cache, no log lines per request
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+    os.environ.setdefault("TRACE_LOGS", "false")
+    os.environ.setdefault("LOCAL_CLASSIFIER_COLLECT_SAMPLES", "false")
+
+    import mongomock
+    from moto import mock_aws
+
+    aws_mock = mock_aws()
+    aws_mock.start()
+
+    import mongo_store
+    mongo_store._client = mongomock.MongoClient()
+
+    import aws_clients
+    import main
+    from bench import fake_bedrock
+
+    aws_clients.get_client("s3").create_bucket(Bucket=BENCH_BUCKET)
+    # The upload endpoint writes to its default bucket
+    aws_clients.get_client("s3").create_bucket(Bucket="pdfsummarydocuments")
+    fake = fake_bedrock.install(capacity=bedrock_capacity, latency=bedrock_latency, responder=bench_responder)
+    return main, fake, aws_mock
@@ -0,0 +1,192 @@
+import io
+import random
+import zlib
+
+from PIL import Image, ImageDraw
+
+# A4 in PDF points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+LINES_PER_PAGE = 48
+
+# Representative lines per document class, same class numbers as classifier.CATEGORIES
+CLASS_LINES = {
+    0: [
+        "PASSPORT", "Surname: DOE", "Given names: JANE MARIE", "Nationality: BRITISH CITIZEN",
+        "Date of birth: 14 MAR 1985", "Place of birth: LONDON", "Sex: F",
+        "Date of issue: 02 JAN 2020", "Date of expiry: 02 JAN 2030", "Passport No: 123456789",
+        "P<GBRDOE<<JANE<MARIE<<<<<<<<<<<<<<<<<<<<<<<<<"
+    ],
+    1: [
+        "Electricity bill", "Billing address: 12 High Street, Leeds LS1 4AB",
+        "Service address: 12 High Street, Leeds LS1 4AB", "Account number: 99887766",
+        "Statement date: 01 May 2024", "Meter reading: 45210 kWh", "Amount due: 84.20 GBP",
+        "Utility bill for the period 01 Apr 2024 to 30 Apr 2024", "Proof of address"
+    ],
+    2: [
+        "Certificate of Incorporation of a Private Limited Company", "Company number: 01234567",
+        "Registrar of Companies for England and Wales", "Registered office: 1 King Street, London",
+        "Date of incorporation: 5 June 2018", "Business registration confirmed by Companies House",
+        "Articles of association adopted on incorporation"
+    ],
+    3: [
+        "Register of members and share register", "Shareholder: Acme Holdings Ltd",
+        "Ordinary shares held: 7,500 of 10,000", "Beneficial owner: Jane Doe (75%)",
+        "Persons with significant control", "Voting rights: 75% of ordinary shares",
+        "Allotment of shares dated 1 July 2019"
+    ],
+    4: [
+        "Corporation tax return CT600", "Tax year ending 31 March 2024", "Unique taxpayer reference: 1234567890",
+        "Taxable income: 245,000 GBP", "Corporation tax payable: 46,550 GBP",
+        "Tax period 01 Apr 2023 to 31 Mar 2024", "Taxpayer declaration signed by director"
+    ],
+    5: [
+        "Balance sheet as at 31 December 2023", "Total assets: 1,245,000", "Total liabilities: 480,000",
+        "Profit and loss account", "Revenue: 2,340,000", "Gross profit: 890,000", "Net profit: 215,000",
+        "Retained earnings: 640,000", "Cash flow from operating activities: 310,000",
+        "Statement of financial position audited by the auditor"
+    ]
+}
+
+FILLER_WORDS = (
+    "the", "of", "and", "for", "period", "reference", "account", "date", "section", "note",
+    "amount", "page", "schedule", "total", "company", "record", "statement", "details"
+)
+
+
+def document_lines(doc_class, pages, seed=0):
+    """
+    Text lines of each page of a synthetic document: class lines first, then filler text.
+
+    Args:
+        doc_class (int): Document class 0-5
+        pages (int): Number of pages
+        seed (int): Random seed so runs are reproducible
+
+    Returns:
+        list: One list of lines per page
+    """
+    rng = random.Random(seed * 31 + doc_class)
+    class_lines = CLASS_LINES[doc_class]
+    document = []
+    for page_number in range(1, pages + 1):
+        lines = [f"Page {page_number} of {pages}"]
+        lines.extend(rng.sample(class_lines, min(len(class_lines), 5)))
+        while len(lines) < LINES_PER_PAGE:
+            lines.append(" ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(6, 12))))
+        document.append(lines)
+    return document
+
+
+def _escape_text(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _write_pdf(pages):
+    """
+    Serialize pages given as (content stream bytes, resources dict source, [(image name, image object)]).
+    Kept minimal on purpose: one Helvetica font, flate-compressed content streams, JPEG images.
+    """
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = add(None)
+    page_ids = []
+    for content, images in pages:
+        xobjects = []
+        for name, (width, height, jpeg) in images:
+            image_id = add(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>\nstream\n" % (width, height, len(jpeg))
+                + jpeg + b"\nendstream"
+            )
+            xobjects.append(b"/%s %d 0 R" % (name.encode(), image_id))
+        compressed = zlib.compress(content)
+        content_id = add(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(compressed) + compressed + b"\nendstream"
+        )
+        resources = b"<< /Font << /F1 %d 0 R >>" % font_id
+        if xobjects:
+            resources += b" /XObject << " + b" ".join(xobjects) + b" >>"
+        resources += b" >>"
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, resources, content_id)
+        ))
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    )
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    ))
+    return output.getvalue()
+
+
+def make_text_pdf(doc_class, pages, seed=0) -> bytes:
+    """
+    Build a text PDF of the given class with one text object per page.
+
+    Args:
+        doc_class (int): Document class 0-5
+        pages (int): Number of pages
+        seed (int): Random seed
+
+    Returns:
+        bytes: PDF content
+    """
+    rendered = []
+    for lines in document_lines(doc_class, pages, seed):
+        content = [b"BT /F1 10 Tf 14 TL 50 800 Td"]
+        content.extend(b"(%s) Tj T*" % _escape_text(line).encode("latin-1") for line in lines)
+        content.append(b"ET")
+        rendered.append((b"\n".join(content), []))
+    return _write_pdf(rendered)
+
+
+def _page_image(lines, width_px):
+    height_px = int(width_px * PAGE_HEIGHT / PAGE_WIDTH)
+    image = Image.new("L", (width_px, height_px), 255)
+    draw = ImageDraw.Draw(image)
+    line_height = (height_px - 80) // LINES_PER_PAGE
+    for index, line in enumerate(lines):
+        draw.text((40, 40 + index * line_height), line, fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=70)
+    return width_px, height_px, buffer.getvalue()
+
+
+def make_scanned_pdf(doc_class, pages, seed=0, width_px=1240) -> bytes:
+    """
+    Build an image-only PDF of the given class, one page-sized grayscale JPEG per page,
+    like the output of a document scanner.
+
+    Args:
+        doc_class (int): Document class 0-5
+        pages (int): Number of pages
+        seed (int): Random seed
+        width_px (int): Width of each page image in pixels
+
+    Returns:
+        bytes: PDF content
+    """
+    rendered = []
+    for lines in document_lines(doc_class, pages, seed):
+        content = b"q %d 0 0 %d 0 0 cm /Im1 Do Q" % (PAGE_WIDTH, PAGE_HEIGHT)
+        rendered.append((content, [("Im1", _page_image(lines, width_px))]))
+    return _write_pdf(rendered)
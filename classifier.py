@@ -0,0 +1,257 @@
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from mongo_store import save_classifier_sample, load_classifier_samples
+
+# Local classifier settings. Results below the threshold fall back to the Bedrock classifier.
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.85"))
+LOCAL_CLASSIFIER_COLLECT_SAMPLES = os.getenv("LOCAL_CLASSIFIER_COLLECT_SAMPLES", "true").lower() == "true"
+LOCAL_CLASSIFIER_MIN_SAMPLES = int(os.getenv("LOCAL_CLASSIFIER_MIN_SAMPLES", "30"))
+LOCAL_CLASSIFIER_MAX_CHARS = int(os.getenv("LOCAL_CLASSIFIER_MAX_CHARS", "20000"))
+# Samples of a class after which the centroid model is trusted at full weight for it
+LOCAL_CLASSIFIER_FULL_SAMPLES = int(os.getenv("LOCAL_CLASSIFIER_FULL_SAMPLES", "50"))
+# Seconds startup training may wait for Mongo before the keyword scorer serves alone
+LOCAL_CLASSIFIER_TRAINING_TIMEOUT = float(os.getenv("LOCAL_CLASSIFIER_TRAINING_TIMEOUT", "30"))
+
+# Same classes and category names as prompts.instructions_classification
+CATEGORIES = {
+    0: "Proof of Identity Document",
+    1: "Proof of Address Document",
+    2: "Business Registration Document",
+    3: "Ownership Documents",
+    4: "Tax Return Document",
+    5: "Financial Document"
+}
+
+# Weighted key phrases per class, matched as whole words against lower-cased text
+KEYWORDS = {
+    0: {
+        "passport": 3, "driving licence": 3, "driving license": 3, "driver's license": 3,
+        "identity card": 3, "national id": 2, "date of birth": 1.5, "place of birth": 2,
+        "nationality": 1.5, "date of expiry": 2, "surname": 1.5, "given names": 2,
+        "p<": 2, "sex": 0.5
+    },
+    1: {
+        "proof of address": 3, "utility bill": 3, "electricity": 2, "water bill": 2,
+        "gas bill": 2, "council tax": 2, "tenancy": 2.5, "lease agreement": 3,
+        "rental agreement": 3, "landlord": 2, "tenant": 2, "billing address": 2,
+        "service address": 2, "electoral roll": 2.5, "voter registration": 2.5, "meter reading": 2
+    },
+    2: {
+        "certificate of incorporation": 3, "certificate of registration": 3, "companies house": 2.5,
+        "registrar of companies": 3, "registered office": 2, "company number": 2,
+        "articles of association": 2.5, "memorandum of association": 2.5, "incorporated": 1.5,
+        "business registration": 3, "date of incorporation": 2, "private limited company": 1.5
+    },
+    3: {
+        "shareholder": 2.5, "share register": 3, "register of members": 3, "beneficial owner": 3,
+        "ultimate beneficial": 3, "significant control": 3, "ordinary shares": 2, "shares held": 2.5,
+        "ownership": 1.5, "trust deed": 3, "trustee": 2, "beneficiaries": 2, "voting rights": 2,
+        "allotment": 1.5
+    },
+    4: {
+        "tax return": 3, "self assessment": 3, "hmrc": 2, "internal revenue service": 2.5,
+        "form 1040": 3, "form 1120": 3, "vat return": 3, "taxable income": 2.5, "tax year": 2,
+        "corporation tax": 2.5, "tax due": 2, "tax payable": 2, "taxpayer": 2,
+        "unique taxpayer reference": 3, "tax period": 2
+    },
+    5: {
+        "balance sheet": 3, "profit and loss": 3, "income statement": 3, "cash flow": 2.5,
+        "statement of financial position": 3, "financial statements": 2.5, "total assets": 2,
+        "total liabilities": 2, "retained earnings": 2, "turnover": 1.5, "revenue": 1.5,
+        "gross profit": 2, "net profit": 2, "auditor": 1.5, "opening balance": 1.5, "closing balance": 1.5
+    }
+}
+
+# Keyword evidence needed before the keyword score is trusted at full weight
+KEYWORD_SATURATION = 8.0
+
+# Softmax temperature over centroid cosine similarities, lower is more decisive
+CENTROID_TEMPERATURE = 0.1
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9']+")
+
+
+def _phrase_pattern(phrase):
+    """
+    Regex matching a key phrase as whole words, so "tax" does not match "syntax".
+    Edges that are not word characters, like the "<" of "p<", need no boundary.
+    """
+    start = r"\b" if phrase[0].isalnum() else ""
+    end = r"\b" if phrase[-1].isalnum() else ""
+    return re.compile(start + re.escape(phrase) + end)
+
+
+_KEYWORD_PATTERNS = {
+    doc_class: [(_phrase_pattern(phrase), weight) for phrase, weight in phrases.items()]
+    for doc_class, phrases in KEYWORDS.items()
+}
+
+
+def _tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _keyword_scores(text):
+    """
+    Returns a probability per class from weighted key phrase counts, and the total evidence.
+    """
+    scores = {}
+    for doc_class, patterns in _KEYWORD_PATTERNS.items():
+        scores[doc_class] = sum(
+            weight * math.log1p(len(pattern.findall(text))) for pattern, weight in patterns
+        )
+    total = sum(scores.values())
+    if total == 0:
+        return {doc_class: 0.0 for doc_class in KEYWORDS}, 0.0
+    return {doc_class: score / total for doc_class, score in scores.items()}, max(scores.values())
+
+
+class CentroidModel:
+    """
+    TF-IDF nearest-centroid model trained on documents previously classified by Bedrock.
+    """
+
+    def __init__(self):
+        self.idf = {}
+        self.centroids = {}
+        self.sample_counts = Counter()
+
+    def fit(self, samples):
+        """
+        Args:
+            samples (list): [{"text": str, "class": int}, ...]
+        """
+        documents = [(Counter(_tokenize(sample["text"])), sample["class"]) for sample in samples]
+        self.sample_counts = Counter(doc_class for _, doc_class in documents)
+        document_frequency = Counter()
+        for counts, _ in documents:
+            document_frequency.update(counts.keys())
+        total = len(documents)
+        self.idf = {token: math.log((1 + total) / (1 + df)) + 1 for token, df in document_frequency.items()}
+
+        sums = {}
+        for counts, doc_class in documents:
+            vector = self._vector(counts)
+            centroid = sums.setdefault(doc_class, Counter())
+            for token, value in vector.items():
+                centroid[token] += value
+        self.centroids = {doc_class: self._normalize(centroid) for doc_class, centroid in sums.items()}
+        return self
+
+    def _vector(self, counts):
+        return self._normalize({
+            token: (1 + math.log(count)) * self.idf[token]
+            for token, count in counts.items() if token in self.idf
+        })
+
+    @staticmethod
+    def _normalize(vector):
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm == 0:
+            return dict(vector)
+        return {token: value / norm for token, value in vector.items()}
+
+    def predict(self, text):
+        """
+        Returns a probability per class from a softmax over the cosine similarity to each
+        centroid. Classes without samples count with similarity 0, so a model trained on
+        one class does not give it probability 1 for every document.
+        """
+        vector = self._vector(Counter(_tokenize(text)))
+        similarities = {
+            doc_class: sum(value * centroid.get(token, 0.0) for token, value in vector.items())
+            for doc_class, centroid in self.centroids.items()
+        }
+        weights = {
+            doc_class: math.exp(similarities.get(doc_class, 0.0) / CENTROID_TEMPERATURE) for doc_class in CATEGORIES
+        }
+        total = sum(weights.values())
+        return {doc_class: weight / total for doc_class, weight in weights.items()}
+
+    def weight(self, doc_class):
+        """
+        Trust in the prediction of a class, growing with its training samples up to
+        LOCAL_CLASSIFIER_FULL_SAMPLES.
+        """
+        return min(1.0, self.sample_counts[doc_class] / LOCAL_CLASSIFIER_FULL_SAMPLES)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def train_from_store():
+    """
+    Fits the centroid model from classification samples stored in Mongo.
+    The keyword scorer is used alone until LOCAL_CLASSIFIER_MIN_SAMPLES are available.
+
+    Returns:
+        int: Number of samples used, 0 if the model was not trained
+    """
+    global _model
+    samples = load_classifier_samples()
+    if len(samples) < LOCAL_CLASSIFIER_MIN_SAMPLES:
+        return 0
+    model = CentroidModel().fit(samples)
+    with _model_lock:
+        _model = model
+    return len(samples)
+
+
+def classify(pdf_text: str) -> dict:
+    """
+    Classify a document locally into one of the six classes.
+
+    Args:
+        pdf_text (str): Extracted text from PDF
+
+    Returns:
+        dict: {"category", "class", "confidence_score", "source": "local"}
+    """
+    text = (pdf_text or "")[:LOCAL_CLASSIFIER_MAX_CHARS].lower()
+    probabilities, evidence = _keyword_scores(text)
+    # Weak keyword evidence cannot produce a confident answer on its own
+    keyword_weight = min(1.0, evidence / KEYWORD_SATURATION)
+
+    with _model_lock:
+        model = _model
+    confidence_weight = keyword_weight
+    if model is not None:
+        model_probabilities = model.predict(text)
+        model_class = max(model_probabilities, key=model_probabilities.get)
+        model_weight = model.weight(model_class)
+        if model_weight > 0:
+            probabilities = {
+                doc_class: (probabilities[doc_class] * keyword_weight + model_probabilities[doc_class] * model_weight)
+                / (keyword_weight + model_weight)
+                for doc_class in CATEGORIES
+            }
+            confidence_weight = max(keyword_weight, model_weight)
+
+    doc_class = max(probabilities, key=probabilities.get)
+    return {
+        "category": CATEGORIES[doc_class],
+        "class": doc_class,
+        "confidence_score": round(probabilities[doc_class] * confidence_weight, 4),
+        "source": "local"
+    }
+
+
+def record_sample(pdf_text: str, classification: dict):
+    """
+    Store a Bedrock classification as a training sample for the centroid model.
+    """
+    if not LOCAL_CLASSIFIER_COLLECT_SAMPLES:
+        return
+    doc_class = classification.get('class')
+    if doc_class not in CATEGORIES or not pdf_text:
+        return
+    save_classifier_sample({
+        "text": pdf_text[:LOCAL_CLASSIFIER_MAX_CHARS],
+        "class": doc_class,
+        "confidence_score": classification.get('confidence_score')
+    })
@@ -0,0 +1,123 @@
+import os
+import re
+from collections import Counter
+
+import token_budget
+
+# Text compaction settings. Turn TEXT_COMPACTION off to compare analyses of the raw extracted text.
+TEXT_COMPACTION = os.getenv("TEXT_COMPACTION", "true").lower() == "true"
+# Lines looked at on top and bottom of each page when searching for running headers and footers
+HEADER_FOOTER_LINES = int(os.getenv("COMPACTION_HEADER_FOOTER_LINES", "2"))
+# Share of pages a top or bottom line must appear on to count as a running header or footer
+HEADER_FOOTER_MIN_SHARE = float(os.getenv("COMPACTION_HEADER_FOOTER_MIN_SHARE", "0.5"))
+# Repeated header and footer lines shorter than this are kept, short values such as "Total" or "0.00" repeat legitimately
+DUPLICATE_MIN_CHARS = int(os.getenv("COMPACTION_DUPLICATE_MIN_CHARS", "30"))
+
+_SPACE_RUN_PATTERN = re.compile(r"[ \t\u00a0]+")
+# Dotted, dashed and underscored leaders of tables of contents and forms, e.g. "Total ........ 12"
+_LEADER_PATTERN = re.compile(r"(?:\s?[.…_\-=·]){4,}\s?")
+# Page numbers are the only lines matched across pages with their numbers ignored, e.g. "Page 3 of 12"
+_PAGE_NUMBER_PATTERN = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+
+
+def normalize_line(line: str) -> str:
+    """
+    Collapse whitespace runs and table leaders of one line.
+    """
+    line = _LEADER_PATTERN.sub(" ... ", line)
+    return _SPACE_RUN_PATTERN.sub(" ", line).strip()
+
+
+def _line_signature(line: str) -> str:
+    # Page numbers change from page to page, "Page 3 of 12" and "Page 4 of 12" are the same footer.
+    # Every other line must match exactly, so balances such as "Balance 2,234.56" are kept
+    if _PAGE_NUMBER_PATTERN.match(line):
+        return "#page-number#"
+    return line.lower()
+
+
+def _edge_positions(lines: list) -> set:
+    """
+    Indexes of the first and last non-empty lines of a page.
+    """
+    content = [index for index, line in enumerate(lines) if line]
+    return set(content[:HEADER_FOOTER_LINES] + content[-HEADER_FOOTER_LINES:])
+
+
+def find_headers_footers(pages_lines: list) -> set:
+    """
+    Signatures of lines that repeat at the top or bottom of many pages.
+
+    Args:
+        pages_lines (list): Normalized lines of each page
+
+    Returns:
+        set: Line signatures of the running headers and footers
+    """
+    if len(pages_lines) < 2:
+        return set()
+    counts = Counter()
+    for lines in pages_lines:
+        counts.update({_line_signature(lines[index]) for index in _edge_positions(lines)})
+    min_pages = max(2, int(len(pages_lines) * HEADER_FOOTER_MIN_SHARE))
+    return {signature for signature, count in counts.items() if count >= min_pages}
+
+
+def compact_pages(pages: list) -> tuple:
+    """
+    Remove running headers and footers and boilerplate repeated at the page edges, and
+    normalize whitespace and table leaders. The first occurrence of every removed line is
+    kept, so a letterhead or a legal notice still reaches the model once. Lines in the body
+    of a page are never removed, repeated transactions are data.
+
+    Args:
+        pages (list): Text of each page in document order
+
+    Returns:
+        tuple: (compacted text of each page, stats dict with tokens before, after and saved
+               plus the number of header/footer and duplicate lines removed)
+    """
+    pages_lines = [[normalize_line(line) for line in (page or "").split("\n")] for page in pages]
+    headers_footers = find_headers_footers(pages_lines)
+
+    seen = set()
+    removed_edges = 0
+    removed_duplicates = 0
+    compacted = []
+    for lines in pages_lines:
+        # Only the page edges are checked for headers, footers and boilerplate, a bare
+        # number or a repeated line in the middle of a table is content
+        edges = _edge_positions(lines)
+        kept = []
+        for index, line in enumerate(lines):
+            if not line:
+                # Keep single blank lines as paragraph breaks
+                if kept and kept[-1]:
+                    kept.append(line)
+                continue
+            if index not in edges:
+                kept.append(line)
+                continue
+            signature = _line_signature(line)
+            if signature in headers_footers:
+                if signature in seen:
+                    removed_edges += 1
+                    continue
+                seen.add(signature)
+            elif len(line) >= DUPLICATE_MIN_CHARS:
+                if line in seen:
+                    removed_duplicates += 1
+                    continue
+                seen.add(line)
+            kept.append(line)
+        compacted.append("\n".join(kept).strip())
+
+    tokens_before = sum(token_budget.estimate_tokens(page or "") for page in pages)
+    tokens_after = sum(token_budget.estimate_tokens(page) for page in compacted)
+    return compacted, {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "header_footer_lines_removed": removed_edges,
+        "duplicate_lines_removed": removed_duplicates
+    }
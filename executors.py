@@ -0,0 +1,181 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Requests allowed in flight per endpoint group, and how long a request may wait for a slot
+ENDPOINT_LIMITS = {
+    "summary": int(os.getenv("SUMMARY_CONCURRENCY", "16")),
+    "batch": int(os.getenv("BATCH_REQUEST_CONCURRENCY", "2")),
+    "upload": int(os.getenv("UPLOAD_CONCURRENCY", "32")),
+    "delete": int(os.getenv("DELETE_CONCURRENCY", "32")),
+    "inspect": int(os.getenv("INSPECT_CONCURRENCY", "32")),
+    "jobs": int(os.getenv("JOBS_CONCURRENCY", "64"))
+}
+ENDPOINT_QUEUE_TIMEOUT = float(os.getenv("ENDPOINT_QUEUE_TIMEOUT", "30"))
+
+# Documents one batch request summarizes at once, each holding an I/O thread
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Executor settings. Blocking network calls (boto3, pymongo) run on the I/O thread pool,
+# PDF parsing on the CPU process pool, so neither can starve the other or the event loop.
+# The I/O pool has a thread for every request the endpoint limits let in, so requests that
+# block for long, like job long-polls, cannot leave admitted requests of other groups queued.
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", str(
+    sum(ENDPOINT_LIMITS.values()) + ENDPOINT_LIMITS["batch"] * (BATCH_CONCURRENCY - 1)
+)))
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1))))
+
+_io_pool = None
+_cpu_pool = None
+_pool_lock = threading.Lock()
+_limiters = {}
+
+
+class EndpointBusy(Exception):
+    """
+    Raised when a request waited ENDPOINT_QUEUE_TIMEOUT without getting a slot of its endpoint group.
+    """
+
+
+def io_pool() -> ThreadPoolExecutor:
+    """
+    Returns the shared I/O thread pool, creating it on first use.
+    """
+    global _io_pool
+    with _pool_lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="io")
+        return _io_pool
+
+
+def cpu_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared CPU process pool used for PDF parsing, creating it on first use.
+    """
+    global _cpu_pool
+    with _pool_lock:
+        if _cpu_pool is None:
+            # Workers are spawned: a fork copies the locks that I/O threads hold at that moment,
+            # e.g. of the metrics registry, and a worker touching one would hang forever
+            _cpu_pool = ProcessPoolExecutor(
+                max_workers=CPU_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _cpu_pool
+
+
+async def run_io(function, *args, **kwargs):
+    """
+    Run a blocking I/O call on the I/O pool without blocking the event loop.
+    The call runs in a copy of the current context so request traces keep their stages.
+    """
+    call = functools.partial(contextvars.copy_context().run, function, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(io_pool(), call)
+
+
+async def iterate_io(iterator):
+    """
+    Advance a blocking iterator on the I/O pool, e.g. a generator reading a Bedrock stream.
+    Every step runs in the same copied context so stages opened by the generator stay open.
+    """
+    context = contextvars.copy_context()
+    iterator = iter(iterator)
+    done = object()
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await loop.run_in_executor(io_pool(), context.run, next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+async def run_cpu(function, *args):
+    """
+    Run a CPU-bound, picklable function on the CPU process pool.
+    """
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool(), function, *args)
+
+
+class EndpointLimiter:
+    """
+    Caps the requests of one endpoint group that are in flight at once.
+    Requests above the cap wait up to ENDPOINT_QUEUE_TIMEOUT for a slot.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def __aenter__(self):
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=ENDPOINT_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise EndpointBusy(f"Too many concurrent {self.name} requests, retry later")
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting
+        }
+
+
+def limit(name: str) -> EndpointLimiter:
+    """
+    Returns the limiter of an endpoint group, e.g. `async with executors.limit("upload"):`.
+
+    Args:
+        name (str): Endpoint group from ENDPOINT_LIMITS
+
+    Returns:
+        EndpointLimiter: Async context manager holding one slot of the group
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = _limiters.setdefault(name, EndpointLimiter(name, ENDPOINT_LIMITS[name]))
+    return limiter
+
+
+def limiter_stats() -> dict:
+    """
+    In-flight and waiting requests per endpoint group.
+    """
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
+
+
+def shutdown_cpu_pool():
+    """
+    Shuts down the CPU process pool if it was started.
+    """
+    global _cpu_pool
+    with _pool_lock:
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown(wait=True, cancel_futures=True)
+            _cpu_pool = None
+
+
+def shutdown():
+    """
+    Shuts down both pools, letting running work finish.
+    """
+    global _io_pool
+    with _pool_lock:
+        if _io_pool is not None:
+            _io_pool.shutdown(wait=True)
+            _io_pool = None
+    shutdown_cpu_pool()
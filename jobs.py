@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import metrics
+from mongo_store import save_job, load_job
+
+# Job worker pool settings
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "100"))
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "30"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class JobQueueFull(Exception):
+    """
+    Raised when the number of queued and running jobs reached JOB_QUEUE_LIMIT.
+    """
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobManager:
+    """
+    Runs a handler in a bounded worker pool and tracks job state.
+    State is kept in memory for this worker and persisted through mongo_store,
+    so jobs can be polled from any worker.
+    """
+
+    def __init__(self, handler, max_workers=JOB_WORKERS, max_pending=JOB_QUEUE_LIMIT):
+        self._handler = handler
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary-job")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._jobs = {}
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def submit(self, **params) -> dict:
+        """
+        Queue a job and return its record immediately.
+
+        Args:
+            **params: Keyword arguments passed to the handler
+
+        Returns:
+            dict: Job record with job_id and status
+
+        Raises:
+            JobQueueFull: If too many jobs are already pending
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(f"Job queue is full ({JOB_QUEUE_LIMIT} pending jobs)")
+
+        self._prune()
+        job_id = uuid.uuid4().hex
+        record = {
+            "job_id": job_id,
+            "status": "queued",
+            "params": params,
+            "result": None,
+            "error": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None
+        }
+        snapshot = dict(record)
+        with self._lock:
+            self._jobs[job_id] = record
+            self._events[job_id] = threading.Event()
+        save_job(dict(snapshot), JOB_RETENTION_SECONDS)
+
+        try:
+            self._executor.submit(self._run, job_id, params)
+        except RuntimeError:
+            self._slots.release()
+            raise
+        return snapshot
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            record = self._jobs[job_id]
+            record.update(fields)
+            snapshot = dict(record)
+        save_job(snapshot, JOB_RETENTION_SECONDS)
+
+    def _run(self, job_id, params):
+        with self._lock:
+            event = self._events[job_id]
+        try:
+            self._update(job_id, status="running", started_at=_now())
+            # Job threads do not inherit the request context, so each job logs its own trace
+            with metrics.request_trace("job", job_id=job_id):
+                result = self._handler(**params)
+            self._update(job_id, status="succeeded", result=result, finished_at=_now())
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            print(f"Job {job_id} failed: {error}")
+            self._update(job_id, status="failed", error=error, finished_at=_now())
+        finally:
+            self._slots.release()
+            event.set()
+
+    def get(self, job_id: str, wait: float = 0) -> dict:
+        """
+        Return the job record, optionally long-polling until the job finishes.
+
+        Args:
+            job_id (str): Job id returned by submit
+            wait (float): Seconds to wait for completion, capped at JOB_MAX_WAIT_SECONDS
+
+        Returns:
+            dict: Job record, or None if the job is unknown
+        """
+        wait = max(0, min(wait, JOB_MAX_WAIT_SECONDS))
+        with self._lock:
+            event = self._events.get(job_id)
+
+        if event is not None:
+            # Job belongs to this worker, wait on its completion event
+            if wait:
+                event.wait(timeout=wait)
+            # _prune may have dropped the job meanwhile, it is still in the store then
+            with self._lock:
+                record = self._jobs.get(job_id)
+                if record is not None:
+                    return dict(record)
+
+        # Job was submitted to another worker, poll the store
+        deadline = time.monotonic() + wait
+        while True:
+            record = load_job(job_id)
+            if record is None or record["status"] in TERMINAL_STATUSES or time.monotonic() >= deadline:
+                return record
+            time.sleep(min(0.5, max(0, deadline - time.monotonic())))
+
+    def _prune(self):
+        """
+        Drop finished jobs older than JOB_RETENTION_SECONDS from memory. Mongo removes them
+        after the same time through the TTL index of the jobs collection.
+        """
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        with self._lock:
+            for job_id, record in list(self._jobs.items()):
+                finished_at = record["finished_at"]
+                if finished_at and datetime.fromisoformat(finished_at).timestamp() < cutoff:
+                    del self._jobs[job_id]
+                    del self._events[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
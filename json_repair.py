@@ -0,0 +1,318 @@
+import json
+import re
+import threading
+
+# Bare words the prompts ask for (TRUE/FALSE) or the model sometimes writes (NUll, None)
+LITERALS = {"true": "true", "false": "false", "null": "null", "none": "null"}
+
+_FENCE_PATTERN = re.compile(r"```(?:json)?", re.IGNORECASE)
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Characters that may follow a bare number or word
+_DELIMITERS = frozenset(",:}] \t\r\n")
+
+OUTCOMES = ("parsed", "repaired", "continued", "failed")
+
+_counts = {outcome: 0 for outcome in OUTCOMES}
+_counts_lock = threading.Lock()
+
+
+class JSONRepairError(ValueError):
+    """
+    Raised when no JSON object can be recovered from the model output.
+    """
+
+
+def _balanced_object(text, start):
+    """
+    Return the first complete {...} starting at `start`, ignoring braces inside strings,
+    or None if the object is never closed.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return None
+
+
+def _read_string(text, index):
+    """
+    Read a JSON string starting at the opening quote. Raw control characters are escaped
+    and a string cut off by the end of the text is closed.
+
+    Returns:
+        tuple: (JSON string token, index after the string)
+    """
+    chars = ['"']
+    index += 1
+    while index < len(text):
+        char = text[index]
+        if char == "\\":
+            if index + 1 >= len(text):
+                break
+            chars.append(text[index:index + 2])
+            index += 2
+            continue
+        if char == '"':
+            chars.append('"')
+            return "".join(chars), index + 1
+        if char == "\n":
+            chars.append("\\n")
+        elif char == "\r":
+            chars.append("\\r")
+        elif char == "\t":
+            chars.append("\\t")
+        else:
+            chars.append(char)
+        index += 1
+    # Truncated inside the string, drop a dangling \uXXXX escape and close it
+    token = re.sub(r"\\u[0-9a-fA-F]{0,3}$", "", "".join(chars))
+    return token + '"', index
+
+
+def _is_truncated_tail(text, index):
+    """
+    True if no delimiter follows `index`, i.e. the output was cut off inside this token.
+    """
+    return not any(char in _DELIMITERS for char in text[index:])
+
+
+class _Repairer:
+    """
+    Rebuilds a JSON object token by token, keeping track of what each open container
+    expects next so missing commas, trailing commas and unclosed containers can be fixed.
+    Any other character the grammar does not expect raises JSONRepairError, so that
+    e.g. {"amount": $1,234.00} is not silently turned into {"amount": 1}.
+    """
+
+    def __init__(self):
+        self.out = []
+        # Each entry is [container, state]. Objects move key -> colon -> value -> next,
+        # arrays move value -> next
+        self.stack = []
+        self.done = False
+
+    def _emit_value(self, token, opens=None):
+        if not self.stack:
+            if opens is None:
+                return
+            self.out.append(token)
+            self.stack.append([opens, "key" if opens == "{" else "value"])
+            return
+
+        top = self.stack[-1]
+        container, state = top
+        if container == "{":
+            if state == "next":
+                # Missing comma between members
+                self.out.append(",")
+                state = "key"
+            if state == "key":
+                if opens is not None:
+                    return
+                self.out.append(token if token.startswith('"') else json.dumps(token))
+                top[1] = "colon"
+                return
+            if state == "colon":
+                self.out.append(":")
+        elif state == "next":
+            self.out.append(",")
+
+        self.out.append(token)
+        top[1] = "next"
+        if opens is not None:
+            self.stack.append([opens, "key" if opens == "{" else "value"])
+
+    def _unexpected(self, text, index):
+        raise JSONRepairError(f"Unexpected {text[index]!r} at position {index} of model output")
+
+    def _drop_truncated_value(self):
+        if self.stack and self.stack[-1] == ["{", "value"]:
+            # Back to a key without a value, which _close removes
+            self.out.pop()
+            self.stack[-1][1] = "colon"
+
+    def _close(self, closer):
+        if self.stack[-1][0] != ("{" if closer == "}" else "["):
+            raise JSONRepairError(f"Mismatched {closer!r} in model output")
+        container, state = self.stack.pop()
+        while self.out and self.out[-1] == ",":
+            self.out.pop()
+        if container == "{":
+            if state == "colon":
+                # Key without a value
+                self.out.pop()
+                while self.out and self.out[-1] == ",":
+                    self.out.pop()
+            elif state == "value":
+                self.out.append("null")
+        self.out.append("}" if container == "{" else "]")
+        if not self.stack:
+            self.done = True
+
+    def feed(self, text):
+        index = 0
+        while index < len(text) and not self.done:
+            char = text[index]
+            if char in "{[":
+                self._emit_value(char, opens=char)
+                index += 1
+            elif char in "}]":
+                self._close(char)
+                index += 1
+            elif char == '"':
+                token, index = _read_string(text, index)
+                self._emit_value(token)
+            elif char == ",":
+                if self.stack and self.stack[-1][1] == "next":
+                    self.out.append(",")
+                    self.stack[-1][1] = "key" if self.stack[-1][0] == "{" else "value"
+                index += 1
+            elif char == ":":
+                if self.stack[-1][1] != "colon":
+                    self._unexpected(text, index)
+                self.out.append(":")
+                self.stack[-1][1] = "value"
+                index += 1
+            elif char.isspace():
+                index += 1
+            else:
+                number = _NUMBER_PATTERN.match(text, index)
+                word = _WORD_PATTERN.match(text, index) if number is None else None
+                token = number or word
+                if token is None or token.end() == len(text) or text[token.end()] not in _DELIMITERS:
+                    # A token cut off by the end of the output is dropped with its key, since
+                    # fals or 1234 may be the start of false or 12345. Anything else is an error
+                    if _is_truncated_tail(text, index):
+                        self._drop_truncated_value()
+                        break
+                    self._unexpected(text, index if token is None else token.end())
+                if self.stack[-1] == ["{", "next"]:
+                    # Inside an object a missing comma is only assumed before a quoted key,
+                    # "name": John Smith must not turn Smith into a key
+                    self._unexpected(text, index)
+                if number is not None:
+                    self._emit_value(number.group())
+                else:
+                    value = word.group()
+                    if self.stack[-1][0] == "{" and self.stack[-1][1] == "key":
+                        self._emit_value(value)
+                    else:
+                        self._emit_value(LITERALS.get(value.lower(), json.dumps(value)))
+                index = token.end()
+
+    def finish(self):
+        while self.stack:
+            self._close("}" if self.stack[-1][0] == "{" else "]")
+        return "".join(self.out)
+
+
+def repair_json(text: str) -> str:
+    """
+    Turn almost-JSON model output into a valid JSON object string.
+    Handles code fences, commentary around the object, upper or mixed case
+    TRUE/FALSE/NULL literals, unquoted keys, missing and trailing commas, and
+    output truncated in the middle of a string or object.
+
+    Args:
+        text (str): Raw model output
+
+    Returns:
+        str: Repaired JSON text
+
+    Raises:
+        JSONRepairError: If the text has no object to repair or has characters that
+            cannot be repaired, such as $1,234.00 or 2024-01-05 as bare values
+    """
+    text = _FENCE_PATTERN.sub("", text)
+    start = text.find("{")
+    if start == -1:
+        raise JSONRepairError("No JSON object in model output")
+    repairer = _Repairer()
+    repairer.feed(text[start:])
+    return repairer.finish()
+
+
+def parse_json_object(text: str):
+    """
+    Parse the JSON object in the model output, repairing it if the strict parse fails.
+
+    Args:
+        text (str): Raw model output
+
+    Returns:
+        tuple: (parsed dict, outcome) where outcome is "parsed" or "repaired"
+
+    Raises:
+        JSONRepairError: If no JSON object can be recovered
+    """
+    start = text.find("{")
+    if start != -1:
+        candidate = _balanced_object(text, start)
+        if candidate is not None:
+            try:
+                value = json.loads(candidate)
+                if isinstance(value, dict):
+                    return value, "parsed"
+            except ValueError:
+                pass
+
+    repaired = repair_json(text)
+    try:
+        value = json.loads(repaired)
+    except ValueError as e:
+        raise JSONRepairError(f"Could not repair model output: {e}")
+    if not isinstance(value, dict):
+        raise JSONRepairError("Model output is not a JSON object")
+    return value, "repaired"
+
+
+def is_unclosed(text: str) -> bool:
+    """
+    True if the model output opens a JSON object that is never closed, i.e. it was cut off.
+    """
+    start = text.find("{")
+    return start != -1 and _balanced_object(text, start) is None
+
+
+def record(outcome: str):
+    """
+    Count a parse outcome: parsed, repaired, continued or failed.
+    """
+    with _counts_lock:
+        _counts[outcome] += 1
+
+
+def repair_stats() -> dict:
+    """
+    Parse outcome counts and the repair, continuation and failure rates.
+
+    Returns:
+        dict: {"total", "parsed", "repaired", "continued", "failed", "repair_rate", "retry_rate", "failure_rate"}
+    """
+    with _counts_lock:
+        counts = dict(_counts)
+    total = sum(counts.values())
+    return {
+        "total": total,
+        **counts,
+        "repair_rate": counts["repaired"] / total if total else 0.0,
+        "retry_rate": counts["continued"] / total if total else 0.0,
+        "failure_rate": counts["failed"] / total if total else 0.0
+    }
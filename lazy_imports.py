@@ -0,0 +1,104 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+_lock = threading.RLock()
+_import_seconds = {}
+
+
+def _acquire_before_fork():
+    _lock.acquire()
+
+
+def _release_after_fork():
+    _lock.release()
+
+
+def _reset_after_fork():
+    global _lock
+    _lock = threading.RLock()
+
+
+# Modules are imported on request threads while the CPU pool may fork. Hold the lock across
+# fork so a child never starts with an import half done by a thread it does not have.
+os.register_at_fork(before=_acquire_before_fork, after_in_parent=_release_after_fork, after_in_child=_reset_after_fork)
+
+
+def load(name: str):
+    """
+    Import a module, recording how long the first import took.
+
+    Args:
+        name (str): Dotted module name
+
+    Returns:
+        module: The imported module
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        _import_seconds.setdefault(name, time.perf_counter() - started)
+        return module
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, so heavy
+    dependencies such as boto3 or pdfplumber cost nothing until a request needs them.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = load(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']} ({state})>"
+
+
+def lazy(name: str) -> LazyModule:
+    """
+    Module placeholder imported on first use, e.g. `boto3 = lazy_imports.lazy("boto3")`.
+    """
+    return LazyModule(name)
+
+
+def preload(names) -> dict:
+    """
+    Import modules ahead of the first request.
+
+    Args:
+        names (iterable): Dotted module names
+
+    Returns:
+        dict: Seconds each module took, 0 for modules that were already imported
+    """
+    timings = {}
+    for name in names:
+        started = time.perf_counter()
+        load(name)
+        timings[name] = round(time.perf_counter() - started, 4)
+    return timings
+
+
+def import_stats() -> dict:
+    """
+    Seconds spent on the first import of each lazily loaded module.
+    """
+    with _lock:
+        return {name: round(seconds, 4) for name, seconds in _import_seconds.items()}
@@ -1,23 +1,123 @@
 import io
 import os
 import uuid
-import boto3
-import pdfplumber
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import time
+from aws_clients import get_client, client_stats
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from botocore.exceptions import ClientError
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from botocore.exceptions import ClientError, ReadTimeoutError
 from pydantic import BaseModel
-import magic  # For file type validation
+from typing import List, Optional
+from bson import ObjectId
+import asyncio
+import lazy_imports
+import warmup
 import json
-from scanned import is_scanned_pdf
-from mongo_store import insert_document
+from scanned import analyze_pdf_pages, analyze_pdf_pages_streaming, detect_scanned, load_page_texts, PDF_PARALLEL_MIN_PAGES, PDF_STREAM_MIN_BYTES
+from mongo_store import insert_document, insert_documents, start_write_behind, close_client
+import result_cache
+import jobs
+import classifier
+import token_budget
+import ocr
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from contextlib import asynccontextmanager
 import prompts
+import json_repair
+import rate_limiter
+import model_routing
+import compaction
+from s3_range_file import S3RangeFile
+import metrics
+import contextvars
+import executors
+
+# python-magic loads libmagic on import, deferred to the first upload, see lazy_imports
+magic = lazy_imports.lazy("magic")  # For file type validation
 
 today = datetime.today().strftime('%Y-%m-%d')
 
-app = FastAPI()
+async def train_local_classifier():
+    """
+    Train the local classifier from the stored samples on the I/O pool. Runs in the background,
+    a slow or unreachable Mongo leaves the keyword scorer serving alone instead of blocking startup
+    """
+    try:
+        samples = await asyncio.wait_for(
+            executors.run_io(classifier.train_from_store), timeout=classifier.LOCAL_CLASSIFIER_TRAINING_TIMEOUT
+        )
+        print(f"Local classifier trained on {samples} samples")
+    except asyncio.TimeoutError:
+        print(f"Local classifier training gave up after {classifier.LOCAL_CLASSIFIER_TRAINING_TIMEOUT} seconds")
+    except Exception as e:
+        print(f"Local classifier training failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_write_behind()
+    if warmup.WARMUP_ON_STARTUP:
+        # Import deferred modules and create clients now rather than in the first request
+        print(f"Warm-up finished: {await executors.run_io(warmup.warm_up)}")
+    classifier_training = asyncio.create_task(train_local_classifier())
+    yield
+    classifier_training.cancel()
+    # Let queued summary jobs finish, then stop the I/O threads and extraction processes
+    job_manager.shutdown()
+    executors.shutdown()
+    ocr.shutdown_process_pool()
+    # Flush buffered results before the Mongo client goes away
+    close_client()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Time every request, count it by route and status and log its stage trace as one JSON line.
+    Both happen once the response body was sent, so streamed responses are timed to their end
+    """
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    started = asyncio.get_running_loop().time()
+
+    def record(trace, status_code):
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        trace["status_code"] = status_code
+        metrics.requests_total.inc(route=route, status_code=status_code)
+        metrics.request_seconds.observe(asyncio.get_running_loop().time() - started, route=route)
+
+    with metrics.request_trace(request.url.path, request_id=request_id, close=False, method=request.method) as trace:
+        try:
+            response = await call_next(request)
+        except BaseException:
+            record(trace, 500)
+            raise
+    response.headers["X-Request-ID"] = request_id
+    response.body_iterator = traced_body(response.body_iterator, trace, lambda: record(trace, response.status_code))
+    return response
+
+async def traced_body(body_iterator, trace: dict, record):
+    """
+    Pass a response body through, then record the request and log its trace once the body
+    was sent, failed or the client went away
+    """
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    except Exception as e:
+        trace["error"] = str(e)
+        raise
+    finally:
+        record()
+        metrics.close_trace(trace)
+
+@app.exception_handler(executors.EndpointBusy)
+async def endpoint_busy_handler(request: Request, exc: executors.EndpointBusy):
+    """
+    Requests that could not get a slot of their endpoint group in time are told to retry
+    """
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
 
 # Add CORS middleware
 app.add_middleware(
@@ -28,12 +128,24 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-# AWS Configuration
-session = boto3.Session(
-    aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-    region_name='us-east-1'
-)
+# Mark the static prompt prefix for Bedrock prompt caching, on models that support it and when
+# the prefix reaches their minimum cacheable length, see model_routing.PROMPT_CACHE_MIN_TOKENS
+BEDROCK_PROMPT_CACHING = os.getenv("BEDROCK_PROMPT_CACHING", "true").lower() == "true"
+# Output budget of the continuation call made when a response cannot be repaired into JSON
+BEDROCK_CONTINUATION_MAX_TOKENS = int(os.getenv("BEDROCK_CONTINUATION_MAX_TOKENS", "1000"))
+# Output tokens charged to the rate limiter up front, corrected with the reported usage afterwards
+BEDROCK_EXPECTED_OUTPUT_TOKENS = int(os.getenv("BEDROCK_EXPECTED_OUTPUT_TOKENS", "1000"))
+
+# Upload limits. S3 multipart parts must be at least 5MB, except the last one
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
+UPLOAD_PART_SIZE = max(5 * 1024 * 1024, int(os.getenv("UPLOAD_PART_SIZE", str(5 * 1024 * 1024))))
+UPLOAD_READ_SIZE = 1024 * 1024
+UPLOAD_SNIFF_BYTES = 2048
+PRESIGNED_URL_EXPIRES = int(os.getenv("PRESIGNED_URL_EXPIRES", "900"))
+
+# Batch summary limits
+BATCH_CONCURRENCY = executors.BATCH_CONCURRENCY
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
 
 ###---------------------------------------Define Base models for each points of the apis---------------------------------------###
 # Define Base model for requesting generate_summary endpoint
@@ -46,71 +158,356 @@ class S3DeleteRequest(BaseModel):
     object_key: str
     file_name: str
 
+# Pydantic models for batch summary request body
+class BatchItem(BaseModel):
+    bucket_name: str
+    object_key: str
+    file_name: Optional[str] = None
+
+class BatchSummaryRequest(BaseModel):
+    items: List[BatchItem]
+
+# Pydantic models for presigned upload request bodies
+class UploadUrlRequest(BaseModel):
+    file_name: str
+    content_length: Optional[int] = None
+
+class ConfirmUploadRequest(BaseModel):
+    object_key: str
+    file_name: str
+
+# Pydantic model for PDF inspection request body
+class S3ObjectRequest(BaseModel):
+    bucket_name: str
+    object_key: str
+
 ###---------------------------------------Define Support Functions--------------------------------------------------------------###
 
 
 
 
-def extract_text_from_s3_pdf(bucket_name: str, object_key: str) -> str:
+def download_pdf_from_s3(bucket_name: str, object_key: str) -> bytes:
     """
-    Extract raw text from PDF stored in S3 bucket
+    Download the raw PDF bytes from S3 bucket
     
     Args:
         bucket_name (str): Name of the S3 bucket
         object_key (str): S3 object key of the PDF file
     
     Returns:
-        str: Extracted text from PDF
+        bytes: PDF content
     """
+    # Shared S3 client
+    s3_client = get_client('s3')
+    
+    # Download PDF from S3
+    print(bucket_name,object_key)
     try:
-        # Create S3 client
-        s3_client = boto3.client('s3')
-        
-        # Download PDF from S3
-        print(bucket_name,object_key)
-        try:
+        with metrics.stage("s3_download") as stage:
             s3_response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
             pdf_bytes = s3_response['Body'].read()
-        except s3_client.exceptions.NoSuchKey:
+            stage["bytes"] = len(pdf_bytes)
+        metrics.bytes_total.inc(len(pdf_bytes), operation="s3_download")
+        metrics.document_bytes.observe(len(pdf_bytes))
+        return pdf_bytes
+    except s3_client.exceptions.NoSuchKey:
+        raise HTTPException(
+            status_code=404, 
+            detail=f"PDF not found in bucket {bucket_name} with key {object_key}"
+        )
+    except Exception as s3_error:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error accessing S3 object: {str(s3_error)}"
+        )
+
+def open_s3_pdf(bucket_name: str, object_key: str) -> S3RangeFile:
+    """
+    Open a PDF in S3 for ranged reads. Only the object size is requested here,
+    the parts of the file that are read later are fetched on demand
+
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): S3 object key of the PDF file
+
+    Returns:
+        S3RangeFile: Seekable file over the object
+    """
+    try:
+        return S3RangeFile(get_client('s3'), bucket_name, object_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ("404", "NoSuchKey"):
             raise HTTPException(
-                status_code=404, 
+                status_code=404,
                 detail=f"PDF not found in bucket {bucket_name} with key {object_key}"
             )
-        except Exception as s3_error:
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Error accessing S3 object: {str(s3_error)}"
-            )
-        
+        raise HTTPException(status_code=500, detail=f"Error accessing S3 object: {str(e)}")
+
+def inspect_s3_pdf(pdf_file: S3RangeFile) -> dict:
+    """
+    Page count and fast scanned detection over ranged reads: only the trailer, the
+    cross-reference table, the page tree and the content streams of the sampled pages
+    are fetched
+
+    Args:
+        pdf_file (S3RangeFile): File from open_s3_pdf
+
+    Returns:
+        dict: Result of detect_scanned plus the object size, range requests and bytes fetched
+    """
+    detection = detect_scanned(pdf_file)
+    stats = pdf_file.stats()
+    metrics.annotate(**stats)
+    detection.update(stats)
+    return detection
+
+def download_with_detection(bucket_name: str, object_key: str) -> tuple:
+    """
+    Download the PDF. When OCR is off the scanned detection runs first over ranged reads and
+    its blocks are reused by the download, so no OCR-less decision waits for the whole file
+
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): S3 object key of the PDF file
+
+    Returns:
+        tuple: (PDF content, detection or None)
+    """
+    if ocr.OCR_ENABLED:
+        return download_pdf_from_s3(bucket_name = bucket_name, object_key = object_key), None
+    with open_s3_pdf(bucket_name, object_key) as pdf_file:
+        try:
+            detection = inspect_s3_pdf(pdf_file)
+        except Exception as detect_error:
+            print(f"Ranged scanned detection failed: {detect_error}")
+            return download_pdf_from_s3(bucket_name = bucket_name, object_key = object_key), None
+        # The blocks read by the detection are reused, only the rest of the file is fetched
+        with metrics.stage("s3_download", ranged=True) as stage:
+            pdf_bytes = pdf_file.read_object()
+            stage["bytes"] = len(pdf_bytes)
+    metrics.bytes_total.inc(len(pdf_bytes), operation="s3_download")
+    metrics.document_bytes.observe(len(pdf_bytes))
+    return pdf_bytes, detection
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes, detection: dict = None) -> dict:
+    """
+    Extract raw text from PDF bytes
+    
+    Args:
+        pdf_bytes (bytes): PDF content
+        detection (dict): Result of detect_scanned if it already ran, e.g. over ranged reads
+    
+    Returns:
+        dict: {"is_scanned", "text", "page_count", "pages"} where pages holds
+              the per-page text, image count and scanned flag
+    """
+    try:
         # Use BytesIO to create file-like object from S3 bytes
         pdf_file = io.BytesIO(pdf_bytes)
-        print(is_scanned_pdf(pdf_file))
-        is_scanned = is_scanned_pdf(pdf_file)
 
-        if is_scanned is True:
-            return {"is_scanned":True,"text":None}
-        else:
-        
-            # Extract text using pdfplumber
+        # Cheap content-stream check first, scanned documents skip the text extraction pass
+        if detection is None:
             try:
-                with pdfplumber.open(pdf_file) as pdf:
-                    # Extract text from each page and join
-                    extracted_text = "\n".join([
-                        page.extract_text() or "" for page in pdf.pages
-                    ])
-            except Exception as pdf_error:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Error parsing PDF: {str(pdf_error)}"
-                )
-            return {"is_scanned":False,"text":extracted_text.strip()}
-    
+                detection = detect_scanned(pdf_file)
+            except Exception as detect_error:
+                print(f"Fast scanned detection failed: {detect_error}")
+                detection = None
+        scanned_result = extract_text_after_detection(pdf_bytes, detection)
+        if scanned_result is not None:
+            return scanned_result
+        ocr_tried = detection is not None and detection["is_scanned"] is True
+
+        # Extract text and decide scanned/text in a single walk over the pages
+        pdf_file.seek(0)
+        try:
+            if len(pdf_bytes) >= PDF_STREAM_MIN_BYTES:
+                # Very large files are parsed page by page to keep memory bounded
+                page_analysis = analyze_pdf_pages_streaming(pdf_file)
+            else:
+                page_analysis = analyze_pdf_pages(pdf_file)
+        except Exception as pdf_error:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Error parsing PDF: {str(pdf_error)}"
+            )
+        return extract_text_after_analysis(pdf_bytes, page_analysis, ocr_tried)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
-            status_code=500, 
+            status_code=500,
+            detail=f"Unexpected error extracting text from PDF: {str(e)}"
+        )
+
+async def extract_text_from_pdf_bytes_async(pdf_bytes: bytes, detection: dict = None) -> dict:
+    """
+    Same as extract_text_from_pdf_bytes without blocking the event loop: detection and
+    parsing run on the CPU process pool, OCR waits for its own pool on the I/O pool
+
+    Args:
+        pdf_bytes (bytes): PDF content
+        detection (dict): Result of detect_scanned if it already ran
+
+    Returns:
+        dict: Same structure as extract_text_from_pdf_bytes
+    """
+    try:
+        if detection is None:
+            try:
+                with metrics.stage("scanned_detection"):
+                    detection = await executors.run_cpu(detect_scanned, pdf_bytes)
+            except Exception as detect_error:
+                print(f"Fast scanned detection failed: {detect_error}")
+                detection = None
+        scanned_result = await executors.run_io(extract_text_after_detection, pdf_bytes, detection)
+        if scanned_result is not None:
+            return scanned_result
+        ocr_tried = detection is not None and detection["is_scanned"] is True
+
+        try:
+            if len(pdf_bytes) >= PDF_STREAM_MIN_BYTES:
+                # Serial and page by page, parallel ranges would copy the whole file into every worker
+                with metrics.stage("pdf_parse", streaming=True):
+                    page_analysis = await executors.run_cpu(analyze_pdf_pages_streaming, pdf_bytes)
+            elif detection is None or detection["page_count"] < PDF_PARALLEL_MIN_PAGES:
+                # Without a page count from the detection the document is parsed serially in one
+                # worker, a worker cannot fan page ranges out over its own pool
+                with metrics.stage("pdf_parse", pages=detection["page_count"] if detection else None):
+                    page_analysis = await executors.run_cpu(analyze_pdf_pages, pdf_bytes, 1)
+            else:
+                # Long documents are split into page ranges that fan out over the same process pool
+                page_analysis = await executors.run_io(analyze_pdf_pages, pdf_bytes)
+        except Exception as pdf_error:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Error parsing PDF: {str(pdf_error)}"
+            )
+        return await executors.run_io(extract_text_after_analysis, pdf_bytes, page_analysis, ocr_tried)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
             detail=f"Unexpected error extracting text from PDF: {str(e)}"
         )
 
+def extract_text_after_detection(pdf_bytes: bytes, detection: dict) -> dict:
+    """
+    OCR the document when fast detection found it scanned
+
+    Args:
+        pdf_bytes (bytes): PDF content
+        detection (dict): Result of detect_scanned, or None if detection failed
+
+    Returns:
+        dict: OCR extraction result, or None if the document still needs text extraction,
+              also when OCR is off or found no text
+    """
+    if detection is None:
+        return None
+    metrics.annotate(is_scanned=detection["is_scanned"], page_count=detection["page_count"], pages_inspected=detection["pages_inspected"])
+    if detection["is_scanned"] is not True:
+        return None
+    ocr_result = extract_text_with_ocr(pdf_bytes, {"page_count": detection["page_count"], "pages": []})
+    if not ocr_result["text"]:
+        # The content-stream counts can be wrong, let the text extraction have its say
+        metrics.annotate(ocr_fallback="text_extraction")
+        return None
+    metrics.document_pages.observe(detection["page_count"], kind="scanned")
+    return ocr_result
+
+def extract_text_after_analysis(pdf_bytes: bytes, page_analysis: dict, ocr_tried: bool = False) -> dict:
+    """
+    Build the extraction result from analyze_pdf_pages, falling back to OCR for scanned documents
+    and to the extracted text when OCR is off or finds nothing
+
+    Args:
+        pdf_bytes (bytes): PDF content
+        page_analysis (dict): Result of analyze_pdf_pages or analyze_pdf_pages_streaming
+        ocr_tried (bool): OCR already ran on the document without finding text
+
+    Returns:
+        dict: Same structure as extract_text_from_pdf_bytes
+    """
+    # Streamed extractions hand their page texts over in a file, read here and not in the worker
+    load_page_texts(page_analysis)
+    metrics.annotate(is_scanned=page_analysis["is_scanned"], page_count=page_analysis["page_count"])
+    if page_analysis.get("peak_memory_bytes") is not None:
+        metrics.extraction_peak_bytes.observe(page_analysis["peak_memory_bytes"])
+        metrics.annotate(extraction_peak_bytes=page_analysis["peak_memory_bytes"], extraction_spilled=page_analysis["spilled"])
+    if page_analysis.get("text_truncated"):
+        # Only the first scanned.PDF_STREAM_MAX_TEXT_CHARS characters of text were kept
+        metrics.annotate(text_truncated=True)
+    metrics.document_pages.observe(
+        page_analysis["page_count"], kind="scanned" if page_analysis["is_scanned"] is True else "text"
+    )
+
+    if page_analysis["is_scanned"] is True and not ocr_tried:
+        ocr_result = extract_text_with_ocr(pdf_bytes, page_analysis)
+        if ocr_result["text"]:
+            return ocr_result
+    return {
+        "is_scanned": page_analysis["is_scanned"] is True,
+        "text": page_analysis["text"],
+        "page_count": page_analysis["page_count"],
+        "pages": page_analysis["pages"]
+    }
+
+def extract_text_with_ocr(pdf_bytes: bytes, page_analysis: dict) -> dict:
+    """
+    Extract text from a scanned PDF with OCR
+    
+    Args:
+        pdf_bytes (bytes): PDF content
+        page_analysis (dict): Page count and pages from detect_scanned or analyze_pdf_pages
+    
+    Returns:
+        dict: {"is_scanned", "text", "page_count", "pages", "ocr_confidence"} where pages
+              holds the per-page OCR text and confidence. text is None if OCR is disabled or failed
+    """
+    no_text = {
+        "is_scanned": True,
+        "text": None,
+        "page_count": page_analysis["page_count"],
+        "pages": page_analysis["pages"]
+    }
+    if not ocr.OCR_ENABLED:
+        return no_text
+    try:
+        with metrics.stage("ocr", pages=page_analysis["page_count"]):
+            ocr_result = ocr.ocr_pdf(pdf_bytes)
+    except Exception as ocr_error:
+        print(f"OCR failed: {ocr_error}")
+        return no_text
+    metrics.annotate(ocr_mean_confidence=ocr_result["mean_confidence"], page_count=ocr_result["page_count"])
+
+    return {
+        "is_scanned": True,
+        "text": ocr_result["text"] or None,
+        "page_count": ocr_result["page_count"],
+        "pages": ocr_result["pages"],
+        "ocr_confidence": {
+            "mean": ocr_result["mean_confidence"],
+            "pages": [page["confidence"] for page in ocr_result["pages"]]
+        }
+    }
+
+def extract_text_from_s3_pdf(bucket_name: str, object_key: str) -> dict:
+    """
+    Extract raw text from PDF stored in S3 bucket
+    
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): S3 object key of the PDF file
+    
+    Returns:
+        dict: Same structure as extract_text_from_pdf_bytes
+    """
+    pdf_bytes = download_pdf_from_s3(bucket_name = bucket_name, object_key = object_key)
+    return extract_text_from_pdf_bytes(pdf_bytes)
+
 def upload_bytes_to_s3(
     file_bytes: bytes, 
     original_filename: str, 
@@ -133,8 +530,7 @@ def upload_bytes_to_s3(
         HTTPException: If file is too large, invalid type, or upload fails
     """
     try:
-        # Check file size (10MB = 10 * 1024 * 1024 bytes)
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
+        # Check file size
         file_size = len(file_bytes)
         if file_size > MAX_FILE_SIZE:
             raise ValueError(f"File size ({file_size / 1024 / 1024:.2f}MB) exceeds maximum allowed size of 10MB")
@@ -144,8 +540,8 @@ def upload_bytes_to_s3(
         if file_type not in ['application/pdf']:
             raise ValueError(f"Invalid file type. Expected PDF, got {file_type}")
 
-        # Create S3 client
-        s3_client = boto3.client('s3')
+        # Shared S3 client
+        s3_client = get_client('s3')
 
         # Generate unique filename
         file_extension = os.path.splitext(original_filename)[1]
@@ -171,6 +567,265 @@ def upload_bytes_to_s3(
         print(f"Unexpected error: {e}")
         raise HTTPException(status_code=500, detail="File upload failed")
 
+def _upload_part(s3_client, bucket_name: str, object_key: str, upload_id: str, part_number: int, body: bytes) -> dict:
+    """
+    Upload one part of a multipart upload and return its part descriptor
+    """
+    response = s3_client.upload_part(
+        Bucket=bucket_name,
+        Key=object_key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=body
+    )
+    return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+async def upload_stream_to_s3(
+    chunks,
+    original_filename: str,
+    bucket_name: str = 'pdfsummarydocuments',
+    prefix: str = 'uploads/'
+) -> str:
+    """
+    Upload a PDF to S3 as it arrives. The MIME type is sniffed from the first bytes,
+    MAX_FILE_SIZE is enforced while reading and the data is sent as a multipart upload,
+    each part uploading while the next one is being received. At most two parts are held
+    in memory per upload. Files smaller than one part are sent with a single put_object.
+    
+    Args:
+        chunks: Async iterator of byte chunks
+        original_filename (str): Original filename
+        bucket_name (str): S3 bucket name
+        prefix (str): S3 prefix/folder
+    
+    Returns:
+        str: S3 object key of uploaded file
+        
+    Raises:
+        HTTPException: If file is too large, invalid type, or upload fails
+    """
+    s3_client = get_client('s3')
+    file_extension = os.path.splitext(original_filename or "")[1]
+    object_key = f"{prefix}{uuid.uuid4()}{file_extension}"
+    upload_id = None
+    part_task = None
+    parts = []
+    completed = False
+
+    try:
+        buffer = bytearray()
+        total_size = 0
+        sniffed = False
+        async for chunk in chunks:
+            total_size += len(chunk)
+            if total_size > MAX_FILE_SIZE:
+                raise ValueError("File size exceeds maximum allowed size of 10MB")
+            buffer.extend(chunk)
+
+            # Validate file type from the first bytes only
+            if not sniffed and len(buffer) >= UPLOAD_SNIFF_BYTES:
+                _validate_pdf_header(bytes(buffer[:UPLOAD_SNIFF_BYTES]))
+                sniffed = True
+
+            if len(buffer) >= UPLOAD_PART_SIZE:
+                if upload_id is None:
+                    upload = await executors.run_io(
+                        s3_client.create_multipart_upload,
+                        Bucket=bucket_name, Key=object_key, ContentType='application/pdf'
+                    )
+                    upload_id = upload["UploadId"]
+                if part_task is not None:
+                    parts.append(await part_task)
+                part_task = asyncio.ensure_future(executors.run_io(
+                    _upload_part, s3_client, bucket_name, object_key, upload_id, len(parts) + 1, bytes(buffer)
+                ))
+                buffer = bytearray()
+
+        if not sniffed:
+            _validate_pdf_header(bytes(buffer))
+
+        if upload_id is None:
+            # Whole file fits in one part
+            await executors.run_io(
+                s3_client.put_object,
+                Bucket=bucket_name, Key=object_key, Body=bytes(buffer), ContentType='application/pdf'
+            )
+            metrics.bytes_total.inc(total_size, operation="s3_upload")
+            return object_key
+
+        parts.append(await part_task)
+        part_task = None
+        if buffer:
+            parts.append(await executors.run_io(
+                _upload_part, s3_client, bucket_name, object_key, upload_id, len(parts) + 1, bytes(buffer)
+            ))
+        await executors.run_io(
+            s3_client.complete_multipart_upload,
+            Bucket=bucket_name, Key=object_key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+        completed = True
+        metrics.bytes_total.inc(total_size, operation="s3_upload")
+        return object_key
+
+    except Exception as e:
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=400, detail=str(e))
+        if isinstance(e, ClientError):
+            print(f"S3 Upload Error: {e}")
+            raise HTTPException(status_code=500, detail=f"S3 upload failed: {str(e)}")
+        print(f"Unexpected error: {e}")
+        raise HTTPException(status_code=500, detail="File upload failed")
+    finally:
+        # Also runs on CancelledError when the client disconnects. Shielded so the abort
+        # finishes even if the request task is cancelled again while waiting for it
+        if upload_id is not None and not completed:
+            await asyncio.shield(asyncio.ensure_future(
+                _abort_multipart_upload(s3_client, bucket_name, object_key, upload_id, part_task)
+            ))
+
+async def _abort_multipart_upload(s3_client, bucket_name: str, object_key: str, upload_id: str, part_task):
+    """
+    Wait for the part upload in flight, then abort the multipart upload so S3 drops its parts
+    """
+    if part_task is not None:
+        await asyncio.gather(part_task, return_exceptions=True)
+    try:
+        await executors.run_io(
+            s3_client.abort_multipart_upload, Bucket=bucket_name, Key=object_key, UploadId=upload_id
+        )
+    except Exception as abort_error:
+        print(f"Could not abort multipart upload {upload_id}: {abort_error}")
+
+def _validate_pdf_header(header: bytes):
+    """
+    Raise ValueError unless the first bytes of a file look like a PDF
+    """
+    file_type = magic.from_buffer(header, mime=True)
+    if file_type not in ['application/pdf']:
+        raise ValueError(f"Invalid file type. Expected PDF, got {file_type}")
+
+async def _read_upload_file(file: UploadFile):
+    """
+    Yield an UploadFile in UPLOAD_READ_SIZE chunks
+    """
+    while True:
+        chunk = await file.read(UPLOAD_READ_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+def create_presigned_upload(
+    original_filename: str,
+    content_length: int = None,
+    bucket_name: str = 'pdfsummarydocuments',
+    prefix: str = 'uploads/'
+) -> dict:
+    """
+    Create presigned POST and PUT targets so the client uploads straight to S3.
+    A presigned PUT cannot limit the size of the body, so the PUT URL is only issued
+    when the declared size is signed into it; the POST policy always enforces the size range
+    
+    Args:
+        original_filename (str): Original filename
+        content_length (int): Declared file size, required for the PUT URL
+        bucket_name (str): S3 bucket name
+        prefix (str): S3 prefix/folder
+    
+    Returns:
+        dict: Object key, presigned POST (url and form fields) and presigned PUT URL,
+              None when no content_length was declared
+        
+    Raises:
+        HTTPException: If the declared size is too large or signing fails
+    """
+    if content_length is not None and not 0 < content_length <= MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size ({content_length / 1024 / 1024:.2f}MB) exceeds maximum allowed size of 10MB"
+        )
+
+    s3_client = get_client('s3')
+    file_extension = os.path.splitext(original_filename)[1]
+    object_key = f"{prefix}{uuid.uuid4()}{file_extension}"
+
+    try:
+        # POST policy enforces size and content type on the S3 side
+        presigned_post = s3_client.generate_presigned_post(
+            Bucket=bucket_name,
+            Key=object_key,
+            Fields={"Content-Type": "application/pdf"},
+            Conditions=[
+                {"Content-Type": "application/pdf"},
+                ["content-length-range", 1, MAX_FILE_SIZE],
+                ["starts-with", "$key", prefix]
+            ],
+            ExpiresIn=PRESIGNED_URL_EXPIRES
+        )
+        presigned_put = None
+        if content_length is not None:
+            presigned_put = s3_client.generate_presigned_url(
+                "put_object",
+                Params={"Bucket": bucket_name, "Key": object_key, "ContentType": "application/pdf", "ContentLength": content_length},
+                ExpiresIn=PRESIGNED_URL_EXPIRES
+            )
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Could not create upload URL: {str(e)}")
+
+    return {
+        "s3_object_key": object_key,
+        "post": presigned_post,
+        "put_url": presigned_put,
+        "expires_in": PRESIGNED_URL_EXPIRES
+    }
+
+def confirm_uploaded_pdf(
+    object_key: str,
+    bucket_name: str = 'pdfsummarydocuments',
+    prefix: str = 'uploads/'
+) -> str:
+    """
+    Validate a PDF the client uploaded with a presigned URL: size from a HEAD request and
+    file type from a ranged read of the first bytes. Invalid objects are deleted.
+    
+    Args:
+        object_key (str): S3 object key returned by create_presigned_upload
+        bucket_name (str): S3 bucket name
+        prefix (str): S3 prefix/folder uploads must live under
+    
+    Returns:
+        str: S3 object key of the validated file
+        
+    Raises:
+        HTTPException: If the object is missing, too large or not a PDF
+    """
+    if not object_key.startswith(prefix):
+        raise HTTPException(status_code=400, detail=f"Object key must start with {prefix}")
+
+    s3_client = get_client('s3')
+    try:
+        head = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ("404", "NoSuchKey"):
+            raise HTTPException(status_code=404, detail=f"Upload {object_key} not found in bucket {bucket_name}")
+        raise HTTPException(status_code=500, detail=f"Error accessing S3 object: {str(e)}")
+
+    try:
+        file_size = head["ContentLength"]
+        if file_size > MAX_FILE_SIZE:
+            raise ValueError(f"File size ({file_size / 1024 / 1024:.2f}MB) exceeds maximum allowed size of 10MB")
+        if file_size == 0:
+            raise ValueError("Uploaded file is empty")
+
+        header = s3_client.get_object(
+            Bucket=bucket_name, Key=object_key, Range=f"bytes=0-{UPLOAD_SNIFF_BYTES - 1}"
+        )['Body'].read()
+        _validate_pdf_header(header)
+    except ValueError as e:
+        s3_client.delete_object(Bucket=bucket_name, Key=object_key)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return object_key
+
 def delete_file_from_s3(bucket_name: str, object_key: str) -> dict:
     """
     Delete a file from S3 bucket
@@ -183,8 +838,8 @@ def delete_file_from_s3(bucket_name: str, object_key: str) -> dict:
         dict: Deletion status and details
     """
     try:
-        # Create S3 client
-        s3_client = boto3.client('s3')
+        # Shared S3 client
+        s3_client = get_client('s3')
         
         # Verify object exists before deletion
         try:
@@ -237,55 +892,263 @@ def delete_file_from_s3(bucket_name: str, object_key: str) -> dict:
             detail=f"Unexpected error during S3 deletion: {str(e)}"
         )
 
-def bedrock_calling(system_prompt,prompt_type, pdf_text):
+def build_bedrock_payload(system_prompt, prompt_type, pdf_text, route: dict = None) -> dict:
     """
-    Call AWS Bedrock API with appropriate prompts
+    Build the Anthropic messages payload sent to Bedrock.
+    The system prompt and the static instructions come first and the document last,
+    so the prefix is identical across requests and can be read from the prompt cache.
+    The cache breakpoint depends on the model and is added by bedrock_request_body.
     
     Args:
-        prompt_type (str): Type of prompt to use
-        pdf_text (str): Extracted text from PDF
+        system_prompt (str): System prompt for the task
+        prompt_type (str): Static instructions of the task
+        pdf_text (str): Document text, appended after the instructions
+        route (dict): Model route setting max_tokens and temperature, the analysis route by default
         
     Returns:
-        JSONResponse: Structured analysis response
+        dict: Request body for invoke_model
     """
-    payload = {
+    route = route or model_routing.route("analysis")
+    return {
         "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 4000,
+        "max_tokens": route["max_tokens"],
+        "system": system_prompt,
         "messages": [
             
             {
                 "role": "user",
-                "content": f"""{system_prompt} \n\n {prompt_type}"""
+                "content": [
+                    {"type": "text", "text": prompt_type},
+                    {"type": "text", "text": prompts.document_block(pdf_text)}
+                ]
             }
         ],
-        "temperature": 0.3,
+        "temperature": route["temperature"],
         "top_p": 0.9,
         "top_k": 250
     }
 
-    bedrock = session.client('bedrock-runtime')
-    body = json.dumps(payload)
-    model_id = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
+def bedrock_request_body(payload: dict, model_id: str) -> str:
+    """
+    Serialize a payload for the model it is sent to: max_tokens is lowered to the model's
+    output limit, and a cache breakpoint after the instructions is added when the model
+    supports prompt caching and the system prompt plus instructions are long enough to be cached
     
-    response = bedrock.invoke_model(
-        body=body,
-        modelId=model_id,
-        accept="application/json",
-        contentType="application/json",
-    )
+    Args:
+        payload (dict): Payload from build_bedrock_payload
+        model_id (str): Model or inference profile the request goes to
+        
+    Returns:
+        str: JSON request body for invoke_model
+    """
+    body = dict(payload, max_tokens=model_routing.clamp_max_tokens(model_id, payload["max_tokens"]))
+    min_tokens = model_routing.prompt_cache_min_tokens(model_id)
+    if BEDROCK_PROMPT_CACHING and min_tokens is not None:
+        user_message = payload["messages"][0]
+        instructions = user_message["content"][0]
+        if token_budget.estimate_tokens(payload.get("system", "") + instructions["text"]) >= min_tokens:
+            # Cache breakpoint covers the system prompt and the instructions
+            cached = dict(instructions, cache_control={"type": "ephemeral"})
+            body["messages"] = [dict(user_message, content=[cached, *user_message["content"][1:]]), *payload["messages"][1:]]
+    return json.dumps(body)
+
+def parse_model_json(response_text: str) -> dict:
+    """
+    Extract the JSON object from the model response text, repairing literals,
+    commas and truncation when the strict parse fails
+
+    Raises:
+        json_repair.JSONRepairError: If no JSON object can be recovered
+    """
+    try:
+        result, outcome = json_repair.parse_json_object(response_text)
+    except json_repair.JSONRepairError:
+        json_repair.record("failed")
+        raise
+    json_repair.record(outcome)
+    return result
+
+def estimate_payload_tokens(payload: dict) -> int:
+    """
+    Estimate the input plus expected output tokens of a Bedrock payload for the rate limiter
+    """
+    texts = [payload.get("system", "")]
+    for message in payload["messages"]:
+        content = message["content"]
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.extend(block.get("text", "") for block in content)
+    output_tokens = min(payload["max_tokens"], BEDROCK_EXPECTED_OUTPUT_TOKENS)
+    return sum(token_budget.estimate_tokens(text) for text in texts) + output_tokens
+
+def _usage_tokens(usage: dict, stage: str = None):
+    """
+    Total tokens from a Bedrock usage block, or None if the response did not report usage.
+    With a stage name the input and output tokens are also counted in the metrics
+    """
+    if not usage:
+        return None
+    if stage is not None:
+        metrics.tokens_total.inc(usage.get("input_tokens", 0), stage=stage, direction="input")
+        metrics.tokens_total.inc(usage.get("output_tokens", 0), stage=stage, direction="output")
+        metrics.tokens_total.inc(usage.get("cache_read_input_tokens", 0), stage=stage, direction="cache_read")
+    return usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
 
-    response_body = json.loads(response.get("body").read())
-    response_text = response_body.get("content")[0].get("text")
+def _limited_bedrock_call(function, estimated_tokens, hold=False):
+    """
+    Run a Bedrock call through the shared rate limiter and turn capacity errors into 503s
+    """
+    try:
+        return rate_limiter.bedrock_limiter.call(function, estimated_tokens, hold=hold)
+    except rate_limiter.RateLimitTimeout as e:
+        raise HTTPException(status_code=503, detail=f"Bedrock is at capacity, retry later: {str(e)}")
+    except ClientError as e:
+        if rate_limiter.is_throttling_error(e):
+            raise HTTPException(status_code=503, detail="Bedrock is throttling requests, retry later")
+        raise
+
+def invoke_bedrock_text(payload: dict, route: dict) -> tuple:
+    """
+    Send a messages payload to the routed Bedrock model
+
+    Returns:
+        tuple: (generated text, stop reason such as "end_turn" or "max_tokens")
+    """
+    stage = metrics.current_stage()
+    estimated_tokens = estimate_payload_tokens(payload)
+    metrics.prompt_tokens.observe(estimated_tokens, stage=stage)
+
+    # The fallback model gets its own read timeout and max_tokens within its output limit
+    def invoke_model(model_id, timeout):
+        bedrock = get_client('bedrock-runtime', read_timeout=timeout)
+        body = bedrock_request_body(payload, model_id)
+        response = bedrock.invoke_model(
+            body=body,
+            modelId=model_id,
+            accept="application/json",
+            contentType="application/json",
+        )
+        response_body = json.loads(response.get("body").read())
+        text = response_body.get("content")[0].get("text")
+        return (text, response_body.get("stop_reason")), _usage_tokens(response_body.get("usage"), stage)
+
+    # Routing sits inside the limiter so queueing time never counts against a model's latency budget
+    def invoke():
+        return model_routing.invoke(route, invoke_model)
+
+    with metrics.stage("bedrock_invoke", caller=stage):
+        try:
+            return _limited_bedrock_call(invoke, estimated_tokens)
+        except ReadTimeoutError:
+            raise HTTPException(status_code=504, detail=f"Bedrock did not answer within {route['deadline']} seconds")
+
+def bedrock_calling(system_prompt,prompt_type, pdf_text, route: dict = None):
+    """
+    Call AWS Bedrock API with appropriate prompts
     
+    Args:
+        system_prompt (str): System prompt for the task
+        prompt_type (str): Static instructions of the task
+        pdf_text (str): Extracted text from PDF
+        route (dict): Model route from model_routing.route, the analysis route by default
+        
+    Returns:
+        JSONResponse: Structured analysis response
+    """
+    route = route or model_routing.route("analysis")
+    payload = build_bedrock_payload(system_prompt, prompt_type, pdf_text, route)
+    response_text, stop_reason = invoke_bedrock_text(payload, route)
+
     # Extract JSON from response
-    start = response_text.find('{')
-    end = response_text.rfind('}') + 1
-    response_text = response_text[start:end]
-    return json.loads(response_text)
+    try:
+        result, outcome = json_repair.parse_json_object(response_text)
+        json_repair.record(outcome)
+        return result
+    except json_repair.JSONRepairError as repair_error:
+        # A continuation can only finish output that was cut off, a complete answer is not retried
+        if stop_reason != "max_tokens" and not json_repair.is_unclosed(response_text):
+            json_repair.record("failed")
+            raise
+        print(f"Model output could not be repaired, requesting a continuation: {repair_error}")
+
+    # Prefill the assistant turn so the model continues its own output instead of starting over.
+    # Without any object in the output, prefill an opening brace to force JSON
+    prefill = response_text.rstrip() if '{' in response_text else "{"
+    payload["max_tokens"] = BEDROCK_CONTINUATION_MAX_TOKENS
+    payload["messages"].append({"role": "assistant", "content": prefill})
+    continuation_text, _ = invoke_bedrock_text(payload, route)
+
+    try:
+        result, _ = json_repair.parse_json_object(prefill + continuation_text)
+    except json_repair.JSONRepairError:
+        json_repair.record("failed")
+        raise
+    json_repair.record("continued")
+    return result
+
+def bedrock_streaming(system_prompt, prompt_type, pdf_text, route: dict = None):
+    """
+    Call AWS Bedrock with response streaming and yield the generated text as it arrives
+    
+    Args:
+        system_prompt (str): System prompt for the task
+        prompt_type (str): Static instructions of the task
+        pdf_text (str): Document text, appended after the instructions
+        route (dict): Model route from model_routing.route, the analysis route by default
+        
+    Yields:
+        str: Text deltas of the model response
+    """
+    route = route or model_routing.route("analysis")
+    payload = build_bedrock_payload(system_prompt, prompt_type, pdf_text, route)
+    estimated_tokens = estimate_payload_tokens(payload)
+    stage = metrics.current_stage()
+    metrics.prompt_tokens.observe(estimated_tokens, stage=stage)
+
+    # A stream cannot be replayed on another model, so only the choice of model is routed
+    model_id, reason = model_routing.choose_model(route)
+    timeout = model_routing.call_timeout(route, model_id)
+    bedrock = get_client('bedrock-runtime', read_timeout=timeout)
+    body = bedrock_request_body(payload, model_id)
+
+    def invoke():
+        response = bedrock.invoke_model_with_response_stream(
+            body=body,
+            modelId=model_id,
+            accept="application/json",
+            contentType="application/json",
+        )
+        return response, None
+
+    # The limiter slot is held until the stream has been read
+    response = _limited_bedrock_call(invoke, estimated_tokens, hold=True)
+    usage = {}
+    started = time.perf_counter()
+    timed_out = False
+    try:
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if chunk is None:
+                continue
+            message = json.loads(chunk["bytes"])
+            if message.get("type") == "message_start":
+                usage.update(message["message"].get("usage", {}))
+            elif message.get("type") == "message_delta":
+                usage.update(message.get("usage", {}))
+            elif message.get("type") == "content_block_delta" and message["delta"].get("type") == "text_delta":
+                yield message["delta"]["text"]
+    except ReadTimeoutError:
+        timed_out = True
+        raise HTTPException(status_code=504, detail=f"Bedrock stream stalled for {timeout} seconds")
+    finally:
+        rate_limiter.bedrock_limiter.release(estimated_tokens, actual_tokens=_usage_tokens(usage, stage))
+        model_routing.record_decision(route, model_id, reason, time.perf_counter() - started, timed_out=timed_out)
 
 def get_document_class(pdf_text: str) -> dict:
     """
-    Classify document type using classification prompt
+    Classify document type with the local classifier, falling back to the
+    classification prompt when the local confidence is below LOCAL_CLASSIFIER_THRESHOLD
     
     Args:
         pdf_text (str): Extracted text from PDF
@@ -293,28 +1156,82 @@ def get_document_class(pdf_text: str) -> dict:
     Returns:
         dict: Document classification details
     """
-    classification_prompt = prompts.user_prompt_classification(pdf_text)
-    system_prompt = prompts.system_prompt_for_doc_classification
-    return bedrock_calling(system_prompt =system_prompt,prompt_type = classification_prompt, pdf_text = pdf_text)
+    with metrics.stage("classification") as stage:
+        # Confident local predictions skip the Bedrock round trip
+        local_result = classifier.classify(pdf_text)
+        if local_result["confidence_score"] >= classifier.LOCAL_CLASSIFIER_THRESHOLD:
+            stage["source"] = "local"
+            return local_result
+
+        stage["source"] = "bedrock"
+        classification_prompt = prompts.instructions_classification()
+        system_prompt = prompts.system_prompt_for_doc_classification
+        classification_result = bedrock_calling(
+            system_prompt =system_prompt,prompt_type = classification_prompt, pdf_text = pdf_text,
+            route = model_routing.route("classification")
+        )
+    # Same category names as the local classifier, whatever spelling the model echoed
+    doc_class = classification_result.get('class')
+    if doc_class in classifier.CATEGORIES:
+        classification_result["category"] = classifier.CATEGORIES[doc_class]
+    classifier.record_sample(pdf_text, classification_result)
+    return classification_result
 
-def get_document_analysis(doc_class: int, pdf_text: str) -> dict:
+def summarize_document_chunks(pages: list) -> str:
     """
-    Generate appropriate document analysis based on classification
+    Map step for long documents: summarize page chunks concurrently and merge the notes
+    
+    Args:
+        pages (list): Text of each page in document order
+        
+    Returns:
+        str: Merged chunk notes, used as the document text of the per-class prompt
+    """
+    chunks = token_budget.chunk_pages(pages)
+    system_prompt = prompts.system_prompt_for_chunk_summary
+    route = model_routing.route("chunk_summary")
+
+    def summarize(numbered_chunk):
+        part, chunk = numbered_chunk
+        chunk_prompt = prompts.instructions_chunk_summary()
+        chunk_text = prompts.chunk_text(chunk, part, len(chunks))
+        return bedrock_calling(system_prompt = system_prompt, prompt_type = chunk_prompt, pdf_text = chunk_text, route = route)
+
+    # Each chunk runs in a copy of the request context so its timings land in the request trace
+    with metrics.stage("map_chunks", chunks=len(chunks)):
+        with ThreadPoolExecutor(max_workers=token_budget.MAP_CONCURRENCY) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, summarize, numbered_chunk)
+                for numbered_chunk in enumerate(chunks, start=1)
+            ]
+            chunk_notes = [future.result() for future in futures]
+
+    return "\n".join(
+        f"PART {part} OF {len(chunks)}:\n{json.dumps(notes, ensure_ascii=False)}"
+        for part, notes in enumerate(chunk_notes, start=1)
+    )
+
+def build_analysis_prompts(doc_class: int, pdf_text: str, pages: list = None) -> tuple:
+    """
+    Build the system prompt, static instructions and document text for the analysis of a classified document.
+    Documents over ANALYSIS_TOKEN_BUDGET are analyzed map-reduce style: page chunks are
+    summarized first and the per-class prompt runs over the merged summaries.
     
     Args:
         doc_class (int): Document class number
         pdf_text (str): Extracted text from PDF
+        pages (list): Text of each page, used to chunk long documents
         
     Returns:
-        dict: Document analysis
+        tuple: (system_prompt, instructions, pdf_text)
     """
     prompt_mapping = {
-        0: prompts.user_prompt_poi,
-        1: prompts.user_prompt_poa,
-        2: prompts.user_prompt_registration,
-        3: prompts.user_prompt_ownership,
-        4: prompts.user_prompt_tax_return,
-        5: prompts.user_prompt_financial
+        0: prompts.instructions_poi,
+        1: prompts.instructions_poa,
+        2: prompts.instructions_registration,
+        3: prompts.instructions_ownership,
+        4: prompts.instructions_tax_return,
+        5: prompts.instructions_financial
     }
 
     system_prompt_mapping = {
@@ -332,14 +1249,366 @@ def get_document_analysis(doc_class: int, pdf_text: str) -> dict:
             detail=f"Invalid document class: {doc_class}"
         )
 
-    user_prompt = prompt_mapping[doc_class](pdf_text, today)
-    #print(user_prompt)
+    if token_budget.estimate_tokens(pdf_text) > token_budget.ANALYSIS_TOKEN_BUDGET:
+        pdf_text = summarize_document_chunks(pages or [pdf_text])
+
+    instructions = prompt_mapping[doc_class](today)
     system_prompt = system_prompt_mapping[doc_class]
-    #print(system_prompt)
+    return system_prompt, instructions, pdf_text
 
-    #print(bedrock_calling(system_prompt = system_prompt,prompt_type =user_prompt,pdf_text = pdf_text))
+def get_document_analysis(doc_class: int, pdf_text: str, pages: list = None) -> dict:
+    """
+    Generate appropriate document analysis based on classification
+    
+    Args:
+        doc_class (int): Document class number
+        pdf_text (str): Extracted text from PDF
+        pages (list): Text of each page, used to chunk long documents
+        
+    Returns:
+        dict: Document analysis
+    """
+    with metrics.stage("analysis", doc_class=doc_class) as stage:
+        system_prompt, instructions, pdf_text = build_analysis_prompts(doc_class, pdf_text, pages)
+        analysis = bedrock_calling(
+            system_prompt = system_prompt,prompt_type = instructions, pdf_text = pdf_text,
+            route = model_routing.route("analysis", doc_class)
+        )
+    if "ms" in stage:
+        metrics.analysis_seconds.observe(stage["ms"] / 1000, doc_class=doc_class)
+    return analysis
+
+async def summary_pipeline_events(bucket_name: str, object_key: str, persist: bool = True, stream_analysis: bool = False):
+    """
+    The summary pipeline shared by all summary endpoints: download, cache lookup, text extraction,
+    classification, analysis and Mongo insert. S3, Mongo and Bedrock calls run on the I/O pool
+    and PDF parsing on the CPU process pool, and an event is yielded as each stage completes
+
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): S3 object key of the PDF file
+        persist (bool): Insert the result into Mongo and the result cache. When False,
+                        fresh results are returned with their "cache_key" and without
+                        "mongo_obj_id" so the caller can persist them in bulk
+        stream_analysis (bool): Stream the analysis from Bedrock and yield its text deltas
+
+    Yields:
+        tuple: (event, data) for the "progress", "classification" and "token" events, and last
+               ("response", {"result": {...}}) on success or ("response", {"error": "..."}) for
+               unsupported documents
+    """
+    # Collect the model routing decisions of this document, stored with the result
+    routing = model_routing.track_decisions()
+    yield "progress", {"stage": "download"}
+    # Download the pdf and serve identical documents from the result cache
+    pdf_bytes, detection = await executors.run_io(download_with_detection, bucket_name = bucket_name, object_key = object_key)
+    cache_key, cached_response = await executors.run_io(lookup_cached_summary, pdf_bytes)
+    if cached_response is not None:
+        yield "response", {"result":cached_response}
+        return
+
+    # Extract text from the given pdf
+    yield "progress", {"stage": "extraction"}
+    pdf_text = await extract_text_from_pdf_bytes_async(pdf_bytes, detection)
+    yield "progress", {"stage": "extraction", "page_count": pdf_text["page_count"], "is_scanned": pdf_text["is_scanned"]}
+    if pdf_text["is_scanned"] is True and not pdf_text["text"]:
+        yield "response", {"error" : "Could not extract text from the scanned document"}
+        return
+    # Drop running headers, footers and boilerplate before anything is prompted
+    await executors.run_io(compact_extracted_text, pdf_text)
+    page_texts = [page["text"] for page in pdf_text["pages"]]
+
+    # First, classify the document on the leading and sampled pages only
+    yield "progress", {"stage": "classification"}
+    classification_text = token_budget.shape_for_classification(page_texts)
+    classification_result = await executors.run_io(get_document_class, classification_text)
+    doc_class = classification_result.get('class')
+    record_classification(classification_result, pdf_text)
+    yield "classification", classification_result
+
+    # Then generate appropriate analysis based on document class
+    yield "progress", {"stage": "analysis"}
+    if stream_analysis:
+        system_prompt, instructions, analysis_text = await executors.run_io(
+            build_analysis_prompts, doc_class, pdf_text["text"], page_texts
+        )
+        response_parts = []
+        analysis_route = model_routing.route("analysis", doc_class)
+        async for text in executors.iterate_io(bedrock_streaming(system_prompt, instructions, analysis_text, route=analysis_route)):
+            response_parts.append(text)
+            yield "token", {"text": text}
+        analysis_result = parse_model_json("".join(response_parts))
+    else:
+        analysis_result = await executors.run_io(get_document_analysis, doc_class, pdf_text["text"], pages = page_texts)
+
+    # Combine classification and analysis results
+    final_response = build_summary_response(classification_result, analysis_result, pdf_text, routing)
+    if not persist:
+        yield "response", {"result":final_response, "cache_key":cache_key}
+        return
+    yield "response", await executors.run_io(persist_summary, final_response, cache_key)
+
+async def run_summary_pipeline_async(bucket_name: str, object_key: str, file_name: str = None, persist: bool = True) -> dict:
+    """
+    Run the summary pipeline for one PDF and return its response
+
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): S3 object key of the PDF file
+        file_name (str): Original file name
+        persist (bool): Insert the result into Mongo and the result cache, see summary_pipeline_events
+
+    Returns:
+        dict: {"result": {...}} on success, {"error": "..."} for unsupported documents
+    """
+    async for event, data in summary_pipeline_events(bucket_name, object_key, persist=persist):
+        if event == "response":
+            return data
+
+def run_summary_pipeline(bucket_name: str, object_key: str, file_name: str = None, persist: bool = True) -> dict:
+    """
+    Blocking entry point of the summary pipeline for the job worker threads, which have no event loop
+
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): S3 object key of the PDF file
+        file_name (str): Original file name
+        persist (bool): Insert the result into Mongo and the result cache, see summary_pipeline_events
+
+    Returns:
+        dict: {"result": {...}} on success, {"error": "..."} for unsupported documents
+    """
+    return asyncio.run(run_summary_pipeline_async(bucket_name, object_key, file_name, persist))
+
+def run_summary_job(bucket_name: str, object_key: str, file_name: str = None) -> dict:
+    """
+    Job handler: the summary becomes the job result, a document that cannot be summarized fails the job
+
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): S3 object key of the PDF file
+        file_name (str): Original file name
+
+    Returns:
+        dict: Summary result
+
+    Raises:
+        HTTPException: For scanned documents without extractable text
+    """
+    response = run_summary_pipeline(bucket_name, object_key, file_name)
+    if "error" in response:
+        raise HTTPException(status_code=422, detail=response["error"])
+    return response["result"]
+
+def lookup_cached_summary(pdf_bytes: bytes) -> tuple:
+    """
+    Look up a previous summary of identical PDF bytes
+
+    Returns:
+        tuple: (cache key, cached result or None)
+    """
+    with metrics.stage("cache_lookup") as stage:
+        # Compacted and raw text give different analyses, so the switch is part of the key, and
+        # expiry and validity verdicts are judged against the date the prompts were built with
+        cache_key = result_cache.cache_key(
+            pdf_bytes, f"{model_routing.routes_fingerprint()}:compaction={compaction.TEXT_COMPACTION}:today={today}"
+        )
+        cached_response = result_cache.get(cache_key)
+        stage["hit"] = cached_response is not None
+    if cached_response is not None:
+        metrics.documents_total.inc(doc_class=cached_response.get("document_type"), source="cache")
+    return cache_key, cached_response
+
+def compact_extracted_text(pdf_text: dict) -> dict:
+    """
+    Remove running headers, footers, repeated boilerplate and whitespace runs from the
+    extracted pages in place, when TEXT_COMPACTION is on
     
-    return bedrock_calling(system_prompt = system_prompt,prompt_type = user_prompt, pdf_text = pdf_text)
+    Args:
+        pdf_text (dict): Result of extract_text_from_pdf_bytes
+        
+    Returns:
+        dict: Tokens before, after and saved, or None when compaction is off
+    """
+    if not compaction.TEXT_COMPACTION or not pdf_text["pages"]:
+        return None
+    with metrics.stage("compaction") as stage:
+        page_texts, stats = compaction.compact_pages([page["text"] for page in pdf_text["pages"]])
+        stage["tokens_before"] = stats["tokens_before"]
+        stage["tokens_saved"] = stats["tokens_saved"]
+    for page, text in zip(pdf_text["pages"], page_texts):
+        page["text"] = text
+    pdf_text["text"] = "\n".join(page_texts).strip()
+    pdf_text["text_compaction"] = stats
+    metrics.compaction_tokens_saved.observe(stats["tokens_saved"])
+    return stats
+
+def record_classification(classification_result: dict, pdf_text: dict):
+    """
+    Count the classified document and add its class to the request trace
+    """
+    metrics.documents_total.inc(
+        doc_class=classification_result.get('category'), source=classification_result.get('source', 'bedrock')
+    )
+    metrics.annotate(
+        doc_class=classification_result.get('class'), page_count=pdf_text["page_count"], is_scanned=pdf_text["is_scanned"]
+    )
+
+def build_summary_response(classification_result: dict, analysis_result: dict, pdf_text: dict, routing: list = None) -> dict:
+    """
+    Combine classification and analysis results, with the model routing decisions that produced them
+    """
+    final_response = {
+        "document_type": classification_result.get('category'),
+        "analysis": analysis_result
+    }
+    if routing:
+        final_response["model_routing"] = list(routing)
+    if "ocr_confidence" in pdf_text:
+        final_response["ocr_confidence"] = pdf_text["ocr_confidence"]
+    if "text_compaction" in pdf_text:
+        final_response["text_compaction"] = pdf_text["text_compaction"]
+    return final_response
+
+def persist_summary(final_response: dict, cache_key: str) -> dict:
+    """
+    Insert a fresh summary into Mongo and, once it is written, the result cache. With the
+    write-behind buffer that is when the buffer flushed it, so a cached result never names
+    a document that was lost
+
+    Returns:
+        dict: {"result": {...}} with the Mongo object id, None if the insert failed
+    """
+    document = {"_id": ObjectId(), **final_response}
+    cached_response = {**final_response, "mongo_obj_id": str(document["_id"])}
+    mongo_obj_id = insert_document(document, on_written=lambda _: result_cache.put(cache_key, cached_response))
+    final_response["mongo_obj_id"] = mongo_obj_id
+    return {"result":final_response}
+
+async def stream_batch_summaries(items: list):
+    """
+    Summarize a batch of PDFs concurrently, at most BATCH_CONCURRENCY at a time, and yield
+    one NDJSON line per item as it completes. Fresh results are written with a single bulk
+    insert once every item finished, their Mongo ids are only sent in the final line once
+    that write succeeded. Items still running when the client goes away are cancelled.
+    
+    Args:
+        items (list): BatchItem entries with bucket name, object key and file name
+        
+    Yields:
+        str: NDJSON lines, one per item, then a final batch summary line with
+             "mongo_obj_ids" mapping the index of each inserted item to its id
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def summarize(index, item):
+        async with semaphore:
+            try:
+                response = await run_summary_pipeline_async(
+                    bucket_name = item.bucket_name,
+                    object_key = item.object_key,
+                    file_name = item.file_name,
+                    persist = False
+                )
+            except HTTPException as e:
+                response = {"error": e.detail, "status_code": e.status_code}
+            except Exception as e:
+                response = {"error": str(e), "status_code": 500}
+        return index, item, response
+
+    pending_documents = []
+    pending_results = []
+    tasks = [asyncio.create_task(summarize(index, item)) for index, item in enumerate(items)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            index, item, response = await task
+            cache_key = response.pop("cache_key", None)
+            if cache_key is not None:
+                pending_documents.append({"_id": ObjectId(), **response["result"]})
+                pending_results.append((index, cache_key, response["result"]))
+            yield json.dumps({"index": index, "object_key": item.object_key, **response}) + "\n"
+    finally:
+        # A client that disconnected closes the generator, stop the items still running
+        for task in tasks:
+            task.cancel()
+
+    # Results are cached as each document is written, after the flush with the write-behind buffer
+    cache_entries = {}
+    for document, (index, cache_key, final_response) in zip(pending_documents, pending_results):
+        final_response["mongo_obj_id"] = str(document["_id"])
+        cache_entries[final_response["mongo_obj_id"]] = (cache_key, final_response)
+    inserted_ids = await executors.run_io(
+        insert_documents, pending_documents, lambda document_id: result_cache.put(*cache_entries[document_id])
+    ) if pending_documents else []
+    mongo_obj_ids = {}
+    if inserted_ids is not None:
+        for index, cache_key, final_response in pending_results:
+            mongo_obj_ids[index] = final_response["mongo_obj_id"]
+    yield json.dumps({
+        "batch_complete": True,
+        "items": len(items),
+        "inserted": len(inserted_ids or []),
+        "mongo_obj_ids": mongo_obj_ids,
+        "error": None if inserted_ids is not None else "Bulk insert of batch results failed"
+    }) + "\n"
+
+def _sse_event(event: str, data) -> str:
+    """
+    Format one server-sent event
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_summary_events(bucket_name: str, object_key: str, file_name: str = None):
+    """
+    Run the summary pipeline and yield server-sent events as each stage completes:
+    progress events for download and extraction, the classification, analysis tokens
+    as Bedrock generates them and finally the parsed result
+    
+    Args:
+        bucket_name (str): Name of the S3 bucket
+        object_key (str): S3 object key of the PDF file
+        file_name (str): Original file name
+        
+    Yields:
+        str: Formatted server-sent events
+    """
+    try:
+        async for event, data in summary_pipeline_events(bucket_name, object_key, stream_analysis=True):
+            if event != "response":
+                yield _sse_event(event, data)
+            elif "error" in data:
+                yield _sse_event("error", {"detail": data["error"]})
+            else:
+                yield _sse_event("result", data)
+
+    except HTTPException as e:
+        yield _sse_event("error", {"detail": e.detail, "status_code": e.status_code})
+    except Exception as e:
+        yield _sse_event("error", {"detail": str(e), "status_code": 500})
+
+async def limited_stream(limit_name: str, chunks, busy_chunk):
+    """
+    Hold a slot of an endpoint group while a streaming response is sent. Synchronous
+    iterators are advanced on the I/O pool so they never block the event loop
+
+    Args:
+        limit_name (str): Endpoint group from executors.ENDPOINT_LIMITS
+        chunks: Sync or async iterator of response chunks
+        busy_chunk (callable): Builds the chunk sent when no slot became free in time
+
+    Yields:
+        Response chunks
+    """
+    try:
+        async with executors.limit(limit_name):
+            if not hasattr(chunks, "__aiter__"):
+                chunks = executors.iterate_io(chunks)
+            async for chunk in chunks:
+                yield chunk
+    except executors.EndpointBusy as e:
+        yield busy_chunk(str(e))
+
+job_manager = jobs.JobManager(run_summary_job)
 
 ###---------------------------------------Define API End-points--------------------------------------------------------------###
 
@@ -355,14 +1624,13 @@ async def upload_pdf(file: UploadFile = File(...)):
         JSON response with S3 object key
     """
     try:
-        # Read file bytes
-        file_bytes = await file.read()
-        
-        # Upload to S3
-        s3_object_key = upload_bytes_to_s3(
-            file_bytes=file_bytes, 
-            original_filename=file.filename
-        )
+        # Stream file chunks to S3 instead of reading the whole file into memory
+        async with executors.limit("upload"):
+            with metrics.stage("s3_upload"):
+                s3_object_key = await upload_stream_to_s3(
+                    chunks=_read_upload_file(file),
+                    original_filename=file.filename
+                )
         
         return JSONResponse(content={
             "message": "File uploaded successfully",
@@ -371,7 +1639,94 @@ async def upload_pdf(file: UploadFile = File(...)):
         }, status_code=200)
     
     except HTTPException as e:
-        return e
+        raise e
+
+@app.post("/upload_pdf_stream")
+async def upload_pdf_stream(request: Request, file_name: str):
+    """
+    API endpoint to upload a PDF sent as the raw request body (Content-Type: application/pdf).
+    Unlike multipart form uploads, which are fully received before the handler runs,
+    the body is forwarded to S3 while the client is still sending it.
+    
+    Args:
+        request (Request): Request whose body is the PDF
+        file_name (str): Original filename
+    
+    Returns:
+        JSON response with S3 object key
+    """
+    async with executors.limit("upload"):
+        with metrics.stage("s3_upload"):
+            s3_object_key = await upload_stream_to_s3(
+                chunks=request.stream(),
+                original_filename=file_name
+            )
+    return JSONResponse(content={
+        "message": "File uploaded successfully",
+        "s3_object_key": s3_object_key,
+        "original_filename": file_name
+    }, status_code=200)
+
+@app.post("/upload_url")
+async def create_upload_url(request: UploadUrlRequest):
+    """
+    API endpoint issuing presigned URLs to upload a PDF directly to S3
+    
+    Args:
+        request (UploadUrlRequest): File name and optional declared size
+    
+    Returns:
+        dict: Object key, presigned POST (url and fields) and presigned PUT URL, the PUT URL
+              only when content_length is given. Call /confirm_upload with the object key once
+              the upload finished.
+    """
+    async with executors.limit("upload"):
+        return await executors.run_io(
+            create_presigned_upload,
+            original_filename=request.file_name,
+            content_length=request.content_length
+        )
+
+@app.post("/confirm_upload")
+async def confirm_upload(request: ConfirmUploadRequest):
+    """
+    API endpoint validating a direct-to-S3 upload
+    
+    Args:
+        request (ConfirmUploadRequest): Object key from /upload_url and original file name
+    
+    Returns:
+        JSON response with S3 object key, same as /upload_pdf
+    """
+    async with executors.limit("upload"):
+        s3_object_key = await executors.run_io(confirm_uploaded_pdf, object_key=request.object_key)
+    return JSONResponse(content={
+        "message": "File uploaded successfully",
+        "s3_object_key": s3_object_key,
+        "original_filename": request.file_name
+    }, status_code=200)
+
+@app.post("/inspect_pdf")
+async def inspect_pdf(request: S3ObjectRequest):
+    """
+    API endpoint reporting the page count of a PDF in S3 and whether it is scanned,
+    reading only the parts of the file the check needs
+
+    Args:
+        request (S3ObjectRequest): Bucket name and object key of the PDF
+
+    Returns:
+        dict: Scanned verdict, page count, inspected pages, object size, range requests and bytes fetched
+    """
+    def inspect():
+        with open_s3_pdf(request.bucket_name, request.object_key) as pdf_file:
+            try:
+                return inspect_s3_pdf(pdf_file)
+            except Exception as pdf_error:
+                raise HTTPException(status_code=400, detail=f"Error parsing PDF: {str(pdf_error)}")
+
+    async with executors.limit("inspect"):
+        return await executors.run_io(inspect)
 
 # API Endpoint for S3 File Deletion
 @app.delete("/delete_file")
@@ -386,48 +1741,216 @@ async def delete_s3_file(request: S3DeleteRequest):
         dict: Deletion status and details
     """
     try:
-        # Call deletion function
-        result = delete_file_from_s3(
-            bucket_name=request.bucket_name, 
-            object_key=request.object_key
-        )
+        # Call deletion function on the I/O pool
+        async with executors.limit("delete"):
+            result = await executors.run_io(
+                delete_file_from_s3,
+                bucket_name=request.bucket_name,
+                object_key=request.object_key
+            )
         return result
     
     except HTTPException as e:
         # Re-raise HTTP exceptions
         raise e
 
+@app.get("/metrics/aws_clients")
+def aws_client_metrics():
+    """
+    API endpoint reporting how often the shared boto3 clients were reused
+    
+    Returns:
+        dict: Created and reused counts plus reuse ratio per AWS service
+    """
+    return client_stats()
+
+@app.get("/metrics/bedrock_limiter")
+def bedrock_limiter_metrics():
+    """
+    API endpoint reporting the Bedrock rate limiter state
+    
+    Returns:
+        dict: Admitted, throttled, retried and timed out counts, current concurrency limit and budgets
+    """
+    return rate_limiter.bedrock_limiter.stats()
+
+@app.get("/metrics/json_repair")
+def json_repair_metrics():
+    """
+    API endpoint reporting how model outputs were parsed
+    
+    Returns:
+        dict: Parsed, repaired, continued and failed counts plus repair and retry rates
+    """
+    return json_repair.repair_stats()
+
+@app.get("/metrics/model_routing")
+def model_routing_metrics():
+    """
+    API endpoint reporting model routing per stage and document class
+    
+    Returns:
+        dict: Calls per model, primary p90 latency and remaining fallback time per route
+    """
+    return model_routing.routing_stats()
+
+@app.get("/metrics/startup")
+def startup_metrics():
+    """
+    API endpoint reporting the cost of the deferred imports and of the startup warm-up
+    
+    Returns:
+        dict: Seconds of each warm-up step and of the first import of each lazily loaded module
+    """
+    return {"warmup": warmup.last_warmup, "imports": lazy_imports.import_stats()}
+
+def _service_metrics():
+    """
+    Metric families owned by other modules: boto3 client reuse, the Bedrock limiter, JSON repair,
+    endpoint concurrency, model fallbacks and deferred imports
+    """
+    aws_stats = client_stats()
+    limiter_stats = rate_limiter.bedrock_limiter.stats()
+    repair_stats = json_repair.repair_stats()
+    routing_stats = model_routing.routing_stats()
+    return [
+        ("pdfsummary_aws_clients_created", "gauge", "boto3 clients created per service",
+         [({"service": service}, counts["created"]) for service, counts in aws_stats.items()]),
+        ("pdfsummary_aws_clients_reused", "gauge", "boto3 client lookups served by an existing client",
+         [({"service": service}, counts["reused"]) for service, counts in aws_stats.items()]),
+        ("pdfsummary_bedrock_limiter", "gauge", "Bedrock rate limiter counters and state",
+         [({"field": field}, value) for field, value in limiter_stats.items()]),
+        ("pdfsummary_model_json_outcomes", "gauge", "Model outputs by parse outcome",
+         [({"outcome": outcome}, repair_stats[outcome]) for outcome in json_repair.OUTCOMES]),
+        ("pdfsummary_endpoint_requests", "gauge", "In-flight and waiting requests per endpoint group",
+         [({"group": group, "field": field}, value)
+          for group, group_stats in executors.limiter_stats().items() for field, value in group_stats.items()]),
+        ("pdfsummary_model_fallback_seconds_left", "gauge", "Seconds a model route stays on its fallback model",
+         [({"route": name}, route_stats["fallback_seconds_left"]) for name, route_stats in routing_stats.items()]),
+        ("pdfsummary_module_import_seconds", "gauge", "Seconds the first import of a lazily loaded module took",
+         [({"module": name}, seconds) for name, seconds in lazy_imports.import_stats().items()]),
+    ]
+
+metrics.registry.register_collector(_service_metrics)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """
+    API endpoint exposing stage timings, counters and histograms in the Prometheus text format
+    
+    Returns:
+        PlainTextResponse: Prometheus exposition text
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/generate_summary")
-def generate_summary(request: S3DeleteRequest):
+async def generate_summary(request: S3DeleteRequest):
     try:
-            bucket_name = request.bucket_name
-            object_key = request.object_key
-            file_name = request.file_name
-            # Extract text from the given pdf path
-            pdf_text = extract_text_from_s3_pdf(bucket_name = bucket_name, object_key = object_key)
-            if pdf_text["is_scanned"] is True:
-                return {"error" : "Current version does not parse scanned documents"}
-            else:
-                # First, classify the document
-                classification_result = get_document_class(pdf_text)
-                doc_class = classification_result.get('class')
-                # Then generate appropriate analysis based on document class
-                analysis_result = get_document_analysis(doc_class, pdf_text)                
-                # Combine classification and analysis results
-                final_response = {
-                    "document_type": classification_result.get('category'),
-                    "analysis": analysis_result
-                }
-                mongo_obj_id = insert_document(final_response)
-                del final_response["_id"]
-                final_response["mongo_obj_id"] = mongo_obj_id
-                final_response = {"result":final_response}
-                #response_text = json.dumps(final_response)
-                return JSONResponse(content=final_response)        
-     
+        async with executors.limit("summary"):
+            response = await run_summary_pipeline_async(
+                bucket_name = request.bucket_name,
+                object_key = request.object_key,
+                file_name = request.file_name
+            )
+        if "error" in response:
+            return response
+        return JSONResponse(content=response)
+
+    except (HTTPException, executors.EndpointBusy):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate_summary/stream")
+async def generate_summary_stream(request: S3DeleteRequest):
+    """
+    API endpoint streaming the summary as server-sent events
+    
+    Args:
+        request (S3DeleteRequest): Request body with bucket name, object key and file name
+    
+    Returns:
+        StreamingResponse: text/event-stream of progress, classification, token, result and error events
+    """
+    events = stream_summary_events(
+        bucket_name = request.bucket_name,
+        object_key = request.object_key,
+        file_name = request.file_name
+    )
+    return StreamingResponse(
+        limited_stream("summary", events, lambda detail: _sse_event("error", {"detail": detail, "status_code": 503})),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate_summary/batch")
+async def generate_summary_batch(request: BatchSummaryRequest):
+    """
+    API endpoint to summarize several PDFs concurrently
+    
+    Args:
+        request (BatchSummaryRequest): List of items with bucket name, object key and file name
+    
+    Returns:
+        StreamingResponse: NDJSON stream with one line per item in completion order,
+                           followed by a batch summary line
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one item")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch has {len(request.items)} items, maximum is {BATCH_MAX_ITEMS}"
+        )
+    return StreamingResponse(
+        limited_stream("batch", stream_batch_summaries(request.items),
+                       lambda detail: json.dumps({"error": detail, "status_code": 503}) + "\n"),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/generate_summary/jobs", status_code=202)
+async def submit_summary_job(request: S3DeleteRequest):
+    """
+    API endpoint to queue a summary job and return immediately
+    
+    Args:
+        request (S3DeleteRequest): Request body with bucket name, object key and file name
+    
+    Returns:
+        dict: Job id and status to poll with /generate_summary/jobs/{job_id}
+    """
+    try:
+        async with executors.limit("jobs"):
+            job = await executors.run_io(
+                job_manager.submit,
+                bucket_name = request.bucket_name,
+                object_key = request.object_key,
+                file_name = request.file_name
+            )
+    except jobs.JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+@app.get("/generate_summary/jobs/{job_id}")
+async def get_summary_job(job_id: str, wait: float = 0):
+    """
+    API endpoint to poll a summary job
+    
+    Args:
+        job_id (str): Job id returned by the submit endpoint
+        wait (float): Seconds to long-poll for completion (capped by JOB_MAX_WAIT_SECONDS)
+    
+    Returns:
+        dict: Job status, plus result or error once finished
+    """
+    # Long polls wait on the I/O pool instead of holding the event loop
+    async with executors.limit("jobs"):
+        job = await executors.run_io(job_manager.get, job_id, wait=wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    job.pop("params", None)
+    return job
+
 # For local development and testing
 if __name__ == "__main__":
     import uvicorn
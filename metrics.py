@@ -0,0 +1,295 @@
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Instrumentation settings. Trace logs print one JSON line per request with its stage timings.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+TRACE_LOGS = os.getenv("TRACE_LOGS", "true").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+TOKEN_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 60000, 100000, 200000)
+BYTE_BUCKETS = (10_000, 100_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 50_000_000)
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """
+    Monotonic counter with a fixed set of label names.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(Counter):
+    """
+    Cumulative-bucket histogram with a fixed set of label names.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", key, (("le", _format_value(bound)),), cumulative))
+                samples.append((f"{self.name}_sum", key, (), total))
+                samples.append((f"{self.name}_count", key, (), cumulative))
+        return samples
+
+
+class Registry:
+    """
+    Holds every metric of the process and renders them in the Prometheus text format.
+    Collectors are callables returning (name, kind, help, [(labels dict, value), ...]) tuples
+    for values owned by other modules, e.g. boto3 client reuse.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, label_names=()):
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(metric.label_names, key, extra)} {_format_value(value)}")
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "pdfsummary_stage_seconds", "Time spent in each pipeline stage", ("stage",)
+)
+stage_errors = registry.counter(
+    "pdfsummary_stage_errors_total", "Pipeline stages that raised an error", ("stage",)
+)
+requests_total = registry.counter(
+    "pdfsummary_requests_total", "HTTP requests by route and status code", ("route", "status_code")
+)
+request_seconds = registry.histogram(
+    "pdfsummary_request_seconds", "HTTP request latency by route", ("route",)
+)
+bytes_total = registry.counter(
+    "pdfsummary_bytes_total", "Bytes moved by operation", ("operation",)
+)
+document_bytes = registry.histogram(
+    "pdfsummary_document_bytes", "Size of processed PDFs", (), BYTE_BUCKETS
+)
+document_pages = registry.histogram(
+    "pdfsummary_document_pages", "Page count of processed PDFs", ("kind",), PAGE_BUCKETS
+)
+documents_total = registry.counter(
+    "pdfsummary_documents_total", "Summarized documents by class and classifier source", ("doc_class", "source")
+)
+analysis_seconds = registry.histogram(
+    "pdfsummary_analysis_seconds", "Analysis latency by document class", ("doc_class",)
+)
+tokens_total = registry.counter(
+    "pdfsummary_bedrock_tokens_total", "Bedrock tokens by stage and direction", ("stage", "direction")
+)
+prompt_tokens = registry.histogram(
+    "pdfsummary_prompt_tokens", "Estimated input tokens per Bedrock call by stage", ("stage",), TOKEN_BUCKETS
+)
+extraction_peak_bytes = registry.histogram(
+    "pdfsummary_extraction_peak_bytes", "Process memory growth while streaming a large PDF", (), BYTE_BUCKETS
+)
+compaction_tokens_saved = registry.histogram(
+    "pdfsummary_compaction_tokens_saved", "Estimated prompt tokens removed by text compaction per document", (), TOKEN_BUCKETS
+)
+model_calls_total = registry.counter(
+    "pdfsummary_model_calls_total", "Bedrock calls by routing stage, model and fallback reason", ("stage", "model_id", "reason")
+)
+
+
+def current_stage() -> str:
+    """
+    Name of the innermost stage running in this context, or "none".
+    """
+    return _current_stage.get() or "none"
+
+
+def annotate(**fields):
+    """
+    Add fields to the trace of the current request, e.g. the document class.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.update(fields)
+
+
+@contextmanager
+def stage(name: str, **fields):
+    """
+    Time a pipeline stage into pdfsummary_stage_seconds and the current request trace.
+
+    Args:
+        name (str): Stage name, e.g. "s3_download"
+        **fields: Extra values recorded with the stage in the trace
+
+    Yields:
+        dict: The trace entry of the stage, callers can add fields such as bytes or pages
+    """
+    entry = {"stage": name, **fields}
+    if not METRICS_ENABLED:
+        yield entry
+        return
+    token = _current_stage.set(name)
+    started = time.perf_counter()
+    try:
+        yield entry
+    except Exception as e:
+        stage_errors.inc(stage=name)
+        entry["error"] = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _current_stage.reset(token)
+        stage_seconds.observe(elapsed, stage=name)
+        entry["ms"] = round(elapsed * 1000, 2)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["stages"].append(entry)
+
+
+@contextmanager
+def request_trace(name: str, request_id: str = None, close: bool = True, **fields):
+    """
+    Collect the stages of one request or job and print them as a single JSON line when it ends.
+
+    Args:
+        name (str): Route or job name
+        request_id (str): Id to log, a new one is generated when missing
+        close (bool): Log the trace when the block ends. With False a block that completes
+                      leaves it open, e.g. for a response body still being streamed, and the
+                      caller logs it with close_trace; a block that raises always logs it
+        **fields: Extra values logged with the trace
+
+    Yields:
+        dict: The trace, stages are appended to trace["stages"]
+    """
+    trace = {"request_id": request_id or uuid.uuid4().hex, "name": name, **fields, "stages": []}
+    # Private start time, removed when the trace is logged
+    trace["_started"] = time.perf_counter()
+    token = _current_trace.set(trace)
+    completed = False
+    try:
+        yield trace
+        completed = True
+    except Exception as e:
+        trace["error"] = str(e)
+        raise
+    finally:
+        _current_trace.reset(token)
+        if close or not completed:
+            close_trace(trace)
+
+
+def close_trace(trace: dict):
+    """
+    Record how long a trace from request_trace was open and print it as one JSON line.
+    """
+    started = trace.pop("_started", None)
+    if started is None:
+        # Already logged
+        return
+    trace["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    if TRACE_LOGS and METRICS_ENABLED:
+        print(json.dumps(trace, default=str))
+
+
+def render() -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+    """
+    return registry.render()
@@ -0,0 +1,338 @@
+import contextvars
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from botocore.exceptions import ReadTimeoutError
+
+import metrics
+
+# Bedrock models. Routes fall back to the fast model while their primary model is over its latency budget.
+BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "us.anthropic.claude-3-5-haiku-20241022-v1:0")
+BEDROCK_FAST_MODEL_ID = os.getenv("BEDROCK_FAST_MODEL_ID", "us.anthropic.claude-3-haiku-20240307-v1:0")
+
+# Latency SLO settings: p90 of the last MODEL_LATENCY_WINDOW primary calls is compared to the budget,
+# and an over-budget route stays on its fallback for MODEL_FALLBACK_COOLDOWN seconds
+MODEL_LATENCY_WINDOW = int(os.getenv("MODEL_LATENCY_WINDOW", "20"))
+MODEL_LATENCY_MIN_SAMPLES = int(os.getenv("MODEL_LATENCY_MIN_SAMPLES", "5"))
+MODEL_FALLBACK_COOLDOWN = float(os.getenv("MODEL_FALLBACK_COOLDOWN", "60"))
+
+# Output token limits per model, without the cross-region prefix of inference profiles.
+# Bedrock rejects requests above them, so max_tokens is clamped to the model that is called.
+# MODEL_OUTPUT_TOKEN_LIMITS adds or overrides entries, e.g. {"anthropic.claude-3-haiku-20240307-v1:0": 4096}
+MODEL_OUTPUT_TOKEN_LIMITS = {
+    "anthropic.claude-3-haiku-20240307-v1:0": 4096,
+    "anthropic.claude-3-5-haiku-20241022-v1:0": 8192,
+    "anthropic.claude-3-5-sonnet-20240620-v1:0": 4096,
+    "anthropic.claude-3-5-sonnet-20241022-v2:0": 8192
+}
+# Shortest system prompt plus instructions that Bedrock caches, per model supporting prompt
+# caching. Models missing here, like claude-3-haiku, get no cache breakpoint.
+PROMPT_CACHE_MIN_TOKENS = {
+    "anthropic.claude-3-5-haiku-20241022-v1:0": 2048,
+    "anthropic.claude-3-7-sonnet-20250219-v1:0": 1024,
+    "anthropic.claude-sonnet-4-20250514-v1:0": 1024,
+    "anthropic.claude-opus-4-20250514-v1:0": 1024
+}
+_INFERENCE_PROFILE_PREFIXES = ("us.", "eu.", "apac.", "global.")
+# Read timeouts are rounded down to this step so the per-timeout client registry stays small,
+# and a timeout retry is only made with at least this much of the deadline left
+TIMEOUT_STEP_SECONDS = 5
+
+# Settings of routes that do not override them. Timeout is the Bedrock read timeout in seconds of
+# calls to model_id, fallback_timeout that of calls to fallback_model_id, and deadline the seconds
+# a call may take including its retry on the fallback model. latency_budget is the p90 in seconds
+# above which the route switches to fallback_model_id.
+DEFAULT_ROUTE = {
+    "model_id": BEDROCK_MODEL_ID,
+    "max_tokens": 4000,
+    "timeout": 120,
+    "fallback_timeout": 60,
+    "deadline": 180,
+    "latency_budget": 30,
+    "fallback_model_id": BEDROCK_FAST_MODEL_ID,
+    "temperature": 0.3
+}
+
+# Routing table keyed by (stage, doc_class), doc_class None matches every class of the stage.
+# Classification answers with three short fields, financial and tax analyses list many values.
+ROUTES = {
+    ("classification", None): {
+        "max_tokens": 300, "timeout": 30, "fallback_timeout": 15, "deadline": 45, "latency_budget": 5, "temperature": 0.0
+    },
+    ("chunk_summary", None): {"max_tokens": 2000, "timeout": 60, "fallback_timeout": 30, "deadline": 90, "latency_budget": 15},
+    ("analysis", None): {"max_tokens": 4000, "timeout": 90, "fallback_timeout": 45, "deadline": 135, "latency_budget": 20},
+    ("analysis", 4): {"max_tokens": 6000, "timeout": 120, "fallback_timeout": 60, "deadline": 180, "latency_budget": 30},
+    ("analysis", 5): {"max_tokens": 8000, "timeout": 180, "fallback_timeout": 90, "deadline": 270, "latency_budget": 45}
+}
+
+_decisions = contextvars.ContextVar("model_routing_decisions", default=None)
+
+
+def _load_output_limit_overrides():
+    raw = os.getenv("MODEL_OUTPUT_TOKEN_LIMITS")
+    if not raw:
+        return
+    try:
+        limits = {model_id: int(limit) for model_id, limit in json.loads(raw).items()}
+    except (ValueError, AttributeError, TypeError) as e:
+        print(f"Ignoring invalid MODEL_OUTPUT_TOKEN_LIMITS: {e}")
+        return
+    MODEL_OUTPUT_TOKEN_LIMITS.update(limits)
+
+
+_load_output_limit_overrides()
+
+
+def _load_route_overrides():
+    """
+    Merge MODEL_ROUTES into the routing table. The variable holds a JSON object keyed by
+    "stage" or "stage:doc_class", e.g. {"analysis:5": {"model_id": "...", "max_tokens": 6000}}.
+    """
+    raw = os.getenv("MODEL_ROUTES")
+    if not raw:
+        return
+    merged = {}
+    try:
+        for name, settings in json.loads(raw).items():
+            stage, _, doc_class = name.partition(":")
+            key = (stage, int(doc_class) if doc_class else None)
+            merged[key] = {**ROUTES.get(key, {}), **settings}
+    except (ValueError, AttributeError, TypeError) as e:
+        print(f"Ignoring invalid MODEL_ROUTES: {e}")
+        return
+    ROUTES.update(merged)
+
+
+_load_route_overrides()
+
+
+def route(stage: str, doc_class: int = None) -> dict:
+    """
+    Settings for a Bedrock call of a pipeline stage.
+
+    Args:
+        stage (str): "classification", "chunk_summary" or "analysis"
+        doc_class (int): Document class of analysis calls
+
+    Returns:
+        dict: Model id, max tokens, timeout, latency budget, fallback model and temperature,
+              plus the stage and doc_class the route was chosen for
+    """
+    settings = dict(DEFAULT_ROUTE)
+    settings.update(ROUTES.get((stage, None), {}))
+    if doc_class is not None:
+        settings.update(ROUTES.get((stage, doc_class), {}))
+    settings["stage"] = stage
+    settings["doc_class"] = doc_class
+    return settings
+
+
+def _model_setting(table: dict, model_id: str):
+    if model_id in table:
+        return table[model_id]
+    for prefix in _INFERENCE_PROFILE_PREFIXES:
+        if model_id.startswith(prefix):
+            return table.get(model_id[len(prefix):])
+    return None
+
+
+def output_token_limit(model_id: str) -> int:
+    """
+    Output token limit of a model or inference profile, None if it is not known.
+    """
+    return _model_setting(MODEL_OUTPUT_TOKEN_LIMITS, model_id)
+
+
+def prompt_cache_min_tokens(model_id: str) -> int:
+    """
+    Minimum cacheable prompt prefix of a model or inference profile, None if it does not support prompt caching.
+    """
+    return _model_setting(PROMPT_CACHE_MIN_TOKENS, model_id)
+
+
+def clamp_max_tokens(model_id: str, max_tokens: int) -> int:
+    """
+    max_tokens lowered to the output limit of the model that is called, e.g. the 8000
+    tokens of financial analyses to the 4096 of the fast fallback model.
+    """
+    limit = output_token_limit(model_id)
+    return min(max_tokens, limit) if limit else max_tokens
+
+
+def call_timeout(route: dict, model_id: str) -> int:
+    """
+    Read timeout of a call of the route on a model, its own for the fallback model.
+    """
+    return route["timeout"] if model_id == route["model_id"] else route["fallback_timeout"]
+
+
+def _round_timeout(seconds: float) -> int:
+    return int(seconds // TIMEOUT_STEP_SECONDS * TIMEOUT_STEP_SECONDS)
+
+
+def routes_fingerprint() -> str:
+    """
+    Stable description of the routing table, part of the result cache key so that
+    changing a model or an output budget never serves results of the old routes.
+    """
+    table = {f"{stage}:{'' if doc_class is None else doc_class}": settings for (stage, doc_class), settings in ROUTES.items()}
+    digest = hashlib.sha256(json.dumps([DEFAULT_ROUTE, table, MODEL_OUTPUT_TOKEN_LIMITS], sort_keys=True).encode()).hexdigest()
+    return f"{BEDROCK_MODEL_ID}:{digest[:16]}"
+
+
+class LatencyTracker:
+    """
+    Keeps the recent latencies of each route's primary model and opens a fallback
+    window when their p90 exceeds the route's latency budget or a call timed out.
+    """
+
+    def __init__(self, window, min_samples, cooldown):
+        self.window = window
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self._latencies = {}
+        self._fallback_until = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(route):
+        return route["stage"], route["doc_class"]
+
+    def use_fallback(self, route) -> bool:
+        """
+        Whether calls of the route currently go to its fallback model.
+        """
+        if not route.get("fallback_model_id") or route["fallback_model_id"] == route["model_id"]:
+            return False
+        with self._lock:
+            return self._fallback_until.get(self._key(route), 0) > time.monotonic()
+
+    def observe(self, route, model_id, seconds, timed_out=False):
+        key = self._key(route)
+        with self._lock:
+            calls = self._calls.setdefault(key, {})
+            calls[model_id] = calls.get(model_id, 0) + 1
+            if model_id != route["model_id"]:
+                return
+            latencies = self._latencies.setdefault(key, deque(maxlen=self.window))
+            latencies.append(seconds)
+            over_budget = len(latencies) >= self.min_samples and _p90(latencies) > route["latency_budget"]
+            if timed_out or over_budget:
+                self._fallback_until[key] = time.monotonic() + self.cooldown
+                # Start the next primary window from scratch so one slow burst does not keep it open
+                latencies.clear()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                f"{stage}:{'' if doc_class is None else doc_class}": {
+                    "calls": dict(self._calls.get((stage, doc_class), {})),
+                    "primary_p90_seconds": _p90(self._latencies.get((stage, doc_class), ())),
+                    "fallback_seconds_left": max(0.0, self._fallback_until.get((stage, doc_class), 0) - now)
+                }
+                for stage, doc_class in set(self._calls) | set(self._fallback_until)
+            }
+
+
+def _p90(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+
+latency_tracker = LatencyTracker(MODEL_LATENCY_WINDOW, MODEL_LATENCY_MIN_SAMPLES, MODEL_FALLBACK_COOLDOWN)
+
+
+def choose_model(route: dict) -> tuple:
+    """
+    Model for the next call of a route.
+
+    Returns:
+        tuple: (model id, reason) where reason is None for the primary model
+               and "latency_budget" while the route is on its fallback
+    """
+    if latency_tracker.use_fallback(route):
+        return route["fallback_model_id"], "latency_budget"
+    return route["model_id"], None
+
+
+def record_decision(route: dict, model_id: str, reason: str, seconds: float, timed_out: bool = False):
+    """
+    Feed a finished call into the latency tracker and the routing decisions of the current request.
+    """
+    max_tokens = clamp_max_tokens(model_id, route["max_tokens"])
+    latency_tracker.observe(route, model_id, seconds, timed_out=timed_out)
+    metrics.model_calls_total.inc(stage=route["stage"], model_id=model_id, reason=reason or "primary")
+    decisions = _decisions.get()
+    if decisions is not None:
+        decisions.append({
+            "stage": route["stage"],
+            "doc_class": route["doc_class"],
+            "model_id": model_id,
+            "max_tokens": max_tokens,
+            "fallback_reason": reason,
+            "latency_ms": round(seconds * 1000, 2)
+        })
+
+
+def invoke(route: dict, call):
+    """
+    Run call(model_id, timeout) on the routed model. A primary call that hits its timeout
+    opens the fallback window and is retried once on the fallback model, with the fallback
+    timeout capped to what is left of the route deadline. The caller clamps max_tokens to
+    the model with clamp_max_tokens.
+
+    Args:
+        route (dict): Route from route()
+        call (callable): Performs the Bedrock call for a model id and a read timeout in seconds
+
+    Returns:
+        Whatever call returns
+    """
+    model_id, reason = choose_model(route)
+    call_started = time.perf_counter()
+    started = call_started
+    try:
+        result = call(model_id, call_timeout(route, model_id))
+    except ReadTimeoutError:
+        record_decision(route, model_id, reason, time.perf_counter() - started, timed_out=True)
+        if reason is not None or not latency_tracker.use_fallback(route):
+            raise
+        remaining = route["deadline"] - (time.perf_counter() - call_started)
+        timeout = _round_timeout(min(route["fallback_timeout"], remaining))
+        if timeout < TIMEOUT_STEP_SECONDS:
+            raise
+        print(f"{model_id} timed out after {call_timeout(route, model_id)}s, retrying on {route['fallback_model_id']} with {timeout}s")
+        model_id, reason = route["fallback_model_id"], "timeout"
+        started = time.perf_counter()
+        result = call(model_id, timeout)
+    record_decision(route, model_id, reason, time.perf_counter() - started)
+    return result
+
+
+def track_decisions() -> list:
+    """
+    Start collecting the routing decisions of the current request or job.
+    Calls made on other threads from a copy of this context append to the same list.
+
+    Returns:
+        list: Decisions appended as Bedrock calls finish
+    """
+    decisions = []
+    _decisions.set(decisions)
+    return decisions
+
+
+def routing_stats() -> dict:
+    """
+    Calls per model, primary p90 and remaining fallback time per route.
+    """
+    return latency_tracker.stats()
@@ -1,36 +1,320 @@
-from pymongo import MongoClient
-from urllib.parse import quote_plus
+from bson import ObjectId, json_util
 from dotenv import load_dotenv
 import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import lazy_imports
+import metrics
+
+# pymongo is imported when the first client is created, see lazy_imports
+pymongo = lazy_imports.lazy("pymongo")
+pymongo_errors = lazy_imports.lazy("pymongo.errors")
 
 load_dotenv()
 
 # MongoDB connection URI
 uri = os.getenv("mongo_db")
+DATABASE_NAME = 'doc_parsing_test'
+
+# Connection pool and write-behind settings
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_WRITE_BEHIND = os.getenv("MONGO_WRITE_BEHIND", "false").lower() == "true"
+MONGO_WRITE_BATCH_SIZE = int(os.getenv("MONGO_WRITE_BATCH_SIZE", "50"))
+MONGO_WRITE_FLUSH_SECONDS = float(os.getenv("MONGO_WRITE_FLUSH_SECONDS", "0.5"))
+MONGO_SPILL_PATH = os.getenv("MONGO_SPILL_PATH", "mongo_spill.jsonl")
+
+_client = None
+_client_lock = threading.Lock()
+_write_buffer = None
+_cache_index_ready = False
+_jobs_index_ready = False
+
+
+def get_client():
+    """
+    Returns the process-wide MongoClient, creating it on first use.
+    The client keeps its own connection pool, so it is shared by every request.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = pymongo.MongoClient(uri, maxPoolSize=MONGO_MAX_POOL_SIZE)
+        return _client
+
+
+def has_client():
+    """
+    Whether the MongoClient already exists, created by get_client or set up by a test.
+    """
+    return _client is not None
+
+
+def get_database():
+    return get_client()[DATABASE_NAME]
+
+
+class WriteBehindBuffer:
+    """
+    Buffers documents in memory and writes them with insert_many from a background thread.
+    A batch is flushed when it reaches batch_size documents or when its oldest document
+    has waited flush_seconds. Batches that cannot be written are appended to spill_path.
+    Callbacks given with a document run on the background thread once it was written.
+    """
+
+    def __init__(self, collection_name, batch_size, flush_seconds, spill_path):
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.spill_path = spill_path
+        self._pending = []
+        self._oldest = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="mongo-write-behind", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def add(self, document, on_written=None):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((document, on_written))
+            # The first document starts the flush timer, a full batch is written right away
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def _take_batch(self):
+        batch, self._pending, self._oldest = self._pending, [], None
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if len(self._pending) >= self.batch_size:
+                        break
+                    if self._pending:
+                        remaining = self._oldest + self.flush_seconds - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(timeout=remaining)
+                    else:
+                        self._condition.wait()
+                batch = self._take_batch()
+                closed = self._closed
+            if batch:
+                self._write(batch)
+            if closed:
+                return
+
+    def _write(self, batch):
+        documents = [document for document, _ in batch]
+        try:
+            with metrics.stage("mongo_flush", documents=len(documents)):
+                get_database()[self.collection_name].insert_many(documents, ordered=False)
+        except Exception as e:
+            print(f"Error writing batch of {len(documents)} documents, spilling to {self.spill_path}: {e}")
+            self._spill(documents)
+            return
+        for document, on_written in batch:
+            if on_written is not None:
+                _notify_written(on_written, document)
+
+    def _spill(self, batch):
+        with open(self.spill_path, 'a') as spill_file:
+            for document in batch:
+                spill_file.write(json_util.dumps(document) + "\n")
+
+    def close(self):
+        """
+        Stops accepting documents and flushes everything still pending.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+
+def start_write_behind():
+    """
+    Starts the write-behind buffer for analysis results when MONGO_WRITE_BEHIND is enabled
+    and replays documents spilled by a previous shutdown.
+    """
+    global _write_buffer
+    replay_spilled_documents()
+    if MONGO_WRITE_BEHIND and _write_buffer is None:
+        _write_buffer = WriteBehindBuffer(
+            'docs', MONGO_WRITE_BATCH_SIZE, MONGO_WRITE_FLUSH_SECONDS, MONGO_SPILL_PATH
+        )
+        _write_buffer.start()
+
+
+def replay_spilled_documents():
+    """
+    Inserts documents left in MONGO_SPILL_PATH. Already inserted ids are skipped.
+    """
+    if not os.path.exists(MONGO_SPILL_PATH):
+        return
+    try:
+        with open(MONGO_SPILL_PATH) as spill_file:
+            documents = [json_util.loads(line) for line in spill_file if line.strip()]
+        if documents:
+            try:
+                get_database()['docs'].insert_many(documents, ordered=False)
+            except pymongo_errors.BulkWriteError as e:
+                # Duplicate key errors mean the document was written before the spill
+                if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                    raise
+        os.remove(MONGO_SPILL_PATH)
+        print(f"Replayed {len(documents)} spilled documents")
+    except Exception as e:
+        print(f"Error replaying spilled documents: {e}")
+
+
+def close_client():
+    """
+    Flushes the write-behind buffer and closes the shared client.
+    """
+    global _client, _write_buffer
+    if _write_buffer is not None:
+        _write_buffer.close()
+        _write_buffer = None
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
 
-def insert_document(document):
-    try:
-        null = None
-        true = True
-        false = False
-        # Create MongoDB client
-        client = MongoClient(uri)
-        
-        # Test the connection
-        # This will raise an exception if connection fails
-        client.admin.command('ping')
-        print("Successfully connected to MongoDB!")
-        
-        # Get database reference (replace 'your_database_name' with actual database name)
-        db = client['doc_parsing_test']
-        collection_docs = db['docs']
-        result = collection_docs.insert_one(document)
-        # print(dir(result))
-        #print(f"Inserted document ID: {result.inserted_id}")
-        return str(result.inserted_id)
+
+def _notify_written(on_written, document):
+    try:
+        on_written(str(document["_id"]))
+    except Exception as e:
+        print(f"Error after writing document {document['_id']}: {e}")
+
+def insert_document(document, on_written=None):
+    """
+    Insert one analysis result. With the write-behind buffer the returned id is that of a
+    document not written yet; on_written(id) is called once it is actually in Mongo, right
+    after the insert without the buffer, and never if the write fails.
+    """
+    try:
+        # The id is generated client-side so it is known even when the write is deferred
+        document.setdefault("_id", ObjectId())
+        if _write_buffer is not None:
+            _write_buffer.add(dict(document), on_written)
+            return str(document["_id"])
+
+        with metrics.stage("mongo_insert"):
+            collection_docs = get_database()['docs']
+            result = collection_docs.insert_one(document)
     except Exception as e:
         print(f"Error inserting document: {e}")
-    finally:
-        # Close the connection
-        if 'client' in locals():
-            client.close()
+        return None
+    if on_written is not None:
+        _notify_written(on_written, document)
+    return str(result.inserted_id)
+
+def insert_documents(documents, on_written=None):
+    """
+    Insert several analysis results, see insert_document. on_written(id) is called for
+    every document once it was written.
+    """
+    try:
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        if _write_buffer is not None:
+            for document in documents:
+                _write_buffer.add(dict(document), on_written)
+            return [str(document["_id"]) for document in documents]
+
+        with metrics.stage("mongo_insert_many", documents=len(documents)):
+            collection_docs = get_database()['docs']
+            result = collection_docs.insert_many(documents, ordered=False)
+    except Exception as e:
+        print(f"Error inserting documents: {e}")
+        return None
+    if on_written is not None:
+        for document in documents:
+            _notify_written(on_written, document)
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+def get_cached_result(cache_key):
+    try:
+        with metrics.stage("mongo_cache_get"):
+            collection_cache = get_database()['summary_cache']
+            cached = collection_cache.find_one({"_id": cache_key})
+        if cached is None:
+            return None
+        return cached["result"]
+    except Exception as e:
+        print(f"Error reading cached result: {e}")
+        return None
+
+def store_cached_result(cache_key, result, ttl_seconds):
+    global _cache_index_ready
+    try:
+        collection_cache = get_database()['summary_cache']
+        # Mongo's TTL monitor evicts entries once created_at is older than ttl_seconds
+        if not _cache_index_ready:
+            try:
+                collection_cache.create_index("created_at", expireAfterSeconds=ttl_seconds)
+                _cache_index_ready = True
+            except Exception as e:
+                print(f"Could not ensure cache TTL index: {e}")
+        with metrics.stage("mongo_cache_put"):
+            collection_cache.replace_one(
+                {"_id": cache_key},
+                {"_id": cache_key, "result": result, "created_at": datetime.now(timezone.utc)},
+                upsert=True
+            )
+    except Exception as e:
+        print(f"Error storing cached result: {e}")
+
+def save_job(job, ttl_seconds):
+    global _jobs_index_ready
+    try:
+        collection_jobs = get_database()['jobs']
+        # Mongo's TTL monitor removes finished jobs once finished_time is older than ttl_seconds,
+        # queued and running jobs have no finished_time and are kept
+        if not _jobs_index_ready:
+            try:
+                collection_jobs.create_index("finished_time", expireAfterSeconds=ttl_seconds)
+                _jobs_index_ready = True
+            except Exception as e:
+                print(f"Could not ensure jobs TTL index: {e}")
+        document = {"_id": job["job_id"], **job}
+        if job.get("finished_at"):
+            document["finished_time"] = datetime.fromisoformat(job["finished_at"])
+        collection_jobs.replace_one({"_id": job["job_id"]}, document, upsert=True)
+    except Exception as e:
+        print(f"Error saving job: {e}")
+
+def load_job(job_id):
+    try:
+        collection_jobs = get_database()['jobs']
+        job = collection_jobs.find_one({"_id": job_id}, {"_id": 0, "finished_time": 0})
+        return job
+    except Exception as e:
+        print(f"Error loading job: {e}")
+        return None
+
+def save_classifier_sample(sample):
+    try:
+        collection_samples = get_database()['classifier_samples']
+        collection_samples.insert_one({**sample, "created_at": datetime.now(timezone.utc)})
+    except Exception as e:
+        print(f"Error saving classifier sample: {e}")
+
+def load_classifier_samples(limit=2000):
+    try:
+        collection_samples = get_database()['classifier_samples']
+        cursor = collection_samples.find({}, {"_id": 0, "text": 1, "class": 1}).sort("created_at", -1).limit(limit)
+        return list(cursor)
+    except Exception as e:
+        print(f"Error loading classifier samples: {e}")
+        return []
@@ -0,0 +1,182 @@
+import io
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import lazy_imports
+
+# Rendering and OCR libraries are imported on first use, see lazy_imports
+pdfium = lazy_imports.lazy("pypdfium2")
+pytesseract = lazy_imports.lazy("pytesseract")
+
+# OCR settings. Pages are rendered so their width is close to OCR_TARGET_WIDTH_PX,
+# clamped between OCR_MIN_DPI and OCR_MAX_DPI.
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() == "true"
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+OCR_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "60"))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_TARGET_WIDTH_PX = int(os.getenv("OCR_TARGET_WIDTH_PX", "2480"))
+OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI", "150"))
+OCR_MAX_DPI = int(os.getenv("OCR_MAX_DPI", "300"))
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+# pdfium is not thread-safe, calls from request threads in this process are serialized
+_pdfium_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """
+    Returns the shared OCR process pool, creating it on first use.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # pdfium does not survive a fork once it was initialized in the parent, so workers are spawned
+            _process_pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """
+    Shuts down the shared OCR process pool if it was started.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True, cancel_futures=True)
+            _process_pool = None
+
+
+def adaptive_dpi(width_pt: float) -> int:
+    """
+    Pick the render DPI for a page: small pages such as ID cards get more DPI,
+    large pages less, so tesseract sees text at a similar pixel size.
+
+    Args:
+        width_pt (float): Page width in PDF points (1/72 inch)
+
+    Returns:
+        int: Render DPI
+    """
+    if width_pt <= 0:
+        return OCR_MAX_DPI
+    dpi = OCR_TARGET_WIDTH_PX / (width_pt / 72)
+    return int(max(OCR_MIN_DPI, min(OCR_MAX_DPI, dpi)))
+
+
+def _split_pages(pdf_bytes):
+    """
+    Split a PDF into single-page PDFs so each OCR task only ships its own page to the worker.
+    """
+    with _pdfium_lock:
+        return _split_pages_locked(pdf_bytes)
+
+
+def _split_pages_locked(pdf_bytes):
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        single_pages = []
+        for index in range(len(pdf)):
+            page_pdf = pdfium.PdfDocument.new()
+            page_pdf.import_pages(pdf, [index])
+            buffer = io.BytesIO()
+            page_pdf.save(buffer)
+            page_pdf.close()
+            single_pages.append(buffer.getvalue())
+        return single_pages
+    finally:
+        pdf.close()
+
+
+def _lines_from_data(data):
+    """
+    Rebuild line-broken text and word confidences from pytesseract.image_to_data output.
+    """
+    lines = {}
+    confidences = []
+    for index, word in enumerate(data["text"]):
+        confidence = float(data["conf"][index])
+        if confidence < 0 or not word.strip():
+            continue
+        line_key = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+        lines.setdefault(line_key, []).append(word)
+        confidences.append(confidence)
+    text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+    return text, confidences
+
+
+def _ocr_page(page_pdf_bytes, page_number):
+    """
+    Worker entry point: render one single-page PDF and run tesseract on it.
+    """
+    # One tesseract thread per page, parallelism comes from the process pool
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    pdf = pdfium.PdfDocument(page_pdf_bytes)
+    try:
+        page = pdf[0]
+        width_pt, _ = page.get_size()
+        dpi = adaptive_dpi(width_pt)
+        image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+    finally:
+        pdf.close()
+
+    try:
+        data = pytesseract.image_to_data(
+            image, lang=OCR_LANG, output_type=pytesseract.Output.DICT, timeout=OCR_PAGE_TIMEOUT
+        )
+    except Exception as e:
+        # Timeouts (tesseract is killed) and tesseract errors only fail this page.
+        # pytesseract's exceptions do not unpickle in the parent, so return the message instead
+        return {"page_number": page_number, "text": "", "confidence": 0.0, "dpi": dpi, "error": str(e)}
+
+    text, confidences = _lines_from_data(data)
+    confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+    return {"page_number": page_number, "text": text, "confidence": round(confidence, 4), "dpi": dpi, "error": None}
+
+
+def ocr_pdf(pdf_bytes: bytes) -> dict:
+    """
+    OCR every page of a scanned PDF across the OCR process pool.
+
+    Args:
+        pdf_bytes (bytes): PDF content
+
+    Returns:
+        dict: {
+            "text": text of all pages joined with newlines,
+            "page_count": number of pages,
+            "mean_confidence": average page confidence between 0 and 1,
+            "pages": [{"page_number", "text", "confidence", "dpi", "error"}, ...]
+        }
+    """
+    pool = _get_process_pool()
+    futures = [
+        pool.submit(_ocr_page, page_pdf_bytes, index + 1)
+        for index, page_pdf_bytes in enumerate(_split_pages(pdf_bytes))
+    ]
+
+    # Pages queue behind each other, so the deadline allows one timeout per round of workers
+    rounds = math.ceil(len(futures) / max(1, OCR_WORKERS))
+    deadline = time.monotonic() + OCR_PAGE_TIMEOUT * (rounds + 1)
+
+    pages = []
+    for index, future in enumerate(futures):
+        try:
+            pages.append(future.result(timeout=max(0, deadline - time.monotonic())))
+        except FutureTimeoutError:
+            future.cancel()
+            pages.append({"page_number": index + 1, "text": "", "confidence": 0.0, "dpi": None, "error": "timeout"})
+
+    recognized = [page["confidence"] for page in pages if page["text"]]
+    return {
+        "text": "\n".join(page["text"] for page in pages).strip(),
+        "page_count": len(pages),
+        "mean_confidence": round(sum(recognized) / len(recognized), 4) if recognized else 0.0,
+        "pages": pages
+    }
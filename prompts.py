@@ -1,6 +1,11 @@
 from datetime import datetime
+import functools
 today = datetime.today().strftime('%Y-%m-%d')
 
+# Bump when prompt wording or layout changes, it is part of the result cache fingerprint.
+# The Bedrock prompt cache is keyed on the prompt text itself and needs no version.
+PROMPT_VERSION = "3"
+
 
 #####
     # - There are 6 total types of Documents in total so we will write system prompt for them
@@ -35,23 +40,34 @@ system_prompt_for_financial_doc = """You are an expert financial analyst with ex
             Your task is to perform a comprehensive analysis of financial documents, provide structured JSON output. 
             Do not include any extra text in the begining and at the end of the JSON. Strictly follow the JSON format provided"""
 
+# system prompt for summarizing one part of a long document (map step of map-reduce analysis)
+system_prompt_for_chunk_summary = """You are a specialized AI assistant focused on extracting facts from one part of a longer document.
+            Keep every name, number, date, address, identifier, amount and currency exactly as written.
+            provide structured JSON output. Do not include any extra text in the begining and at the end.
+            """
+
 ######________________________________User prompts____________________________________#######
 
+# User prompts are laid out as static instructions first and the document last, so the
+# system prompt plus instructions form a prefix that stays identical across requests and
+# can be served from Bedrock's prompt cache. The instructions_* functions are memoized.
 
+def document_block(pdf_text):
+    return f"DOCUMENT TEXT:\n{pdf_text}\n"
 
 
-# user_prompt_for_document_classification
-def user_prompt_classification (pdf_text):
-    user_prompt_for_classification = f"""Perform a classification analysis of the following document:
 
-        DOCUMENT TEXT:
-        {pdf_text}
+
+# user_prompt_for_document_classification
+@functools.lru_cache(maxsize=None)
+def instructions_classification():
+    instructions_for_classification = """Perform a classification analysis of the document given after these instructions:
 
         CLASSIFICATION ANALYSIS REQUIREMENTS:
         1. Parse the whole document and extract details in order to classify the document in the following categories
             - Proof of Identity Document : Documents like passport, class : 0
             - Proof of Address Document : Documents like  class:1
-            - Business Regostration Document : class:2
+            - Business Registration Document : class:2
             - Ownership Documents : class:3
             - Tax Return Document : class:4
             - Financial Document : class:5
@@ -59,22 +75,23 @@ def user_prompt_classification (pdf_text):
 
 
         Respond in the following structured JSON format:
-        {{
+        {
             "category":<one of the category mentioned in the above list>,
             "class": class_of_category,
             "confidence_score":<average_probability_score>
-            }}
+            }
 
     """
-    return user_prompt_for_classification
+    return instructions_for_classification
 
-# user_prompt_for_indentity_doc
-def user_prompt_poi(pdf_text,today = today):
+def user_prompt_classification (pdf_text):
+    return f"{instructions_classification()}\n{document_block(pdf_text)}"
 
-    user_prompt_for_poi_doc = f"""Perform a comprehensive analysis of the following proof of identity document:
+# user_prompt_for_indentity_doc
+@functools.lru_cache(maxsize=None)
+def instructions_poi(today = today):
 
-        DOCUMENT TEXT:
-        {pdf_text}
+    instructions_for_poi_doc = f"""Perform a comprehensive analysis of the proof of identity document given after these instructions:
 
         COMPREHENSIVE ANALYSIS REQUIREMENTS:
         1. Identify key identity verification metrics and their significance
@@ -137,15 +154,16 @@ def user_prompt_poi(pdf_text,today = today):
             }}
         }}
         """
-    return user_prompt_for_poi_doc
+    return instructions_for_poi_doc
 
-# user_prompt_for_poa_doc
-def user_prompt_poa(pdf_text,today = today):
+def user_prompt_poi(pdf_text,today = today):
+    return f"{instructions_poi(today)}\n{document_block(pdf_text)}"
 
-    user_prompt_for_poa_doc = f"""Perform a comprehensive analysis of the following identity document:
+# user_prompt_for_poa_doc
+@functools.lru_cache(maxsize=None)
+def instructions_poa(today = today):
 
-        DOCUMENT TEXT:
-        {pdf_text}
+    instructions_for_poa_doc = f"""Perform a comprehensive analysis of the identity document given after these instructions:
 
         COMPREHENSIVE ANALYSIS REQUIREMENTS:
         1. Identify key identity verification metrics and their significance
@@ -207,15 +225,16 @@ def user_prompt_poa(pdf_text,today = today):
             }}
         }}
         """
-    return user_prompt_for_poa_doc
+    return instructions_for_poa_doc
 
-# user_prompt_for_registration_doc
-def user_prompt_registration(pdf_text,today = today):
+def user_prompt_poa(pdf_text,today = today):
+    return f"{instructions_poa(today)}\n{document_block(pdf_text)}"
 
-    user_prompt_for_registration_doc = f"""Perform a comprehensive analysis of the following registration document:
+# user_prompt_for_registration_doc
+@functools.lru_cache(maxsize=None)
+def instructions_registration(today = today):
 
-        DOCUMENT TEXT:
-        {pdf_text}
+    instructions_for_registration_doc = f"""Perform a comprehensive analysis of the registration document given after these instructions:
 
         COMPREHENSIVE ANALYSIS REQUIREMENTS:
         1. Identify key registration metrics and their significance
@@ -290,15 +309,16 @@ def user_prompt_registration(pdf_text,today = today):
             }}
         }}
         """
-    return user_prompt_for_registration_doc
+    return instructions_for_registration_doc
 
-# user_prompt_for_ownership_doc
-def user_prompt_ownership(pdf_text,today = today):
+def user_prompt_registration(pdf_text,today = today):
+    return f"{instructions_registration(today)}\n{document_block(pdf_text)}"
 
-    user_prompt_for_ownership_doc = f"""Perform a comprehensive analysis of the following ownership structure document:
+# user_prompt_for_ownership_doc
+@functools.lru_cache(maxsize=None)
+def instructions_ownership(today = today):
 
-        DOCUMENT TEXT:
-        {pdf_text}
+    instructions_for_ownership_doc = f"""Perform a comprehensive analysis of the ownership structure document given after these instructions:
 
         COMPREHENSIVE ANALYSIS REQUIREMENTS:
         1. Identify key ownership metrics and their significance
@@ -385,15 +405,16 @@ def user_prompt_ownership(pdf_text,today = today):
             }}
         }}
         """
-    return user_prompt_for_ownership_doc
+    return instructions_for_ownership_doc
 
-# user_prompt_for_tax_return_doc
-def user_prompt_tax_return(pdf_text,today = today):
+def user_prompt_ownership(pdf_text,today = today):
+    return f"{instructions_ownership(today)}\n{document_block(pdf_text)}"
 
-    user_prompt_for_tax_return_doc = f"""Perform a comprehensive analysis of the following tax return document:
+# user_prompt_for_tax_return_doc
+@functools.lru_cache(maxsize=None)
+def instructions_tax_return(today = today):
 
-        DOCUMENT TEXT:
-        {pdf_text}
+    instructions_for_tax_return_doc = f"""Perform a comprehensive analysis of the tax return document given after these instructions:
 
         COMPREHENSIVE ANALYSIS REQUIREMENTS:
         1. Identify key tax metrics and their significance
@@ -454,15 +475,16 @@ def user_prompt_tax_return(pdf_text,today = today):
             }}
         }}
         """
-    return user_prompt_for_tax_return_doc
+    return instructions_for_tax_return_doc
 
-# user_prompt_for_financial_doc
-def user_prompt_financial(pdf_text,today = today):
+def user_prompt_tax_return(pdf_text,today = today):
+    return f"{instructions_tax_return(today)}\n{document_block(pdf_text)}"
 
-    user_prompt_for_financial_doc = f"""Perform a comprehensive analysis of the following financial document:
+# user_prompt_for_financial_doc
+@functools.lru_cache(maxsize=None)
+def instructions_financial(today = today):
 
-        DOCUMENT TEXT:
-        {pdf_text}
+    instructions_for_financial_doc = f"""Perform a comprehensive analysis of the financial document given after these instructions:
 
         COMPREHENSIVE ANALYSIS REQUIREMENTS:
         1. Identify key financial metrics and their significance
@@ -519,4 +541,34 @@ def user_prompt_financial(pdf_text,today = today):
             }}
         }}
         """
-    return user_prompt_for_financial_doc
+    return instructions_for_financial_doc
+
+def user_prompt_financial(pdf_text,today = today):
+    return f"{instructions_financial(today)}\n{document_block(pdf_text)}"
+
+# user_prompt_for_chunk_summary
+@functools.lru_cache(maxsize=None)
+def instructions_chunk_summary():
+
+    instructions_for_chunk_summary = """Extract the facts from the part of a longer document given after these instructions:
+
+        EXTRACTION REQUIREMENTS:
+        1. List every fact that could matter for compliance analysis of the whole document
+        2. Copy names, identifiers, dates, addresses, amounts and currencies exactly as written
+        3. Note anything that looks inconsistent, missing or suspicious
+        4. Do not summarize away figures, keep totals and balances
+
+        Respond in the following structured JSON format:
+        {
+            "facts": ["Fact 1", "Fact 2"],
+            "key_values": {"field_name": "value as written"},
+            "concerns": ["Concern 1", "Concern 2"]
+        }
+        """
+    return instructions_for_chunk_summary
+
+def user_prompt_chunk_summary(pdf_text, part = 1, total = 1):
+    return f"{instructions_chunk_summary()}\n{document_block(chunk_text(pdf_text, part, total))}"
+
+def chunk_text(pdf_text, part, total):
+    return f"PART {part} OF {total}\n{pdf_text}"
@@ -0,0 +1,213 @@
+import os
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+# Bedrock quota settings. Requests and tokens are budgeted per minute for the whole process.
+BEDROCK_RPM = int(os.getenv("BEDROCK_RPM", "200"))
+BEDROCK_TPM = int(os.getenv("BEDROCK_TPM", "400000"))
+# Concurrency starts at BEDROCK_INITIAL_CONCURRENCY, grows by one per window of successes
+# and halves on every throttling error
+BEDROCK_MAX_CONCURRENCY = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+BEDROCK_MIN_CONCURRENCY = int(os.getenv("BEDROCK_MIN_CONCURRENCY", "1"))
+BEDROCK_INITIAL_CONCURRENCY = int(os.getenv("BEDROCK_INITIAL_CONCURRENCY", "4"))
+# How long a caller may wait in the queue and retry throttled calls before giving up
+BEDROCK_QUEUE_TIMEOUT = float(os.getenv("BEDROCK_QUEUE_TIMEOUT", "120"))
+BEDROCK_MAX_RETRIES = int(os.getenv("BEDROCK_MAX_RETRIES", "5"))
+BEDROCK_BACKOFF_BASE = float(os.getenv("BEDROCK_BACKOFF_BASE", "0.5"))
+BEDROCK_BACKOFF_MAX = float(os.getenv("BEDROCK_BACKOFF_MAX", "20"))
+
+THROTTLING_ERROR_CODES = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException"
+)
+
+
+class RateLimitTimeout(Exception):
+    """
+    Raised when a call could not be admitted or completed before its deadline.
+    """
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    True if the error is a Bedrock throttling or capacity error that is worth retrying.
+    """
+    if not isinstance(error, ClientError):
+        return False
+    return error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+class TokenBucket:
+    """
+    Continuously refilled budget of `per_minute` units. Not thread-safe, the limiter holds its lock.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """
+        Seconds until `amount` units are available. Requests above the capacity only need a full bucket.
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.available -= amount
+
+    def give_back(self, amount):
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+
+class AdaptiveLimiter:
+    """
+    Admits calls within a requests-per-minute and tokens-per-minute budget and an
+    AIMD concurrency limit. Callers wait in line until they are admitted or their deadline passes.
+    """
+
+    def __init__(self, rpm=BEDROCK_RPM, tpm=BEDROCK_TPM, initial_concurrency=BEDROCK_INITIAL_CONCURRENCY,
+                 min_concurrency=BEDROCK_MIN_CONCURRENCY, max_concurrency=BEDROCK_MAX_CONCURRENCY):
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max(min_concurrency, min(initial_concurrency, max_concurrency)))
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._stats = {"admitted": 0, "throttled": 0, "retried": 0, "timed_out": 0, "waiting": 0}
+
+    def acquire(self, estimated_tokens, deadline):
+        """
+        Block until the call fits the concurrency limit and both budgets.
+
+        Args:
+            estimated_tokens (int): Estimated input plus output tokens of the call
+            deadline (float): time.monotonic() value after which the caller gives up
+
+        Raises:
+            RateLimitTimeout: If the call was not admitted before the deadline
+        """
+        with self._condition:
+            self._stats["waiting"] += 1
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timed_out"] += 1
+                        raise RateLimitTimeout("Timed out waiting for Bedrock capacity")
+                    if self.in_flight < int(self.concurrency):
+                        budget_wait = max(self._requests.wait_time(1), self._tokens.wait_time(estimated_tokens))
+                        if budget_wait == 0:
+                            self._requests.take(1)
+                            self._tokens.take(estimated_tokens)
+                            self.in_flight += 1
+                            self._stats["admitted"] += 1
+                            return
+                        self._condition.wait(timeout=min(remaining, budget_wait))
+                    else:
+                        self._condition.wait(timeout=remaining)
+            finally:
+                self._stats["waiting"] -= 1
+
+    def release(self, estimated_tokens=0, actual_tokens=None, throttled=False):
+        """
+        Finish a call admitted by acquire and adjust the concurrency limit.
+
+        Args:
+            estimated_tokens (int): Tokens charged by acquire
+            actual_tokens (int): Tokens reported by the model, used to correct the token budget
+            throttled (bool): True if the call failed with a throttling error
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                # Multiplicative decrease
+                self._stats["throttled"] += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            else:
+                # Additive increase, roughly +1 after a full window of successful calls
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            if actual_tokens is not None:
+                if actual_tokens < estimated_tokens:
+                    self._tokens.give_back(estimated_tokens - actual_tokens)
+                else:
+                    self._tokens.take(actual_tokens - estimated_tokens)
+            self._condition.notify_all()
+
+    def call(self, function, estimated_tokens, timeout=BEDROCK_QUEUE_TIMEOUT, max_retries=BEDROCK_MAX_RETRIES,
+             hold=False):
+        """
+        Run `function` under the limiter, retrying throttled calls with jittered exponential backoff.
+        `function` returns (result, actual_tokens); actual_tokens may be None.
+        With hold=True the slot stays taken after success and the caller must call release,
+        e.g. once a response stream has been read.
+
+        Args:
+            function (callable): The Bedrock call
+            estimated_tokens (int): Estimated input plus output tokens of the call
+            timeout (float): Seconds the caller may spend queued and retrying
+            max_retries (int): Retries after throttling errors
+            hold (bool): Keep the concurrency slot after a successful call
+
+        Returns:
+            Result of `function`
+
+        Raises:
+            RateLimitTimeout: If the deadline passed while queued or backing off
+            ClientError: If the call failed for another reason or ran out of retries
+        """
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens, deadline)
+            try:
+                result, actual_tokens = function()
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                self.release(estimated_tokens, throttled=throttled)
+                if not throttled or attempt >= max_retries:
+                    raise
+                backoff = random.uniform(0, min(BEDROCK_BACKOFF_MAX, BEDROCK_BACKOFF_BASE * 2 ** attempt))
+                if time.monotonic() + backoff >= deadline:
+                    with self._condition:
+                        self._stats["timed_out"] += 1
+                    raise RateLimitTimeout("Bedrock kept throttling until the deadline") from e
+                attempt += 1
+                with self._condition:
+                    self._stats["retried"] += 1
+                time.sleep(backoff)
+                continue
+            if not hold:
+                self.release(estimated_tokens, actual_tokens=actual_tokens)
+            return result
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                **self._stats,
+                "in_flight": self.in_flight,
+                "concurrency_limit": int(self.concurrency),
+                "requests_available": int(self._requests.available),
+                "tokens_available": int(self._tokens.available)
+            }
+
+
+bedrock_limiter = AdaptiveLimiter()
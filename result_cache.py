@@ -0,0 +1,123 @@
+import copy
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import prompts
+from mongo_store import get_cached_result, store_cached_result
+
+# Result cache settings. The in-process LRU sits in front of the Mongo cache collection.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_LRU_SIZE = int(os.getenv("RESULT_CACHE_LRU_SIZE", "256"))
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU with a per-entry time to live.
+    """
+
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_lru = LRUCache(RESULT_CACHE_LRU_SIZE, RESULT_CACHE_TTL_SECONDS)
+
+
+@functools.lru_cache(maxsize=8)
+def prompt_fingerprint(model_id: str) -> str:
+    """
+    Fingerprint of the model id and every prompt in prompts.py.
+    Editing any prompt or switching model changes the fingerprint, so stale results are never served.
+
+    Args:
+        model_id (str): Bedrock model id used for classification and analysis
+
+    Returns:
+        str: Hex digest of the prompt/model version
+    """
+    digest = hashlib.sha256(model_id.encode())
+    digest.update(prompts.PROMPT_VERSION.encode())
+    for name in sorted(dir(prompts)):
+        value = getattr(prompts, name)
+        if name.startswith("system_prompt") and isinstance(value, str):
+            digest.update(name.encode())
+            digest.update(value.encode())
+        elif name.startswith("user_prompt") and callable(value):
+            digest.update(name.encode())
+            digest.update(value("<pdf_text>").encode())
+    return digest.hexdigest()
+
+
+def cache_key(pdf_bytes: bytes, model_id: str) -> str:
+    """
+    Content-addressed key: SHA-256 of the PDF bytes plus the prompt/model fingerprint.
+
+    Args:
+        pdf_bytes (bytes): Raw PDF content
+        model_id (str): Bedrock model id used for the summary, or model_routing.routes_fingerprint()
+
+    Returns:
+        str: Cache key
+    """
+    return f"{hashlib.sha256(pdf_bytes).hexdigest()}:{prompt_fingerprint(model_id)[:16]}"
+
+
+def get(key: str):
+    """
+    Looks up a summary result, first in the in-process LRU then in Mongo.
+
+    Returns:
+        dict: Cached result, or None on a miss
+    """
+    if not RESULT_CACHE_ENABLED:
+        return None
+    result = _lru.get(key)
+    if result is None:
+        result = get_cached_result(key)
+        if result is None:
+            return None
+        _lru.put(key, result)
+    return copy.deepcopy(result)
+
+
+def put(key: str, result: dict):
+    """
+    Stores a summary result in both cache tiers.
+    """
+    if not RESULT_CACHE_ENABLED:
+        return
+    result = copy.deepcopy(result)
+    _lru.put(key, result)
+    store_cached_result(key, result, RESULT_CACHE_TTL_SECONDS)
@@ -0,0 +1,142 @@
+import io
+import os
+from collections import OrderedDict
+
+import metrics
+
+# Ranged read settings. PDF parsers jump between the trailer at the end, the cross-reference
+# table and the objects they need, so reads are rounded up to blocks that are cached.
+S3_RANGE_BLOCK_BYTES = int(os.getenv("S3_RANGE_BLOCK_BYTES", str(64 * 1024)))
+S3_RANGE_CACHE_BLOCKS = int(os.getenv("S3_RANGE_CACHE_BLOCKS", "256"))
+
+
+class S3RangeFile(io.RawIOBase):
+    """
+    Seekable, read-only file over an S3 object. Only the blocks that are read are fetched,
+    with HTTP range requests, and kept in an LRU cache, so pdfminer can
+    open a document and read a few pages without downloading all of it.
+
+    Every range request is pinned to the ETag seen when the file was opened, a replaced
+    object fails the read instead of mixing blocks of two versions.
+    """
+
+    def __init__(self, s3_client, bucket_name, object_key, block_size=None, cache_blocks=None):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.object_key = object_key
+        self.block_size = block_size or S3_RANGE_BLOCK_BYTES
+        self.cache_blocks = max(1, cache_blocks or S3_RANGE_CACHE_BLOCKS)
+        head = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        self.size = head["ContentLength"]
+        self.etag = head.get("ETag")
+        self.requests = 0
+        self.bytes_fetched = 0
+        self._blocks = OrderedDict()
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast("B")
+        end = min(self._position + len(view), self.size)
+        if end <= self._position:
+            return 0
+        blocks = self._read_blocks(self._position // self.block_size, (end - 1) // self.block_size)
+        data = b"".join(blocks)
+        start = self._position - (self._position // self.block_size) * self.block_size
+        count = end - self._position
+        view[:count] = data[start:start + count]
+        self._position = end
+        return count
+
+    def readall(self):
+        return self.read(max(0, self.size - self._position))
+
+    def read_object(self) -> bytes:
+        """
+        Content of the whole object. Blocks already fetched are reused and the gaps
+        between them are fetched with one range request each.
+
+        Returns:
+            bytes: Object content
+        """
+        if self.size == 0:
+            return b""
+        return b"".join(self._read_blocks(0, (self.size - 1) // self.block_size, keep=False))
+
+    def stats(self) -> dict:
+        """
+        Object size, range requests made and bytes fetched so far.
+        """
+        return {"object_bytes": self.size, "range_requests": self.requests, "bytes_fetched": self.bytes_fetched}
+
+    def _read_blocks(self, first, last, keep=True):
+        """
+        Blocks first to last, fetching each run of missing blocks with a single request.
+        keep=False leaves freshly fetched blocks out of the cache, for one-off full reads.
+        """
+        blocks = {}
+        missing = []
+        for index in range(first, last + 1):
+            cached = self._blocks.get(index)
+            if cached is None:
+                missing.append(index)
+                continue
+            self._blocks.move_to_end(index)
+            blocks[index] = cached
+            if missing:
+                blocks.update(self._fetch(missing[0], missing[-1], keep))
+                missing = []
+        if missing:
+            blocks.update(self._fetch(missing[0], missing[-1], keep))
+        return [blocks[index] for index in range(first, last + 1)]
+
+    def _fetch(self, first, last, keep):
+        start = first * self.block_size
+        end = min((last + 1) * self.block_size, self.size) - 1
+        request = {"Bucket": self.bucket_name, "Key": self.object_key, "Range": f"bytes={start}-{end}"}
+        if self.etag:
+            request["IfMatch"] = self.etag
+        data = self.s3_client.get_object(**request)["Body"].read()
+        if len(data) != end - start + 1:
+            raise IOError(f"Range {start}-{end} of {self.object_key} returned {len(data)} bytes")
+        self.requests += 1
+        self.bytes_fetched += len(data)
+        metrics.bytes_total.inc(len(data), operation="s3_range_read")
+
+        fetched = {}
+        for index in range(first, last + 1):
+            offset = (index - first) * self.block_size
+            fetched[index] = data[offset:offset + self.block_size]
+            if keep:
+                self._blocks[index] = fetched[index]
+                self._blocks.move_to_end(index)
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return fetched
+
+    def close(self):
+        self._blocks.clear()
+        super().close()
@@ -1,53 +1,656 @@
-import PyPDF2
-import pdfplumber
-import pytesseract
-from PIL import Image
 import io
+import os
+import re
+import tempfile
+
+import executors
+import lazy_imports
+import metrics
+
+# pdfplumber and pdfminer are imported on first use, see lazy_imports
+pdfplumber = lazy_imports.lazy("pdfplumber")
+pdfplumber_page = lazy_imports.lazy("pdfplumber.page")
+pdfparser = lazy_imports.lazy("pdfminer.pdfparser")
+pdfdocument = lazy_imports.lazy("pdfminer.pdfdocument")
+pdfpage = lazy_imports.lazy("pdfminer.pdfpage")
+pdftypes = lazy_imports.lazy("pdfminer.pdftypes")
+psparser = lazy_imports.lazy("pdfminer.psparser")
+
+# Parallel extraction settings. Documents with fewer pages than PDF_PARALLEL_MIN_PAGES
+# are parsed serially because process start-up and pickling would dominate.
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+
+# Streaming extraction settings. Documents of PDF_STREAM_MIN_BYTES or more are parsed one page
+# at a time with page caches released after use. Page text moves to a temporary file once it
+# exceeds PDF_STREAM_SPILL_BYTES or the parse has grown the process by PDF_STREAM_MEMORY_CAP bytes.
+# Text past PDF_STREAM_MAX_TEXT_CHARS is dropped, the joined result has to fit in memory and
+# 2M characters (~500k tokens) is already far more than map-reduce analysis summarizes well.
+PDF_STREAM_MIN_BYTES = int(os.getenv("PDF_STREAM_MIN_BYTES", str(5 * 1024 * 1024)))
+PDF_STREAM_SPILL_BYTES = int(os.getenv("PDF_STREAM_SPILL_BYTES", str(2 * 1024 * 1024)))
+PDF_STREAM_MEMORY_CAP = int(os.getenv("PDF_STREAM_MEMORY_CAP", str(256 * 1024 * 1024)))
+PDF_STREAM_MAX_TEXT_CHARS = int(os.getenv("PDF_STREAM_MAX_TEXT_CHARS", str(2 * 1000 * 1000)))
+
+# Fast scanned detection inspects at most DETECT_SAMPLE_PAGES pages spread over the document
+DETECT_SAMPLE_PAGES = int(os.getenv("DETECT_SAMPLE_PAGES", "15"))
+
+_TEXT_SHOW_PATTERN = re.compile(rb"(?<![A-Za-z])(?:Tj|TJ)(?![A-Za-z])|[)>]\s*['\"]")
+_XOBJECT_DRAW_PATTERN = re.compile(rb"/([^\s/\[\]()<>{}%]+)\s+Do(?![A-Za-z])")
+_INLINE_IMAGE_PATTERN = re.compile(rb"(?<![A-Za-z])BI(?![A-Za-z])")
+_SUBTYPE_PATTERN = re.compile(rb"/Subtype\s*/([A-Za-z]+)")
+# Bytes read from the start of an XObject to find its /Subtype
+XOBJECT_PEEK_BYTES = 1024
+# Nesting depth up to which Form XObjects are opened to count their text and images
+FORM_XOBJECT_DEPTH = 3
+
+
+def _analyze_page(page, page_number):
+    """
+    Extracts text and image count from a single pdfplumber page and decides if it looks scanned.
+    Pages with neither text nor images are left undecided (None).
+    """
+    text = page.extract_text() or ""
+    image_count = len(page.images)
+    has_text = bool(text) and not text.isspace()
+
+    if not has_text and image_count > 0:
+        page_is_scanned = True
+    elif has_text:
+        page_is_scanned = False
+    else:
+        page_is_scanned = None
+
+    return {
+        "page_number": page_number,
+        "text": text,
+        "image_count": image_count,
+        "is_scanned": page_is_scanned
+    }
+
+
+def _document_verdict(pages):
+    """
+    Majority vote over the decided pages. Returns None if no page could be decided.
+    """
+    votes = [page["is_scanned"] for page in pages if page["is_scanned"] is not None]
+    if votes:
+        return sum(votes) / len(votes) >= 0.5
+    return None
+
+
+def _read_pdf_bytes(pdf_file):
+    """
+    Returns the raw bytes behind a path, bytes or file-like PDF input.
+    """
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, 'rb') as file:
+            return file.read()
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    pdf_file.seek(0)
+    return pdf_file.read()
+
+
+def iter_pdf_pages(pdf_file, start=0, end=None, caching=True):
+    """
+    Yields the analysis of one page at a time, see _analyze_page. Pages are created one by one
+    instead of through pdf.pages, and each page's parsed layout objects are released once its
+    text has been extracted, so memory does not grow with the page count.
+
+    Args:
+        pdf_file: Path, bytes or file-like object of the PDF
+        start (int): Index of the first page to analyze
+        end (int): Index after the last page to analyze, None for the end of the document
+        caching (bool): Keep the PDF objects pdfminer resolves, including decoded streams,
+                        until the document is closed. Off, objects are parsed again when
+                        needed and only the current page's stay in memory
+
+    Yields:
+        dict: {"page_number", "text", "image_count", "is_scanned"}
+    """
+    if isinstance(pdf_file, (bytes, bytearray)):
+        pdf_file = io.BytesIO(pdf_file)
+    with pdfplumber.open(pdf_file) as pdf:
+        pdf.doc.caching = caching
+        doctop = 0
+        for index, page_object in enumerate(pdfpage.PDFPage.create_pages(pdf.doc)):
+            if end is not None and index >= end:
+                break
+            page = pdfplumber_page.Page(pdf, page_object, page_number=index + 1, initial_doctop=doctop)
+            doctop += page.height
+            if index < start:
+                continue
+            try:
+                yield _analyze_page(page, index + 1)
+            finally:
+                page.close()
+
+
+def _analyze_page_range(pdf_bytes, start, end):
+    """
+    Worker entry point: opens the PDF and analyzes pages [start, end).
+    """
+    return list(iter_pdf_pages(pdf_bytes, start, end))
+
+
+def _page_ranges(page_count, parts):
+    """
+    Splits page indexes into at most `parts` contiguous, near-equal ranges.
+    """
+    parts = max(1, min(parts, page_count))
+    size, remainder = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for part in range(parts):
+        end = start + size + (1 if part < remainder else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _analyze_pages_parallel(pdf_bytes, page_count, workers):
+    """
+    Analyzes page ranges across the process pool and returns the pages in document order.
+    """
+    pool = executors.cpu_pool()
+    futures = [
+        pool.submit(_analyze_page_range, pdf_bytes, start, end)
+        for start, end in _page_ranges(page_count, workers)
+    ]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def analyze_pdf_pages(pdf_file, workers=None):
+    """
+    Single pass over the PDF that collects per-page text, image counts and the scanned verdict.
+    Large documents are split into page ranges and parsed across a process pool.
+
+    Args:
+        pdf_file: Path, bytes or file-like object of the PDF
+        workers (int): Number of page ranges to parse in parallel.
+                       Defaults to PDF_EXTRACT_WORKERS, 1 forces the serial path.
+
+    Returns:
+        dict: {
+            "is_scanned": document verdict (True/False/None),
+            "text": text of all pages joined with newlines,
+            "page_count": number of pages,
+            "pages": [{"page_number", "text", "image_count", "is_scanned"}, ...]
+        }
+    """
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    if isinstance(pdf_file, (bytes, bytearray)):
+        pdf_file = io.BytesIO(pdf_file)
+
+    pages = None
+    with metrics.stage("pdf_parse") as stage:
+        with pdfplumber.open(pdf_file) as pdf:
+            page_count = len(pdf.pages)
+            stage["pages"] = page_count
+            if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+                pages = []
+                for index, page in enumerate(pdf.pages):
+                    pages.append(_analyze_page(page, index + 1))
+                    # Layout objects are cached on the page until the PDF is closed
+                    page.close()
+
+        if pages is None:
+            stage["parallel"] = True
+            try:
+                pages = _analyze_pages_parallel(_read_pdf_bytes(pdf_file), page_count, workers)
+            except Exception as e:
+                print(f"Parallel extraction failed, falling back to serial: {e}")
+                pages = _analyze_page_range(_read_pdf_bytes(pdf_file), 0, page_count)
+
+    return {
+        "is_scanned": _document_verdict(pages),
+        "text": "\n".join(page["text"] for page in pages).strip(),
+        "page_count": page_count,
+        "pages": pages
+    }
+
+
+def _rss_bytes():
+    """
+    Resident set size of this process, None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class PageTexts:
+    """
+    Page texts spilled to a temporary file. Only the path and the offset and length of each
+    page are held, so a worker process returns them cheaply; texts are read back one page at
+    a time and close() deletes the file.
+    """
+
+    def __init__(self, path, spans):
+        self.path = path
+        self.spans = spans
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __iter__(self):
+        with open(self.path, "rb") as text_file:
+            for offset, length in self.spans:
+                text_file.seek(offset)
+                yield text_file.read(length).decode("utf-8")
+
+    def close(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class PageTextSpool:
+    """
+    Holds page texts in memory until they exceed max_bytes, then in a temporary file.
+    Only the offset and length of each page stay in memory once spilled.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._texts = []
+        self._size = 0
+        self._file = None
+        self._spans = []
+
+    def append(self, text):
+        if self._file is not None:
+            self._write(text)
+            return
+        self._texts.append(text)
+        self._size += len(text.encode("utf-8"))
+        if self._size > self.max_bytes:
+            self.spill()
+
+    def _write(self, text):
+        data = text.encode("utf-8")
+        self._spans.append((self._file.tell(), len(data)))
+        self._file.write(data)
+
+    def spill(self):
+        if self._file is not None:
+            return
+        self._file = tempfile.NamedTemporaryFile(prefix="pdf-text-", suffix=".txt", delete=False)
+        texts, self._texts = self._texts, []
+        for text in texts:
+            self._write(text)
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    def detach(self):
+        """
+        Hands the texts over: the list while they are in memory, else PageTexts over the
+        spill file, which the caller then has to close.
+        """
+        if self._file is None:
+            return self._texts
+        self._file.close()
+        return PageTexts(self._file.name, self._spans)
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            PageTexts(self._file.name, self._spans).close()
+
+
+def load_page_texts(page_analysis):
+    """
+    Reads the page texts of an analyze_pdf_pages_streaming result into its pages and its
+    joined "text", and deletes the spill file. Other results are returned unchanged.
+    """
+    page_texts = page_analysis.pop("page_texts", None)
+    if page_texts is None:
+        return page_analysis
+    try:
+        for page, text in zip(page_analysis["pages"], page_texts):
+            page["text"] = text
+    finally:
+        if isinstance(page_texts, PageTexts):
+            page_texts.close()
+    page_analysis["text"] = "\n".join(page["text"] for page in page_analysis["pages"]).strip()
+    return page_analysis
+
+
+def analyze_pdf_pages_streaming(pdf_file, spill_bytes=None, memory_cap=None, max_text_chars=None):
+    """
+    Bounded-memory variant of analyze_pdf_pages for very large documents. Pages are parsed
+    serially with iter_pdf_pages without object caching, their text accumulates in a
+    PageTextSpool, and the growth of the process during the parse is sampled after every page.
+    Text past max_text_chars is dropped; the remaining pages are still parsed for the scanned
+    verdict. The texts are returned as they are spooled, a list or a file the caller reads
+    with load_page_texts, so a spilled parse never holds all of them in memory.
+
+    Args:
+        pdf_file: Path, bytes or file-like object of the PDF
+        spill_bytes (int): Text size kept in memory, defaults to PDF_STREAM_SPILL_BYTES
+        memory_cap (int): Process growth after which text is spilled regardless of its size,
+                          defaults to PDF_STREAM_MEMORY_CAP
+        max_text_chars (int): Characters of text kept, defaults to PDF_STREAM_MAX_TEXT_CHARS
+
+    Returns:
+        dict: Same structure as analyze_pdf_pages, with "page_texts" (list or PageTexts) in
+              place of "text" and of the pages' text, plus
+              "peak_memory_bytes" (growth of the process during the parse, None if unknown),
+              "spilled" (whether page text went to disk) and
+              "text_truncated" (whether text past max_text_chars was dropped)
+    """
+    spill_bytes = PDF_STREAM_SPILL_BYTES if spill_bytes is None else spill_bytes
+    memory_cap = PDF_STREAM_MEMORY_CAP if memory_cap is None else memory_cap
+    max_text_chars = PDF_STREAM_MAX_TEXT_CHARS if max_text_chars is None else max_text_chars
+    spool = PageTextSpool(spill_bytes)
+    pages = []
+    baseline = _rss_bytes()
+    peak = 0
+    text_chars = 0
+    truncated = False
+    try:
+        with metrics.stage("pdf_parse", streaming=True) as stage:
+            for page in iter_pdf_pages(pdf_file, caching=False):
+                text = page.pop("text")
+                if text_chars + len(text) > max_text_chars:
+                    text = text[:max(0, max_text_chars - text_chars)]
+                    truncated = True
+                text_chars += len(text)
+                spool.append(text)
+                pages.append(page)
+                rss = _rss_bytes()
+                if baseline is not None and rss is not None:
+                    peak = max(peak, rss - baseline)
+                    if peak > memory_cap and not spool.on_disk:
+                        spool.spill()
+            stage["pages"] = len(pages)
+            stage["spilled"] = spool.on_disk
+            stage["peak_memory_bytes"] = peak if baseline is not None else None
+            stage["text_truncated"] = truncated
+    except BaseException:
+        spool.discard()
+        raise
+
+    return {
+        "is_scanned": _document_verdict(pages),
+        "page_texts": spool.detach(),
+        "page_count": len(pages),
+        "pages": pages,
+        "peak_memory_bytes": peak if baseline is not None else None,
+        "spilled": spool.on_disk,
+        "text_truncated": truncated
+    }
+
+
+def _xobject_subtype_peeker(document, pdf_file):
+    """
+    Returns a function reading the /Subtype of an XObject from the first bytes of the
+    object. Resolving an image makes pdfminer read all of its data, which is most of a
+    scanned document, while the detection only needs to know it is an image.
+    """
+    def peek(reference):
+        objid = getattr(reference, 'objid', None)
+        if objid is None:
+            return None
+        for xref in document.xrefs:
+            try:
+                stream_id, position, _ = xref.get_pos(objid)
+            except KeyError:
+                continue
+            if stream_id is not None:
+                # Streams never live in object streams
+                return None
+            pdf_file.seek(position)
+            header = pdf_file.read(XOBJECT_PEEK_BYTES).split(b"stream", 1)[0]
+            match = _SUBTYPE_PATTERN.search(header)
+            return match.group(1).decode('latin-1') if match else None
+        return None
+    return peek
+
+
+def _xobject_counts(resources, depth=0, peek_subtype=None):
+    """
+    Text-show and image-draw counts of the XObjects in a resource dict, by name. Images
+    count as one image draw; forms count what their own content draws, so a page built
+    from forms is judged on the text inside them and not only on their images.
+    """
+    counts = {}
+    xobjects = pdftypes.resolve1((resources or {}).get('XObject')) or {}
+    for name, reference in xobjects.items():
+        if peek_subtype is not None and peek_subtype(reference) == 'Image':
+            counts[name] = (0, 1)
+            continue
+        xobject = pdftypes.resolve1(reference)
+        attributes = getattr(xobject, 'attrs', {})
+        subtype = attributes.get('Subtype')
+        if subtype is psparser.LIT('Image'):
+            counts[name] = (0, 1)
+        elif subtype is psparser.LIT('Form') and depth < FORM_XOBJECT_DEPTH:
+            form_resources = pdftypes.resolve1(attributes.get('Resources')) or resources
+            counts[name] = _count_stream_objects(xobject.get_data(), form_resources, depth + 1, peek_subtype)
+    return counts
+
+
+def _count_stream_objects(data, resources, depth=0, peek_subtype=None):
+    """
+    Counts text-show operators and image draws in content stream bytes, following the
+    XObjects it draws.
+    """
+    xobject_counts = _xobject_counts(resources, depth, peek_subtype)
+    text_objects = len(_TEXT_SHOW_PATTERN.findall(data))
+    image_objects = len(_INLINE_IMAGE_PATTERN.findall(data))
+    for name in _XOBJECT_DRAW_PATTERN.findall(data):
+        drawn_text, drawn_images = xobject_counts.get(name.decode('latin-1'), (0, 0))
+        text_objects += drawn_text
+        image_objects += drawn_images
+    return text_objects, image_objects
+
+
+def _count_content_objects(page, peek_subtype=None):
+    """
+    Counts text-show operators and image draws in a page's content streams without layout analysis.
+    """
+    data = b"".join(pdftypes.resolve1(stream).get_data() for stream in (page.contents or []))
+    return _count_stream_objects(data, pdftypes.resolve1(page.resources), peek_subtype=peek_subtype)
+
+
+def _sample_order(page_count):
+    """
+    Page indexes ordered so every prefix is spread over the document: first, last, middle, quarters, ...
+    """
+    if page_count <= 0:
+        return []
+    order = [0]
+    seen = {0}
+    if page_count > 1:
+        order.append(page_count - 1)
+        seen.add(page_count - 1)
+    intervals = [(0, page_count - 1)]
+    while intervals:
+        next_intervals = []
+        for low, high in intervals:
+            middle = (low + high) // 2
+            if middle not in seen:
+                seen.add(middle)
+                order.append(middle)
+            if middle - low > 1:
+                next_intervals.append((low, middle))
+            if high - middle > 1:
+                next_intervals.append((middle, high))
+        intervals = next_intervals
+    return order
+
+
+def _page_tree_kind(node):
+    kind = node.get('Type') or node.get('type')
+    return getattr(kind, 'name', None)
+
+
+def _page_at(document, index, max_depth=32):
+    """
+    Finds one page by descending the page tree with the /Count of its nodes. Unlike
+    PDFPage.create_pages only the nodes on the way to the page are resolved, so a ranged
+    S3 file does not fetch every page object of the document.
+
+    Returns:
+        PDFPage: The page, or None if the tree's counts do not lead to it
+    """
+    reference = document.catalog.get('Pages')
+    node = pdftypes.resolve1(reference)
+    inherited = {}
+    for _ in range(max_depth):
+        if not isinstance(node, dict):
+            return None
+        attributes = {**inherited, **node}
+        if _page_tree_kind(node) == 'Page':
+            return pdfpage.PDFPage(document, getattr(reference, 'objid', None), attributes, None) if index == 0 else None
+        inherited = {key: value for key, value in attributes.items() if key in pdfpage.PDFPage.INHERITABLE_ATTRS}
+        kids = pdftypes.resolve1(node.get('Kids')) or []
+        if pdftypes.resolve1(node.get('Count')) == len(kids):
+            # One page per kid, the usual flat tree: jump straight to the kid
+            if index >= len(kids):
+                return None
+            reference = kids[index]
+            node = pdftypes.resolve1(reference)
+            index = 0
+            continue
+        for kid in kids:
+            child = pdftypes.resolve1(kid)
+            if not isinstance(child, dict):
+                return None
+            count = 1 if _page_tree_kind(child) == 'Page' else pdftypes.resolve1(child.get('Count'))
+            if not isinstance(count, int):
+                return None
+            if index < count:
+                reference, node = kid, child
+                break
+            index -= count
+        else:
+            return None
+    return None
+
+
+def _page_tree_count(document):
+    """
+    Page count from the /Count of the page tree root, None if the root has none.
+    """
+    root = pdftypes.resolve1(document.catalog.get('Pages'))
+    count = pdftypes.resolve1(root.get('Count')) if isinstance(root, dict) else None
+    return count if isinstance(count, int) and count > 0 else None
+
+
+def _inspect_sample(page_count, get_page, sample_pages, peek_subtype):
+    """
+    Counts text and image objects on sampled pages until the majority is decided.
+
+    Returns:
+        list: Inspected pages, None if get_page could not find a sampled page
+    """
+    sample = _sample_order(page_count)[:sample_pages]
+    scanned_votes = 0
+    text_votes = 0
+    inspected = []
+    for position, index in enumerate(sample):
+        page = get_page(index)
+        if page is None:
+            return None
+        text_objects, image_objects = _count_content_objects(page, peek_subtype)
+        if text_objects == 0 and image_objects > 0:
+            page_is_scanned = True
+            scanned_votes += 1
+        elif text_objects > 0:
+            page_is_scanned = False
+            text_votes += 1
+        else:
+            page_is_scanned = None
+        inspected.append({
+            "page_number": index + 1,
+            "text_objects": text_objects,
+            "image_objects": image_objects,
+            "is_scanned": page_is_scanned
+        })
+
+        # Stop once the remaining sampled pages cannot flip the majority (ties count as scanned)
+        remaining = len(sample) - position - 1
+        if scanned_votes >= text_votes + remaining or text_votes > scanned_votes + remaining:
+            break
+    return inspected
+
+
+def detect_scanned(pdf_file, sample_pages=None):
+    """
+    Cheap scanned/text decision from text-show and image-draw counts in the page content
+    streams. Pages are sampled across the document and inspection stops as soon as the
+    remaining sample could no longer change the majority. Sampled pages are looked up
+    through the page tree, so on a ranged S3 file only their objects are fetched.
+
+    Args:
+        pdf_file: Path, bytes or file-like object of the PDF
+        sample_pages (int): Maximum number of pages to inspect. Defaults to DETECT_SAMPLE_PAGES
+
+    Returns:
+        dict: {
+            "is_scanned": document verdict (True/False/None),
+            "page_count": number of pages,
+            "pages_inspected": number of pages whose content was read,
+            "pages": [{"page_number", "text_objects", "image_objects", "is_scanned"}, ...]
+        }
+    """
+    sample_pages = DETECT_SAMPLE_PAGES if sample_pages is None else sample_pages
+    if isinstance(pdf_file, (bytes, bytearray)):
+        pdf_file = io.BytesIO(pdf_file)
+    close_file = isinstance(pdf_file, (str, os.PathLike))
+    if close_file:
+        pdf_file = open(pdf_file, 'rb')
+
+    try:
+        with metrics.stage("scanned_detection") as stage:
+            document = pdfdocument.PDFDocument(pdfparser.PDFParser(pdf_file))
+            peek_subtype = _xobject_subtype_peeker(document, pdf_file)
+            page_count = _page_tree_count(document)
+            inspected = None
+            if page_count is not None:
+                inspected = _inspect_sample(
+                    page_count, lambda index: _page_at(document, index), sample_pages, peek_subtype
+                )
+            if inspected is None:
+                # No usable /Count in the page tree, walk every page like pdfminer does
+                pages = list(pdfpage.PDFPage.create_pages(document))
+                page_count = len(pages)
+                inspected = _inspect_sample(page_count, pages.__getitem__, sample_pages, peek_subtype)
+            stage["pages_inspected"] = len(inspected)
+    finally:
+        if close_file:
+            pdf_file.close()
+
+    return {
+        "is_scanned": _document_verdict(inspected),
+        "page_count": page_count,
+        "pages_inspected": len(inspected),
+        "pages": inspected
+    }
+
 
 def is_scanned_pdf(pdf_path):
     """
     Determines if a PDF is scanned or pure text by analyzing its content.
     Returns True if scanned, False if pure text.
     """
-    # Track results for each page
-    pages_analysis = []
-    
     try:
-        # Open PDF with pdfplumber
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                # Check for text content
-                text = page.extract_text()
-                
-                # Check for images
-                images = page.images
-                
-                # If page has no text but has images, likely scanned
-                if (not text or text.isspace()) and len(images) > 0:
-                    pages_analysis.append(True)
-                # If page has text and no/few images, likely pure text
-                elif text and not text.isspace():
-                    pages_analysis.append(False)
-                # If unclear, do additional checks
-                else:
-                    # Try to extract text using PyPDF2 as backup
-                    with open(pdf_path, 'rb') as file:
-                        reader = PyPDF2.PdfReader(file)
-                        if len(reader.pages) > 0:
-                            page_text = reader.pages[0].extract_text()
-                            if page_text and not page_text.isspace():
-                                pages_analysis.append(False)
-                            else:
-                                pages_analysis.append(True)
-    
+        return detect_scanned(pdf_path)["is_scanned"]
     except Exception as e:
         print(f"Error analyzing PDF: {e}")
         return None
-    
-    # If majority of pages appear scanned, consider the document scanned
-    if pages_analysis:
-        return sum(pages_analysis) / len(pages_analysis) >= 0.5
-    return None
 
 def analyze_pdf(pdf_path):
     """
@@ -56,7 +659,7 @@ def analyze_pdf(pdf_path):
     result = is_scanned_pdf(pdf_path)
 
     return {"scanned":result}
-    
+
     # if result is True:
     #     print("This appears to be a scanned PDF document")
     # elif result is False:
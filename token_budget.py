@@ -0,0 +1,145 @@
+import math
+import os
+
+# Token budgets for prompt inputs. Analysis above ANALYSIS_TOKEN_BUDGET switches to map-reduce.
+CLASSIFICATION_TOKEN_BUDGET = int(os.getenv("CLASSIFICATION_TOKEN_BUDGET", "3000"))
+ANALYSIS_TOKEN_BUDGET = int(os.getenv("ANALYSIS_TOKEN_BUDGET", "60000"))
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "8000"))
+MAP_CONCURRENCY = int(os.getenv("MAP_CONCURRENCY", "4"))
+
+# Claude averages roughly 4 characters of English text per token
+CHARS_PER_TOKEN = 4
+
+# Share of the classification budget spent on the leading pages before sampling the rest
+LEADING_PAGES_SHARE = 0.7
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in a text.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """
+    Cut a text to roughly `budget` tokens, preferring to end on a line break.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    cut = text[:budget * CHARS_PER_TOKEN]
+    line_end = cut.rfind("\n")
+    if line_end > len(cut) // 2:
+        cut = cut[:line_end]
+    return cut
+
+
+def shape_for_classification(pages: list, budget: int = CLASSIFICATION_TOKEN_BUDGET) -> str:
+    """
+    Build the classification input: leading pages first, then evenly sampled later pages,
+    all within the token budget.
+
+    Args:
+        pages (list): Text of each page in document order
+        budget (int): Token budget for the classification input
+
+    Returns:
+        str: Text to classify
+    """
+    pages = [page for page in pages if page and not page.isspace()]
+    if estimate_tokens("\n".join(pages)) <= budget:
+        return "\n".join(pages)
+
+    selected = []
+    used = 0
+    leading_budget = int(budget * LEADING_PAGES_SHARE)
+    index = 0
+    while index < len(pages) and used < leading_budget:
+        text = truncate_to_budget(pages[index], leading_budget - used)
+        selected.append(text)
+        used += estimate_tokens(text)
+        index += 1
+
+    remaining = pages[index:]
+    if remaining and used < budget:
+        # Spread the rest of the budget over pages sampled across the remainder
+        sample_count = min(len(remaining), 4)
+        per_page = (budget - used) // sample_count
+        step = len(remaining) / sample_count
+        for sample in range(sample_count):
+            selected.append(truncate_to_budget(remaining[int(sample * step)], per_page))
+
+    return "\n".join(selected)
+
+
+def _split_line(line: str, budget: int) -> list:
+    """
+    Split a line into parts of at most `budget` tokens, line break included, preferring to
+    cut at a space.
+    """
+    max_chars = max(1, budget * CHARS_PER_TOKEN - 1)
+    parts = []
+    while len(line) > max_chars:
+        cut = line.rfind(" ", 0, max_chars + 1)
+        if cut <= max_chars // 2:
+            cut = max_chars
+        parts.append(line[:cut])
+        line = line[cut:].lstrip(" ")
+    parts.append(line)
+    return parts
+
+
+def chunk_pages(pages: list, budget: int = CHUNK_TOKEN_BUDGET) -> list:
+    """
+    Group consecutive pages into chunks of at most `budget` tokens.
+    Pages larger than the budget are split on line breaks, and lines larger than the
+    budget on spaces, so no text is dropped.
+
+    Args:
+        pages (list): Text of each page in document order
+        budget (int): Token budget per chunk
+
+    Returns:
+        list: Chunk texts in document order
+    """
+    pieces = []
+    for page in pages:
+        if estimate_tokens(page) <= budget:
+            pieces.append(page)
+            continue
+        piece = []
+        piece_tokens = 0
+        lines = (part for line in page.split("\n") for part in _split_line(line, budget))
+        for line in lines:
+            line_tokens = estimate_tokens(line + "\n")
+            if piece and piece_tokens + line_tokens > budget:
+                pieces.append("\n".join(piece))
+                piece = []
+                piece_tokens = 0
+            piece.append(line)
+            piece_tokens += line_tokens
+        if piece:
+            pieces.append("\n".join(piece))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > budget:
+            chunks.append("\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -0,0 +1,114 @@
+import os
+import time
+
+import lazy_imports
+
+# Warm-up runs in the app lifespan before the first request is served. Turn it off for
+# short-lived workers where the import and client set-up cost would never pay back.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+# Modules deferred by lazy_imports that every summary request ends up needing
+WARMUP_MODULES = (
+    "boto3",
+    "botocore.config",
+    "pymongo",
+    "pdfplumber",
+    "pdfplumber.page",
+    "pdfminer.pdfparser",
+    "pdfminer.pdfdocument",
+    "pdfminer.pdfpage",
+    "pdfminer.pdftypes",
+    "pdfminer.psparser",
+    "magic"
+)
+
+# Timings of the last warm_up() run, reported by /metrics/startup
+last_warmup = {}
+
+
+def _warmup_pdf() -> bytes:
+    """
+    One-page PDF with a line of Helvetica text, parsed once so pdfminer builds its
+    standard font metrics, glyph and encoding tables before a real document arrives.
+    """
+    content = b"BT /F1 12 Tf 72 720 Td (Warm-up 0123456789) Tj ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(pdf)
+
+
+def _timed(timings, name, function):
+    started = time.perf_counter()
+    result = None
+    try:
+        result = function()
+    except Exception as e:
+        print(f"Warm-up step {name} failed: {e}")
+    timings[name] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def warm_up() -> dict:
+    """
+    Import the deferred modules, create the shared AWS and Mongo clients and run the
+    PDF parser and file type sniffing once, so the first request pays none of it.
+    Failures are logged and skipped, a cold dependency must not keep the app from starting.
+
+    Returns:
+        dict: Seconds spent on each warm-up step, "clients" only when a client had to be created
+    """
+    import aws_clients
+    import model_routing
+    import mongo_store
+    import scanned
+
+    timings = {}
+    _timed(timings, "imports", lambda: lazy_imports.preload(WARMUP_MODULES))
+
+    def create_clients():
+        # One Bedrock client per distinct route timeout, the routes share them
+        routes = [model_routing.route(stage, doc_class) for stage, doc_class in model_routing.ROUTES]
+        timeouts = {route["timeout"] for route in routes} | {route["fallback_timeout"] for route in routes}
+        wanted = [("s3", None)] + [("bedrock-runtime", timeout) for timeout in sorted(timeouts)]
+        # Clients that already exist, or stand-ins registered by tests and the benchmark, need no warm-up
+        missing = [(service, timeout) for service, timeout in wanted if not aws_clients.has_client(service, timeout)]
+        for service, timeout in missing:
+            aws_clients.get_client(service, read_timeout=timeout)
+        created = len(missing)
+        if not mongo_store.has_client():
+            # Creating the client starts the connection pool in the background, nothing is sent yet
+            mongo_store.get_client()
+            created += 1
+        return created
+
+    if _timed(timings, "clients", create_clients) == 0:
+        # Nothing was created, the timing would only measure lookups
+        del timings["clients"]
+
+    pdf_bytes = _warmup_pdf()
+
+    def run_parsers():
+        for page in scanned.iter_pdf_pages(pdf_bytes):
+            assert page["text"]
+        lazy_imports.load("magic").from_buffer(pdf_bytes, mime=True)
+
+    _timed(timings, "parsers", run_parsers)
+    last_warmup.clear()
+    last_warmup.update(timings)
+    return timings